@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Compares JSON and MessagePack REST responses (size, transfer & decoding time) for some typical endpoints
+Needs msgpack installed on both, server & client
+
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+
+from __future__ import unicode_literals
+
+from httplib2 import Http
+import msgpack
+import json
+import time
+import sys
+
+rest_url = 'http://172.27.0.1:8000/rest/'
+
+# Endpoints to compare, relative to rest_url. Add here your own (for example, an user services list of a big pool)
+endpoints = ['providers', 'authenticators', 'servicespools/overview', 'transports', 'system/overview', 'system/stats/assigned']
+
+# Times every request is repeated
+repeat = 10
+
+headers = {}
+
+
+def login():
+    h = Http()
+
+    parameters = '{ "auth": "interna", "username": "admin", "password": "temporal" }'
+
+    resp, content = h.request(rest_url + 'auth/login', method='POST', body=parameters)
+
+    if resp['status'] != '200':  # Authentication error due to incorrect parameters, bad request, etc...
+        print "Authentication error"
+        sys.exit(1)
+
+    res = json.loads(content)
+    if res['result'] != 'ok':  # Authentication error
+        print "Authentication error"
+        sys.exit(1)
+
+    headers['X-Auth-Token'] = res['token']
+
+
+def logout():
+    h = Http()
+    h.request(rest_url + 'auth/logout', headers=headers)
+
+
+def measure(endpoint, mimeType, loads):
+    '''
+    Returns (size, request time, decoding time) of endpoint requested as "mimeType", times in milliseconds
+    Format is negotiated using Content-Type header, because extensions are only recognized on first path element
+    '''
+    h = Http()
+    hdrs = dict(headers)
+    hdrs['Content-Type'] = mimeType
+    # Http object has no cache, so no conditional requests are done (but server may answer repeated requests from its short time cache)
+    requestTime = decodeTime = 0
+    for _ in range(repeat):
+        start = time.time()
+        resp, content = h.request(rest_url + endpoint, headers=hdrs)
+        requestTime += time.time() - start
+        if resp['status'] != '200':
+            print "Error in request: \n-------------------\n{}\n{}\n----------------".format(resp, content)
+            sys.exit(1)
+
+        start = time.time()
+        loads(content)
+        decodeTime += time.time() - start
+
+    return len(content), requestTime * 1000 / repeat, decodeTime * 1000 / repeat
+
+
+if __name__ == '__main__':
+    login()
+
+    print '{:<30} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'.format('Endpoint', 'json size', 'req ms', 'dec ms', 'mpack size', 'req ms', 'dec ms')
+    for endpoint in endpoints:
+        js = measure(endpoint, 'application/json', json.loads)
+        mp = measure(endpoint, 'application/x-msgpack', msgpack.loads)
+        print '{:<30} {:>10} {:>10.2f} {:>10.3f} {:>10} {:>10.2f} {:>10.3f}'.format(endpoint, js[0], js[1], js[2], mp[0], mp[1], mp[2])
+
+    logout()
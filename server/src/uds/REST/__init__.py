@@ -38,8 +38,10 @@ from django.utils.decorators import method_decorator
 from django.utils.translation import ugettext as _, activate
 from django.conf import settings
 from uds.REST.handlers import Handler, HandlerError, AccessDenied, NotFound, RequestError, ResponseError, NotSupportedError
+from uds.REST import conditional
 
 import time
+import types
 import logging
 
 import six
@@ -103,7 +105,8 @@ class Dispatcher(View):
         try:
             processor = processors.available_processors_ext_dict[content_type](request)
         except Exception:
-            processor = processors.available_processors_mime_dict.get(request.META.get('CONTENT_TYPE', 'json'), processors.default_processor)(request)
+            mimeType = request.META.get('CONTENT_TYPE', 'json').split(';')[0].strip()  # Strip parameters (charset, ...)
+            processor = processors.available_processors_mime_dict.get(mimeType, processors.default_processor)(request)
 
         # Obtain method to be invoked
         http_method = request.method.lower()
@@ -130,18 +133,39 @@ class Dispatcher(View):
             logger.debug('Getting attribute {0} for {1}'.format(http_method, full_path))
             return http.HttpResponseServerError('Unexcepected error')
 
+        # Resources that can be validated (ETag & Last-Modified) are resolved, if possible, without invoking the handler
+        cond = None
+        if http_method == 'get':
+            models = handler.cacheModels()
+            if models is not None:
+                cond = conditional.Conditional(request, handler, processor, models)
+                response = cond.notModified(request)
+                if response is None:
+                    response = cond.cachedResponse()
+                if response is not None:
+                    return response
+
         # Invokes the handler's operation, add headers to response and returns
         try:
             start = time.time()
-            response = operation()
+            try:
+                response = operation()
+            finally:
+                if http_method != 'get' and (handler.needs_admin or handler.needs_staff):
+                    conditional.modified()
             logger.debug('Execution time for method: {0}'.format(time.time() - start))
 
             if not handler.raw:  # Raw handlers will return an HttpResponse Object
                 start = time.time()
+                if cond is not None and isinstance(response, types.GeneratorType):
+                    response = list(response)  # Validated responses are stored, so they are not streamed
                 response = processor.getResponse(response)
             logger.debug('Execution time for encoding: {0}'.format(time.time() - start))
-            for k, val in six.iteritems(handler.headers()):
+            headers = handler.headers()
+            for k, val in six.iteritems(headers):
                 response[k] = val
+            if cond is not None:
+                response = cond.store(response, headers)
             return response
         except RequestError as e:
             return http.HttpResponseBadRequest(six.text_type(e))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django import http
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+from uds.core.util import versions
+
+import hashlib
+import time
+import six
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+__updated__ = '2017-05-22'
+
+# ETags are also renewed every this seconds, so changes that are not tracked (queryset updates, statistics, ...) are also seen
+MAX_AGE = 60
+# Responses are kept on server cache this seconds
+RESPONSE_CACHE_TIME = 10
+RESPONSE_PREFIX = 'restResponse:'
+# Version bumped by every modification done through REST by staff
+REST_WRITES = 'restWrites'
+
+
+class Conditional(object):
+    '''
+    Conditional GET (ETag & Last-Modified) and short time response cache for REST requests.
+
+    The ETag is built from the request (path, parameters, user, language & response format), the versions of the models the
+    response depends on (see uds.core.util.versions) and the current MAX_AGE period, so an unchanged resource
+    is resolved with a single cache access (the versions) and no work from handler.
+    '''
+
+    def __init__(self, request, handler, processor, models):
+        names = [REST_WRITES] + [m.__name__ for m in models]
+        modelVersions = versions.get(*names)
+        period = int(time.time()) // MAX_AGE
+
+        h = hashlib.sha1()
+        for v in [request.get_full_path(), processor.mime_type, request.LANGUAGE_CODE, handler.getValue('auth'), handler.getValue('username'), period] + modelVersions:
+            h.update(six.text_type(v).encode('utf-8'))
+            h.update(b'\0')
+
+        self.etag = '"{}"'.format(h.hexdigest())
+        self.lastModified = max(max(modelVersions) // 1000, period * MAX_AGE)
+
+    def __setHeaders(self, response):
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.lastModified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def notModified(self, request):
+        '''
+        Returns a "304 Not modified" response if client already has current version of resource, else None
+        '''
+        ifNoneMatch = request.META.get('HTTP_IF_NONE_MATCH')
+        if ifNoneMatch is not None:
+            if self.etag not in [v.strip() for v in ifNoneMatch.split(',')]:
+                return None
+        else:
+            ifModifiedSince = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            if ifModifiedSince is None or ifModifiedSince < self.lastModified:
+                return None
+
+        return self.__setHeaders(http.HttpResponseNotModified())
+
+    def cachedResponse(self):
+        '''
+        Returns the stored response for current version of resource, or None
+        '''
+        try:
+            cached = cache.get(RESPONSE_PREFIX + self.etag)
+        except Exception:
+            logger.exception('Getting cached response')
+            cached = None
+
+        if cached is None:
+            return None
+
+        content, contentType, headers = cached
+        response = http.HttpResponse(content=content, content_type=contentType)
+        for k, val in six.iteritems(headers):
+            response[k] = val
+        return self.__setHeaders(response)
+
+    def store(self, response, headers):
+        '''
+        Stores the response (if it is a successful one) and sets its validators
+        '''
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        try:
+            cache.set(RESPONSE_PREFIX + self.etag, (response.content, response['Content-Type'], headers), RESPONSE_CACHE_TIME)
+        except Exception:
+            logger.exception('Storing response')
+
+        return self.__setHeaders(response)
+
+
+def modified():
+    '''
+    Invoked after modification requests, invalidates every ETag
+    '''
+    versions.bump(REST_WRITES)
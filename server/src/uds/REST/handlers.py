@@ -99,6 +99,7 @@ class Handler(object):
     authenticated = True  # By default, all handlers needs authentication
     needs_admin = False  # By default, the methods will be accessible by anyone if nothing else indicated
     needs_staff = False  # By default, staff
+    cache_models = None  # Models whose changes invalidates GET responses. If None, responses are not validated nor cached
 
     # method names: 'get', 'post', 'put', 'patch', 'delete', 'head', 'options', 'trace'
     def __init__(self, request, path, operation, params, *args, **kwargs):
@@ -139,6 +140,14 @@ class Handler(object):
 
             self._user = self.getUser()
 
+    def cacheModels(self):
+        '''
+        Returns the models (list or tuple) the response for current request depends on, or None if response
+        can't be validated by Dispatcher (ETag/Last-Modified) nor cached. An empty list means that response only depends
+        on time (it's renewed every conditional.MAX_AGE seconds)
+        '''
+        return self.cache_models
+
     def headers(self):
         '''
         Returns the headers of the REST request (all)
@@ -74,7 +74,7 @@ class Accounts(ModelHandler):
             'tags': [tag.tag for tag in account.tags.all()],
             'comments': account.comments,
             'time_mark': account.time_mark,
-            'permission': permissions.getEffectivePermission(self._user, account)
+            'permission': self.getEffectivePermission(account)
         }
 
     def getGui(self, type_):
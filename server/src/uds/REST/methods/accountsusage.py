@@ -39,7 +39,6 @@ from uds.models.CalendarRule import freqs, CalendarRule
 from uds.models.Util import getSqlDatetime
 
 from uds.core.util import log
-from uds.core.util import permissions
 from uds.core.util.model import processUuid
 from uds.core.Environment import Environment
 from uds.REST.model import DetailHandler
@@ -83,7 +82,7 @@ class AccountsUsage(DetailHandler):  # pylint: disable=too-many-public-methods
 
     def getItems(self, parent, item):
         # Check what kind of access do we have to parent provider
-        perm = permissions.getEffectivePermission(self._user, parent)
+        perm = self.getEffectivePermission(parent)
         try:
             if item is None:
                 return [AccountsUsage.usageToDict(k, perm) for k in parent.usages.all()]
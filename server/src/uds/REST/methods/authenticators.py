@@ -54,6 +54,9 @@ class Authenticators(ModelHandler):
     detail = {'users': Users, 'groups': Groups}
     save_fields = ['name', 'comments', 'tags', 'priority', 'small_name']
 
+    query_fields = {'name': 'name', 'comments': 'comments', 'priority': 'priority'}
+    cache_models = (Authenticator,)
+
     table_title = _('Current authenticators')
     table_fields = [
         {'numeric_id': {'title': _('Id'), 'visible': True}},
@@ -88,18 +91,19 @@ class Authenticators(ModelHandler):
 
     def item_as_dict(self, auth):
         type_ = auth.getType()
-        return {
+        return self.addExpensiveFields({
             'numeric_id': auth.id,
             'id': auth.uuid,
             'name': auth.name,
-            'tags': [tag.tag for tag in auth.tags.all()],
             'comments': auth.comments,
             'priority': auth.priority,
             'small_name': auth.small_name,
-            'users_count': auth.users.count(),
             'type': type_.type(),
-            'permission': permissions.getEffectivePermission(self._user, auth)
-        }
+        }, {
+            'tags': lambda: [tag.tag for tag in auth.tags.all()],
+            'users_count': auth.users.count,
+            'permission': lambda: self.getEffectivePermission(auth)
+        })
 
     # Custom "search" method
     def search(self, item):
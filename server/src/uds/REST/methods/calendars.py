@@ -33,8 +33,7 @@
 from __future__ import unicode_literals
 
 from django.utils.translation import ugettext_lazy as _, ugettext
-from uds.models import Calendar
-from uds.core.util import permissions
+from uds.models import Calendar, CalendarRule
 
 from uds.REST.model import ModelHandler
 from .calendarrules import CalendarRules
@@ -55,6 +54,9 @@ class Calendars(ModelHandler):
 
     save_fields = ['name', 'comments', 'tags']
 
+    query_fields = {'name': 'name', 'comments': 'comments'}
+    cache_models = (Calendar, CalendarRule)
+
     table_title = _('Calendars')
     table_fields = [
         {'name': {'title': _('Name'), 'visible': True, 'type': 'icon', 'icon': 'fa fa-calendar text-success'}},
@@ -64,14 +66,15 @@ class Calendars(ModelHandler):
     ]
 
     def item_as_dict(self, calendar):
-        return {
+        return self.addExpensiveFields({
             'id': calendar.uuid,
             'name': calendar.name,
-            'tags': [tag.tag for tag in calendar.tags.all()],
             'comments': calendar.comments,
             'modified': calendar.modified,
-            'permission': permissions.getEffectivePermission(self._user, calendar)
-        }
+        }, {
+            'tags': lambda: [tag.tag for tag in calendar.tags.all()],
+            'permission': lambda: self.getEffectivePermission(calendar)
+        })
 
     def getGui(self, type_):
         return self.addDefaultFields([], ['name', 'comments', 'tags'])
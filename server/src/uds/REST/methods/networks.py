@@ -33,9 +33,8 @@
 from __future__ import unicode_literals
 
 from django.utils.translation import ugettext_lazy as _, ugettext
-from uds.models import Network
+from uds.models import Network, Transport
 from uds.core.util import net
-from uds.core.util import permissions
 from uds.core.ui.UserInterface import gui
 
 from uds.REST.model import ModelHandler, SaveException
@@ -56,6 +55,9 @@ class Networks(ModelHandler):
     model = Network
     save_fields = ['name', 'net_string', 'tags']
 
+    query_fields = {'name': 'name', 'net_string': 'net_string'}
+    cache_models = (Network, Transport)
+
     table_title = _('Current Networks')
     table_fields = [
         {'name': {'title': _('Name'), 'visible': True, 'type': 'icon', 'icon': 'fa fa-globe text-success'}},
@@ -93,5 +95,5 @@ class Networks(ModelHandler):
             'tags': [tag.tag for tag in item.tags.all()],
             'net_string': item.net_string,
             'networks_count': item.transports.count(),
-            'permission': permissions.getEffectivePermission(self._user, item)
+            'permission': self.getEffectivePermission(item)
         }
@@ -34,7 +34,6 @@ from __future__ import unicode_literals
 
 from django.utils.translation import ugettext, ugettext_lazy as _
 from uds.models import OSManager
-from uds.core.util import permissions
 
 from uds.REST import NotFound, RequestError
 from uds.core.osmanagers import factory
@@ -70,7 +69,7 @@ class OsManagers(ModelHandler):
             'type': type_.type(),
             'servicesTypes': type_.servicesType,
             'comments': osm.comments,
-            'permission': permissions.getEffectivePermission(self._user, osm)
+            'permission': self.getEffectivePermission(osm)
         }
 
     def item_as_dict(self, item):
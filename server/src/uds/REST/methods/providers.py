@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 from django.utils.translation import ugettext, ugettext_lazy as _
 from uds.models import Provider, Service, UserService
 from uds.core import services
+from uds.core.services.CircuitBreaker import CircuitBreaker
 from uds.core.util.State import State
 from uds.core.util import permissions
 from uds.core.util.model import processUuid
@@ -63,6 +64,7 @@ class Providers(ModelHandler):
     custom_methods = [('allservices', False), ('service', False), ('maintenance', True)]
 
     save_fields = ['name', 'comments', 'tags']
+    cache_models = (Provider, Service)
 
     table_title = _('Service providers')
 
@@ -73,6 +75,7 @@ class Providers(ModelHandler):
         {'maintenance_state': {'title': _('Status')}},
         {'services_count': {'title': _('Services'), 'type': 'numeric'}},
         {'user_services_count': {'title': _('User Services'), 'type': 'numeric'}},  # , 'width': '132px'
+        {'circuit_state': {'title': _('Connection')}},
         {'tags': {'title': _('tags'), 'visible': False}},
     ]
     # Field from where to get "class" and prefix for that class, so this will generate "row-state-A, row-state-X, ....
@@ -82,24 +85,27 @@ class Providers(ModelHandler):
         type_ = provider.getType()
 
         # Icon can have a lot of data (1-2 Kbytes), but it's not expected to have a lot of services providers, and even so, this will work fine
-        offers = [{
-            'name': ugettext(t.name()),
-            'type': t.type(),
-            'description': ugettext(t.description()),
-            'icon': t.icon().replace('\n', '')} for t in type_.getServicesTypes()]
-
-        return {
+        def offers():
+            return [{
+                'name': ugettext(t.name()),
+                'type': t.type(),
+                'description': ugettext(t.description()),
+                'icon': t.icon().replace('\n', '')} for t in type_.getServicesTypes()]
+
+        return self.addExpensiveFields({
             'id': provider.uuid,
             'name': provider.name,
-            'tags': [tag.vtag for tag in provider.tags.all()],
-            'services_count': provider.services.count(),
-            'user_services_count': UserService.objects.filter(deployed_service__service__provider=provider).exclude(state__in=(State.REMOVED, State.ERROR)).count(),
             'maintenance_mode': provider.maintenance_mode,
-            'offers': offers,
             'type': type_.type(),
             'comments': provider.comments,
-            'permission': permissions.getEffectivePermission(self._user, provider)
-        }
+        }, {
+            'tags': lambda: [tag.vtag for tag in provider.tags.all()],
+            'services_count': provider.services.count,
+            'user_services_count': lambda: UserService.objects.filter(deployed_service__service__provider=provider).exclude(state__in=(State.REMOVED, State.ERROR)).count(),
+            'circuit_state': lambda: CircuitBreaker.publishedInfo(provider.getEnvironment().key)['state'],
+            'offers': offers,
+            'permission': lambda: self.getEffectivePermission(provider)
+        })
 
     def checkDelete(self, item):
         if item.services.count() > 0:
@@ -122,7 +128,7 @@ class Providers(ModelHandler):
         '''
         for s in Service.objects.all():
             try:
-                perm = permissions.getEffectivePermission(self._user, s)
+                perm = self.getEffectivePermission(s)
                 if perm >= permissions.PERMISSION_READ:
                     yield DetailServices.serviceToDict(s, perm, True)
             except Exception:
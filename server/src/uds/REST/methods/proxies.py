@@ -35,7 +35,6 @@ from __future__ import unicode_literals
 from django.utils.translation import ugettext_lazy as _, ugettext
 from uds.models import Proxy
 from uds.core.ui.UserInterface import gui
-from uds.core.util import permissions
 import datetime
 
 from uds.REST.model import ModelHandler
@@ -75,7 +74,7 @@ class Proxies(ModelHandler):
             'port': proxy.port,
             'ssl': proxy.ssl,
             'check_cert': proxy.check_cert,
-            'permission': permissions.getEffectivePermission(self._user, proxy)
+            'permission': self.getEffectivePermission(proxy)
         }
 
     def getGui(self, type_):
@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 from django.utils.translation import ugettext, ugettext_lazy as _
 
 from uds.REST import model
+from uds.core.reports import executor
 from uds import reports
 
 import six
@@ -91,6 +92,12 @@ class Reports(model.BaseModelHandler):
         if nArgs == 2:
             if self._args[0] == model.GUI:
                 return self.getGui(self._args[1])
+            if self._args[0] == 'result':  # Status of a report job
+                return self.getJobInfo(self._args[1])
+
+        if nArgs == 3:
+            if self._args[0] == 'result' and self._args[2] == 'data':
+                return self.getJobResult(self._args[1])
 
         return self.invalidRequestException()
 
@@ -103,23 +110,42 @@ class Reports(model.BaseModelHandler):
         if len(self._args) != 1:
             return self.invalidRequestException()
 
-        report = self._findReport(self._args[0], self._params)
+        self._findReport(self._args[0], self._params)  # Checks that report exists
 
         try:
-            logger.debug('Report: {}'.format(report))
-            result = report.generateEncoded()
-
-            return {
-                'mime_type': report.mime_type,
-                'encoded': report.encoded,
-                'filename': report.filename,
-                'data': result
-            }
-
+            # Report is generated on background, client must poll for result using the returned job id
+            return self.jobInfo(executor.submit(self._args[0], self._params))
         except Exception as e:
             logger.exception('Generating report')
             return self.invalidRequestException(six.text_type(e))
 
+    def jobInfo(self, info):
+        return {
+            'id': info['id'],
+            'state': info['state'],
+            'progress': info['progress'],
+            'error': info['error'],
+        }
+
+    def getJobInfo(self, jobId):
+        info = executor.jobInfo(jobId)
+        if info is None:
+            self.invalidItemException()
+        return self.jobInfo(info)
+
+    def getJobResult(self, jobId):
+        info = executor.jobInfo(jobId)
+        data = executor.result(jobId)
+        if data is None:
+            self.invalidItemException()
+
+        return {
+            'mime_type': info['mime_type'],
+            'encoded': info['encoded'],
+            'filename': info['filename'],
+            'data': data
+        }
+
     # Gui related
     def getGui(self, uuid):
         report = self._findReport(uuid)
@@ -79,27 +79,35 @@ class Services(DetailHandler):  # pylint: disable=too-many-public-methods
         }
 
     @staticmethod
-    def serviceToDict(item, perm, full=False):
+    def serviceToDict(item, perm, full=False, handler=None):
         '''
         Convert a service db item to a dict for a rest response
         :param item: Service item (db)
         :param full: If full is requested, add "extra" fields to complete information
+        :param handler: If present, costly fields not requested to this handler are not included
         '''
         itemType = item.getType()
         retVal = {
             'id': item.uuid,
             'name': item.name,
-            'tags': [tag.tag for tag in item.tags.all()],
             'comments': item.comments,
             'type': item.data_type,
             'type_name': _(itemType.name()),
             'proxy_id': item.proxy.uuid if item.proxy is not None else '-1',
             'proxy': item.proxy.name if item.proxy is not None else '',
-            'deployed_services_count': item.deployedServices.count(),
-            'user_services_count': UserService.objects.filter(deployed_service__service=item).exclude(state__in=(State.REMOVED, State.ERROR)).count(),
             'maintenance_mode': item.provider.maintenance_mode,
             'permission': perm
         }
+        expensive = {
+            'tags': lambda: [tag.tag for tag in item.tags.all()],
+            'deployed_services_count': item.deployedServices.count,
+            'user_services_count': lambda: UserService.objects.filter(deployed_service__service=item).exclude(state__in=(State.REMOVED, State.ERROR)).count(),
+        }
+        if handler is not None:
+            handler.addExpensiveFields(retVal, expensive)
+        else:
+            retVal.update((k, v()) for k, v in six.iteritems(expensive))
+
         if full:
             retVal['info'] = Services.serviceInfo(item)
 
@@ -107,10 +115,10 @@ class Services(DetailHandler):  # pylint: disable=too-many-public-methods
 
     def getItems(self, parent, item):
         # Check what kind of access do we have to parent provider
-        perm = permissions.getEffectivePermission(self._user, parent)
+        perm = self.getEffectivePermission(parent)
         try:
             if item is None:
-                return [Services.serviceToDict(k, perm) for k in parent.services.all()]
+                return [Services.serviceToDict(k, perm, handler=self) for k in parent.services.all()]
             else:
                 k = parent.services.get(uuid=processUuid(item))
                 val = Services.serviceToDict(k, perm, full=True)
@@ -33,7 +33,8 @@
 from __future__ import unicode_literals
 
 from django.utils.translation import ugettext, ugettext_lazy as _
-from uds.models import DeployedService, OSManager, Service, Image, ServicesPoolGroup, Account
+from django.db.models import Count, Sum, Case, When, IntegerField
+from uds.models import DeployedService, OSManager, Service, Image, ServicesPoolGroup, Account, Provider
 from uds.models.CalendarAction import CALENDAR_ACTION_INITIAL, CALENDAR_ACTION_MAX, CALENDAR_ACTION_CACHE_L1, CALENDAR_ACTION_CACHE_L2, CALENDAR_ACTION_PUBLISH
 from uds.core.ui.images import DEFAULT_THUMB_BASE64
 from uds.core.util.State import State
@@ -88,6 +89,21 @@ class ServicesPools(ModelHandler):
     ]
     remove_fields = ['osmanager_id', 'service_id']
 
+    query_fields = {
+        'name': 'name',
+        'comments': 'comments',
+        'parent': 'service__name',
+        'user_services_count': 'user_services_count',
+        'user_services_in_preparation': 'user_services_in_preparation',
+    }
+    select_related = ['service', 'service__provider', 'osmanager', 'image', 'servicesPoolGroup', 'servicesPoolGroup__image', 'account']
+    prefetch_related = ['tags']
+    annotations = {
+        'user_services_count': Count('userServices'),
+        'user_services_in_preparation': Sum(Case(When(userServices__state=State.PREPARING, then=1), default=0, output_field=IntegerField())),
+    }
+    cache_models = (DeployedService, Service, Provider, OSManager, Image, ServicesPoolGroup, Account)  # User services counters are renewed every conditional.MAX_AGE
+
     table_title = _('Service Pools')
     table_fields = [
         {'name': {'title': _('Name')}},
@@ -104,34 +120,50 @@ class ServicesPools(ModelHandler):
 
     custom_methods = [('setFallbackAccess', True), ('actionsList', True)]
 
+    __restrained = None
+    __canInitiate = None
+
+    def __state(self, item):
+        if item.isInMaintenance():
+            return State.MAINTENANCE
+        elif self.__canInitiateService(item) is False:
+            return State.SLOWED_DOWN
+        return item.state
+
+    def __canInitiateService(self, item):
+        '''
+        Governor of every provider is checked only once (permits are per provider, not per pool)
+        '''
+        if self.__canInitiate is None:
+            self.__canInitiate = {}
+        providerId = item.service.provider_id
+        if providerId not in self.__canInitiate:
+            self.__canInitiate[providerId] = userServiceManager().canInitiateServiceFromDeployedService(item)
+        return self.__canInitiate[providerId]
+
+    def __isRestrained(self, item):
+        '''
+        Restrained pools are obtained with a single query for all items
+        '''
+        if self.__restrained is None:
+            self.__restrained = set(pool.id for pool in DeployedService.getRestraineds())
+        return item.id in self.__restrained
 
     def item_as_dict(self, item):
         # if item does not have an associated service, hide it (the case, for example, for a removed service)
         # Access from dict will raise an exception, and item will be skipped
         poolGroupId = None
         poolGroupName = _('Default')
-        poolGroupThumb = DEFAULT_THUMB_BASE64
         if item.servicesPoolGroup is not None:
             poolGroupId = item.servicesPoolGroup.uuid
             poolGroupName = item.servicesPoolGroup.name
-            if item.servicesPoolGroup.image is not None:
-                poolGroupThumb = item.servicesPoolGroup.image.thumb64
-
-        state = item.state
-        if item.isInMaintenance():
-            state = State.MAINTENANCE
-        elif userServiceManager().canInitiateServiceFromDeployedService(item) is False:
-            state = State.SLOWED_DOWN
 
         val = {
             'id': item.uuid,
             'name': item.name,
-            'tags': [tag.tag for tag in item.tags.all()],
             'parent': item.service.name,
             'parent_type': item.service.data_type,
             'comments': item.comments,
-            'state': state,
-            'thumb': item.image.thumb64 if item.image is not None else DEFAULT_THUMB_BASE64,
             'account': item.account.name if item.account is not None else '',
             'service_id': item.service.uuid,
             'provider_id': item.service.provider.uuid,
@@ -139,21 +171,27 @@ class ServicesPools(ModelHandler):
             'servicesPoolGroup_id': poolGroupId,
             'account_id': item.account.uuid if item.account is not None else None,
             'pool_group_name': poolGroupName,
-            'pool_group_thumb': poolGroupThumb,
             'initial_srvs': item.initial_srvs,
             'cache_l1_srvs': item.cache_l1_srvs,
             'cache_l2_srvs': item.cache_l2_srvs,
             'max_srvs': item.max_srvs,
-            'user_services_count': item.userServices.count(),
-            'user_services_in_preparation': item.userServices.filter(state=State.PREPARING).count(),
-            'restrained': item.isRestrained(),
             'show_transports': item.show_transports,
             'visible': item.visible,
             'fallbackAccess': item.fallbackAccess,
-            'permission': permissions.getEffectivePermission(self._user, item),
-            'info': Services.serviceInfo(item.service),
         }
 
+        self.addExpensiveFields(val, {
+            'state': lambda: self.__state(item),
+            'tags': lambda: [tag.tag for tag in item.tags.all()],
+            'thumb': lambda: item.image.thumb64 if item.image is not None else DEFAULT_THUMB_BASE64,
+            'pool_group_thumb': lambda: item.servicesPoolGroup.image.thumb64 if item.servicesPoolGroup is not None and item.servicesPoolGroup.image is not None else DEFAULT_THUMB_BASE64,
+            'user_services_count': lambda: self.annotated(item, 'user_services_count', item.userServices.count),
+            'user_services_in_preparation': lambda: self.annotated(item, 'user_services_in_preparation', item.userServices.filter(state=State.PREPARING).count),
+            'restrained': lambda: self.__isRestrained(item),
+            'permission': lambda: self.getEffectivePermission(item),
+            'info': lambda: Services.serviceInfo(item.service),
+        })
+
         if item.osmanager is not None:
             val['osmanager_id'] = item.osmanager.uuid
 
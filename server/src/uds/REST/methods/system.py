@@ -84,6 +84,13 @@ def getServicesPoolsCounters(servicePool, counter_type):
 
 
 class System(Handler):
+    def cacheModels(self):
+        if len(self._args) == 1 and self._args[0] == 'overview':
+            return (Service, DeployedService)  # Users & user services counters are renewed every conditional.MAX_AGE
+        if len(self._args) == 2 and self._args[0] == 'stats':
+            return ()  # Counters only changes with time
+        return None
+
     def get(self):
         logger.debug('args: {0}'.format(self._args))
         if len(self._args) == 1:
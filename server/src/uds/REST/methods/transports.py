@@ -33,9 +33,8 @@
 from __future__ import unicode_literals
 
 from django.utils.translation import ugettext_lazy as _, ugettext
-from uds.models import Transport, Network
+from uds.models import Transport, Network, DeployedService
 from uds.core.transports import factory
-from uds.core.util import permissions
 from uds.core.util import OsDetector
 
 from uds.REST.model import ModelHandler
@@ -51,6 +50,9 @@ class Transports(ModelHandler):
     model = Transport
     save_fields = ['name', 'comments', 'tags', 'priority', 'nets_positive', 'allowed_oss']
 
+    query_fields = {'name': 'name', 'comments': 'comments', 'priority': 'priority'}
+    cache_models = (Transport, DeployedService, Network)
+
     table_title = _('Current Transports')
     table_fields = [
         {'priority': {'title': _('Priority'), 'type': 'numeric', 'width': '6em'}},
@@ -97,20 +99,21 @@ class Transports(ModelHandler):
 
     def item_as_dict(self, item):
         type_ = item.getType()
-        return {
+        return self.addExpensiveFields({
             'id': item.uuid,
             'name': item.name,
-            'tags': [tag.tag for tag in item.tags.all()],
             'comments': item.comments,
             'priority': item.priority,
             'nets_positive': item.nets_positive,
-            'networks': [{'id': n.id} for n in item.networks.all()],
             'allowed_oss': [{'id': x} for x in item.allowed_oss.split(',')] if item.allowed_oss != '' else [],
-            'deployed_count': item.deployedServices.count(),
             'type': type_.type(),
             'protocol': type_.protocol,
-            'permission': permissions.getEffectivePermission(self._user, item)
-        }
+        }, {
+            'tags': lambda: [tag.tag for tag in item.tags.all()],
+            'networks': lambda: [{'id': n.id} for n in item.networks.all()],
+            'deployed_count': item.deployedServices.count,
+            'permission': lambda: self.getEffectivePermission(item)
+        })
 
     def beforeSave(self, fields):
         fields['allowed_oss'] = ','.join(fields['allowed_oss'])
@@ -56,6 +56,16 @@ class AssignedService(DetailHandler):
     '''
     Rest handler for Assigned Services, wich parent is Service
     '''
+    query_fields = {
+        'unique_id': 'unique_id',
+        'friendly_name': 'friendly_name',
+        'state': 'state',
+        'state_date': 'state_date',
+        'creation_date': 'creation_date',
+        'in_use': 'in_use',
+        'source_host': 'src_hostname',
+        'source_ip': 'src_ip',
+    }
 
     @staticmethod
     def itemToDict(item, is_cache=False):
@@ -106,14 +116,19 @@ class AssignedService(DetailHandler):
             })
         return val
 
+    def getQuerySet(self, parent):
+        return parent.assignedUserServices().all().select_related('deployed_service', 'publication', 'user', 'user__manager').prefetch_related('properties')
+
+    def itemAsDict(self, parent, item):
+        return AssignedService.itemToDict(item)
+
     def getItems(self, parent, item):
         # Extract provider
         try:
             if item is None:
-                return [AssignedService.itemToDict(k) for k in parent.assignedUserServices().all()
-                        .prefetch_related('properties').prefetch_related('deployed_service').prefetch_related('publication')]
+                return [AssignedService.itemToDict(k) for k in self.getQuerySet(parent)]
             else:
-                return parent.assignedUserServices().get(processUuid(uuid=processUuid(item)))
+                return AssignedService.itemToDict(self.getQuerySet(parent).get(uuid=processUuid(item)))
         except Exception:
             logger.exception('getItems')
             self.invalidItemException()
@@ -173,14 +188,21 @@ class CachedService(AssignedService):
     Rest handler for Cached Services, wich parent is Service
     '''
 
+    query_fields = dict(AssignedService.query_fields, cache_level='cache_level')
+
+    def getQuerySet(self, parent):
+        return parent.cachedUserServices().all().select_related('deployed_service', 'publication').prefetch_related('properties')
+
+    def itemAsDict(self, parent, item):
+        return AssignedService.itemToDict(item, True)
+
     def getItems(self, parent, item):
         # Extract provider
         try:
             if item is None:
-                return [AssignedService.itemToDict(k, True) for k in parent.cachedUserServices().all()
-                        .prefetch_related('properties').prefetch_related('deployed_service').prefetch_related('publication')]
+                return [AssignedService.itemToDict(k, True) for k in self.getQuerySet(parent)]
             else:
-                k = parent.cachedUserServices().get(uuid=processUuid(item))
+                k = self.getQuerySet(parent).get(uuid=processUuid(item))
                 return AssignedService.itemToDict(k, True)
         except Exception:
             logger.exception('getItems')
@@ -223,7 +245,7 @@ class Groups(DetailHandler):
             'state': i.state,
             'type': i.is_meta and 'meta' or 'group',
             'auth_name': i.manager.name,
-        } for i in parent.assignedGroups.all()]
+        } for i in parent.assignedGroups.all().select_related('manager')]
 
     def getTitle(self, parent):
         return _('Assigned groups')
@@ -292,7 +314,7 @@ class Publications(DetailHandler):
         '''
         changeLog = self._params['changelog'] if 'changelog' in self._params else None
 
-        if permissions.checkPermissions(self._user, parent, permissions.PERMISSION_MANAGEMENT) is False:
+        if self.permissionsResolver().checkPermissions(parent, permissions.PERMISSION_MANAGEMENT) is False:
             logger.debug('Management Permission failed for user {}'.format(self._user))
             self.accessDenied()
 
@@ -307,7 +329,7 @@ class Publications(DetailHandler):
         :param parent: Parent service pool
         :param uuid: uuid of the publication
         '''
-        if permissions.checkPermissions(self._user, parent, permissions.PERMISSION_MANAGEMENT) is False:
+        if self.permissionsResolver().checkPermissions(parent, permissions.PERMISSION_MANAGEMENT) is False:
             logger.debug('Management Permission failed for user {}'.format(self._user))
             self.accessDenied()
 
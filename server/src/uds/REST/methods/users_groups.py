@@ -84,12 +84,26 @@ class Users(DetailHandler):
             del v['uuid']
             yield v
 
+    query_fields = {
+        'name': 'name',
+        'real_name': 'real_name',
+        'comments': 'comments',
+        'state': 'state',
+        'last_access': 'last_access',
+    }
+
+    def getQuerySet(self, parent):
+        return parent.users.all().values('uuid', 'name', 'real_name', 'comments', 'state', 'staff_member', 'is_admin', 'last_access', 'parent')
+
+    def itemAsDict(self, parent, item):
+        return next(Users.uuid_to_id([item]))
+
     def getItems(self, parent, item):
         logger.debug(item)
         # Extract authenticator
         try:
             if item is None:
-                return list(Users.uuid_to_id(parent.users.all().values('uuid', 'name', 'real_name', 'comments', 'state', 'staff_member', 'is_admin', 'last_access', 'parent')))
+                return list(Users.uuid_to_id(self.getQuerySet(parent)))
             else:
                 u = parent.users.get(uuid=processUuid(item))
                 res = model_to_dict(u, fields=('name', 'real_name', 'comments', 'state', 'staff_member', 'is_admin', 'last_access', 'parent'))
@@ -223,30 +237,37 @@ class Groups(DetailHandler):
 
     custom_methods = ['servicesPools', 'users']
 
+    query_fields = {
+        'name': 'name',
+        'comments': 'comments',
+        'state': 'state',
+    }
+
+    @staticmethod
+    def groupToDict(item):
+        val = {
+            'id': item.uuid,
+            'name': item.name,
+            'comments': item.comments,
+            'state': item.state,
+            'type': item.is_meta and 'meta' or 'group',
+            'meta_if_any': item.meta_if_any
+        }
+        if item.is_meta:
+            val['groups'] = list(x.uuid for x in item.groups.all())
+        return val
+
+    def getQuerySet(self, parent):
+        return parent.groups.all().order_by('name')
+
+    def itemAsDict(self, parent, item):
+        return Groups.groupToDict(item)
+
     def getItems(self, parent, item):
         try:
-            multi = False
             if item is None:
-                multi = True
-                q = parent.groups.all().order_by('name')
-            else:
-                q = parent.groups.filter(uuid=processUuid(item))
-            res = []
-            for i in q:
-                val = {
-                    'id': i.uuid,
-                    'name': i.name,
-                    'comments': i.comments,
-                    'state': i.state,
-                    'type': i.is_meta and 'meta' or 'group',
-                    'meta_if_any': i.meta_if_any
-                }
-                if i.is_meta:
-                    val['groups'] = list(x.uuid for x in i.groups.all())
-                res.append(val)
-            if multi:
-                return res
-            return res[0]
+                return [Groups.groupToDict(i) for i in self.getQuerySet(parent)]
+            return Groups.groupToDict(parent.groups.get(uuid=processUuid(item)))
         except:
             logger.exception('REST groups')
             self.invalidItemException()
@@ -39,22 +39,19 @@ from django.db import IntegrityError
 
 from uds.core.ui.UserInterface import gui as uiGui
 from uds.REST.handlers import Handler, HandlerError
+from uds.REST.query import ItemsQuery, TOTAL_COUNT_HEADER
 from uds.core.util import log
 from uds.core.util import permissions
 from uds.core.util.model import processUuid
 from uds.models import Tag
 
 import six
-import fnmatch
-import re
-import itertools
-import types
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2017-02-02'
+__updated__ = '2017-05-22'
 
 
 # a few constants
@@ -79,6 +76,7 @@ class BaseModelHandler(Handler):
     '''
     Base Handler for Master & Detail Handlers
     '''
+    _permissionsResolver = None
 
     def addField(self, gui, field):  # pylint: disable=no-self-use
         '''
@@ -166,12 +164,51 @@ class BaseModelHandler(Handler):
 
         return gui
 
+    def permissionsResolver(self):
+        '''
+        Permissions resolver for the user of this request (permissions are read once per request)
+        '''
+        if self._permissionsResolver is None:
+            self._permissionsResolver = permissions.Resolver(self._user)
+        return self._permissionsResolver
+
+    def getEffectivePermission(self, obj, root=False):
+        return self.permissionsResolver().getEffectivePermission(obj, root)
+
     def ensureAccess(self, obj, permission, root=False):
-        perm = permissions.getEffectivePermission(self._user, obj, root)
+        perm = self.getEffectivePermission(obj, root)
         if perm < permission:
             self.accessDenied()
         return perm
 
+    def wants(self, field):  # pylint: disable=no-self-use,unused-argument
+        '''
+        Returns True if field has been requested (all fields are requested if "fields" parameter is not present)
+        '''
+        return True
+
+    def addExpensiveFields(self, res, fields):
+        '''
+        Adds to res the costly fields, only if they are requested (see "fields" parameter on ItemsQuery)
+        :param res: Dictionary where to add the fields
+        :param fields: Dictionary of field name: callable that returns the value of the field
+        '''
+        for name, fnc in six.iteritems(fields):
+            if self.wants(name):
+                res[name] = fnc()
+        return res
+
+    @staticmethod
+    def annotated(item, name, fnc):
+        '''
+        Returns the value of "name" annotated by database on item (see ModelHandler.annotations) or,
+        if item has not been annotated (for example, it was not retrieved using the handler queryset), the result of fnc()
+        '''
+        try:
+            return getattr(item, name)
+        except AttributeError:
+            return fnc()
+
     def typeInfo(self, type_):  # pylint: disable=no-self-use
         '''
         Returns info about the type
@@ -296,7 +333,7 @@ class DetailHandler(BaseModelHandler):  # pylint: disable=abstract-class-not-use
     [path]/types
     [path]/types/TYPE
     [path]/tableinfo
-    ....?filter=[filter],[filter]..., filters are simple unix files filters, with ^ and $ supported
+    ....?filter=[filter]&sort=[fields]&offset=[n]&limit=[n], see ItemsQuery
     For PUT:
     [path] --> create NEW item
     [path]/ID --> Modify existing item
@@ -304,8 +341,13 @@ class DetailHandler(BaseModelHandler):  # pylint: disable=abstract-class-not-use
     [path]/ID
 
     Also accepts GET methods for "custom" methods
+
+    Details that provide getQuerySet & itemAsDict get their items lists filtered, sorted and paged by database
+    (for fields declared on query_fields)
     '''
     custom_methods = []
+    # Result field names to database lookups, used for filtering & sorting
+    query_fields = {}
 
     def __init__(self, parentHandler, path, params, *args, **kwargs):  # pylint: disable=super-init-not-called
         '''
@@ -348,7 +390,7 @@ class DetailHandler(BaseModelHandler):  # pylint: disable=abstract-class-not-use
         parent = self._kwargs['parent']
 
         if nArgs == 0:
-            return self.getItems(parent, None)
+            return self.getItemsPage(parent)
 
         # if has custom methods, look for if this request matches any of them
         r = self.__checkCustom(self._args[0], parent)
@@ -357,7 +399,7 @@ class DetailHandler(BaseModelHandler):  # pylint: disable=abstract-class-not-use
 
         if nArgs == 1:
             if self._args[0] == OVERVIEW:
-                return self.getItems(parent, None)
+                return self.getItemsPage(parent)
             elif self._args[0] == GUI:
                 gui = self.getGui(parent, None)
                 return sorted(gui, key=lambda f: f['gui']['order'])
@@ -448,6 +490,35 @@ class DetailHandler(BaseModelHandler):  # pylint: disable=abstract-class-not-use
         # return {}  # Returns one item
         raise NotImplementedError('Must provide an getItems method for {} class'.format(self.__class__))
 
+    def wants(self, field):
+        return self._parent.wants(field)
+
+    def permissionsResolver(self):
+        return self._parent.permissionsResolver()
+
+    def getQuerySet(self, parent):  # pylint: disable=no-self-use,unused-argument
+        '''
+        Override this (and itemAsDict) so items lists can be filtered, sorted & paged by database
+        Expects a queryset with all the items of parent, or None if not supported
+        '''
+        return None
+
+    def itemAsDict(self, parent, item):  # pylint: disable=no-self-use,unused-argument
+        '''
+        Converts an item of getQuerySet to a dictionary (or None to skip it)
+        '''
+        return None
+
+    def getItemsPage(self, parent):
+        '''
+        Returns the items of parent, applying the filter, sort & paging of request (see ItemsQuery)
+        '''
+        queryset = self.getQuerySet(parent)
+        if queryset is None:
+            return self.getItems(parent, None)  # Query (if any) will be applied over the resulting list
+
+        return self._parent.itemsQuery.apply(queryset, self.query_fields, lambda item: self.itemAsDict(parent, item))
+
     # Default save
     def saveItem(self, parent, item):
         '''
@@ -541,6 +612,8 @@ class ModelHandler(BaseModelHandler):
     [path]/overview --> Returns all elements for this path, not including INSTANCE variables. (example: .../providers/overview)
     [path]/ID --> Returns an exact element for this path. (example: .../providers/4)
     [path/ID/DETAIL --> Delegates to Detail, if it has details. (example: .../providers/4/services/overview, .../providers/5/services/9/gui, ....
+    Lists can be filtered, sorted & paged (?filter=[filter]&sort=[fields]&offset=[n]&limit=[n], see ItemsQuery). In that case,
+    the number of items (before paging) is returned on X-Total-Count header. Returned fields can be restricted with ?fields=[fields]
 
     Note: Instance variables are the variables declared and serialized by modules.
           The only detail that has types within is "Service", child of "Provider"
@@ -551,8 +624,18 @@ class ModelHandler(BaseModelHandler):
     # Which model does this manage
     model = None
 
-    # By default, filter is empty
-    fltr = None
+    # Filter, sort & paging of lists
+    itemsQuery = None
+    # Result field names to database lookups, used for filtering & sorting
+    query_fields = {}
+
+    # Relations used by item_as_dict, retrieved with items query (select_related, for foreign keys)
+    # or with one query for all items (prefetch_related, for many to many & reverse foreign keys)
+    select_related = []
+    prefetch_related = []
+    # Result field names to aggregates calculated by database for each item, (for example, {'users_count': Count('users')})
+    # Only result fields wanted by request are annotated (see wants)
+    annotations = {}
 
     # This is an array of tuples of two items, where first is method and second inticates if method needs parent id
     # For example ('services', True) -- > .../id_parent/services
@@ -642,56 +725,6 @@ class ModelHandler(BaseModelHandler):
 
     # End overridable
 
-    def extractFilter(self):
-        # Extract filter from params if present
-        self.fltr = None
-        if 'filter' in self._params:
-            self.fltr = self._params['filter']
-            del self._params['filter']  # Remove parameter
-            logger.debug('Found a filter expression ({})'.format(self.fltr))
-
-    def doFilter(self, data):
-        # Right now, filtering only supports a single filter, in a future
-        # we may improve it
-        if self.fltr is None:
-            return data
-
-        # Filtering a non iterable (list or tuple)
-        if not isinstance(data, (list, tuple, types.GeneratorType)):
-            return data
-
-        logger.debug('data: {}, fltr: {}'.format(data, self.fltr))
-        try:
-            fld, pattern = self.fltr.split('=')
-            s, e = '', ''
-            if pattern[0] == '^':
-                pattern = pattern[1:]
-                s = '^'
-            if pattern[-1] == '$':
-                pattern = pattern[:-1]
-                e = '$'
-
-            r = re.compile(s + fnmatch.translate(pattern) + e, re.IGNORECASE)
-
-            def fltr_function(item):
-                try:
-                    if fld not in item or r.match(item[fld]) is None:
-                        return False
-                except Exception:
-                    return False
-                return True
-
-            res = list(itertools.ifilter(fltr_function, data))
-
-            logger.debug('After filtering: {}'.format(res))
-            return res
-        except:
-            logger.exception('Exception:')
-            logger.info('Filtering expression {} is invalid!'.format(self.fltr))
-            raise RequestError('Filtering expression {} is invalid'.format(self.fltr))
-
-        return data
-
     # Helper to process detail
     # Details can be managed (writen) by any user that has MANAGEMENT permission over parent
     def processDetail(self):
@@ -705,7 +738,7 @@ class ModelHandler(BaseModelHandler):
             else:
                 requiredPermission = permissions.PERMISSION_READ
 
-            if permissions.checkPermissions(self._user, item, requiredPermission) is False:
+            if self.permissionsResolver().checkPermissions(item, requiredPermission) is False:
                 logger.debug('Permission for user {} does not comply with {}'.format(self._user, requiredPermission))
                 self.accessDenied()
 
@@ -721,35 +754,75 @@ class ModelHandler(BaseModelHandler):
 
         return method()
 
+    def __itemAsDict(self, item, overview):
+        try:
+            if self.permissionsResolver().checkPermissions(item, permissions.PERMISSION_READ) is False:
+                return None
+            if overview:
+                return self.item_as_dict_overview(item)
+            res = self.item_as_dict(item)
+            self.fillIntanceFields(item, res)
+            return res
+        except Exception:  # maybe an exception is thrown to skip an item
+            # logger.exception('Exception getting item from {0}'.format(self.model))
+            return None
+
+    def getQuerySet(self):
+        '''
+        Base queryset for items, with the relations & annotations declared by handler, so retrieving
+        items takes a fixed number of queries
+        '''
+        qs = self.model.objects.all()
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        if self.prefetch_related:
+            qs = qs.prefetch_related(*self.prefetch_related)
+        annotations = dict((k, v) for k, v in six.iteritems(self.annotations) if self.wants(k))
+        if annotations:
+            qs = qs.annotate(**annotations)
+        return qs
+
     def getItems(self, overview=True, *args, **kwargs):
-        for item in self.model.objects.filter(*args, **kwargs):
-            try:
-                if permissions.checkPermissions(self._user, item, permissions.PERMISSION_READ) is False:
-                    continue
-                if overview:
-                    yield self.item_as_dict_overview(item)
-                else:
-                    res = self.item_as_dict(item)
-                    self.fillIntanceFields(item, res)
-                    yield res
-            except Exception:  # maybe an exception is thrown to skip an item
-                # logger.exception('Exception getting item from {0}'.format(self.model))
-                pass
+        for item in self.getQuerySet().filter(*args, **kwargs):
+            res = self.__itemAsDict(item, overview)
+            if res is not None:
+                yield res
+
+    def wants(self, field):
+        return self.itemsQuery is None or self.itemsQuery.wants(field)
+
+    def cacheModels(self):
+        '''
+        Only lists & overviews are validated & cached
+        '''
+        if len(self._args) == 0 or (len(self._args) == 1 and self._args[0] == OVERVIEW):
+            return self.cache_models
+        return None
+
+    def getItemsPage(self, overview=True):
+        '''
+        Returns the items, applying the filter, sort & paging of request (see ItemsQuery)
+        Items not readable by user are excluded by database, so paging is also done by database
+        '''
+        queryset = self.permissionsResolver().filter(self.getQuerySet(), permissions.PERMISSION_READ)
+        return self.itemsQuery.apply(queryset, self.query_fields, lambda item: self.__itemAsDict(item, overview))
 
     def get(self):
         '''
-        Wraps real get method so we can process filters if they exists
+        Wraps real get method so we can process filters, sorting & paging if requested
         '''
-        # Extract filter from params if present
-        self.extractFilter()
-        return self.doFilter(self.doGet())
+        self.itemsQuery = ItemsQuery(self._params)
+        res = self.itemsQuery.applyToList(self.doGet())
+        if self.itemsQuery.total is not None:
+            self.addHeader(TOTAL_COUNT_HEADER, six.text_type(self.itemsQuery.total))
+        return self.itemsQuery.project(res)
 
     def doGet(self):
         logger.debug('method GET for {0}, {1}'.format(self.__class__.__name__, self._args))
         nArgs = len(self._args)
 
         if nArgs == 0:
-            return list(self.getItems(overview=False))
+            return self.getItemsPage(overview=False)
 
         # if has custom methods, look for if this request matches any of them
         for cm in self.custom_methods:
@@ -772,7 +845,7 @@ class ModelHandler(BaseModelHandler):
 
         if nArgs == 1:
             if self._args[0] == OVERVIEW:
-                return list(self.getItems())
+                return self.getItemsPage()
             elif self._args[0] == TYPES:
                 return list(self.getTypes())
             elif self._args[0] == TABLEINFO:
@@ -782,7 +855,7 @@ class ModelHandler(BaseModelHandler):
 
             # get item ID
             try:
-                val = self.model.objects.get(uuid=self._args[0].lower())
+                val = self.getQuerySet().get(uuid=self._args[0].lower())
 
                 self.ensureAccess(val, permissions.PERMISSION_READ)
 
@@ -37,11 +37,17 @@ from __future__ import unicode_literals
 import json
 from xml_marshaller import xml_marshaller
 import datetime
+import itertools
 import time
 import types
 import six
 from django import http
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -145,13 +151,64 @@ class MarshallerProcessor(ContentProcessor):
 # ---------------
 # Json Processor
 # ---------------
+class JsonEncoder(json.JSONEncoder):
+    '''
+    Encodes dates as timestamps, generators as lists and unknown objects as its text representation
+    (the same conversions that procesForRender does, but done while encoding)
+    '''
+    def default(self, obj):  # pylint: disable=method-hidden
+        if isinstance(obj, (datetime.datetime, datetime.date)):
+            return int(time.mktime(obj.timetuple()))
+        elif isinstance(obj, types.GeneratorType):
+            return list(obj)
+        return six.text_type(obj)
+
+
 class JsonProcessor(MarshallerProcessor):
     '''
     Provides JSON content processor
+    Generators are encoded & sent incrementally (as a json list), so big lists are not kept in memory
     '''
     mime_type = 'application/json'
     extensions = ['json']
     marshaller = json
+    encoder = JsonEncoder()
+    # Number of items encoded on every chunk of streamed responses
+    chunk_items = 100
+
+    def render(self, obj):
+        return self.encoder.encode(obj)
+
+    def renderStream(self, items):
+        '''
+        Encodes an iterable as a json list, one chunk every "chunk_items" items
+        '''
+        yield '['
+        sep, chunk = '', []
+        try:
+            for item in items:
+                chunk.append(self.encoder.encode(item))
+                if len(chunk) >= self.chunk_items:
+                    yield sep + ', '.join(chunk)
+                    sep, chunk = ', ', []
+        except Exception:
+            logger.exception('Streaming response')  # Response has already started, so it will be truncated
+            raise
+        if len(chunk) > 0:
+            yield sep + ', '.join(chunk)
+        yield ']'
+
+    def getResponse(self, obj):
+        if not isinstance(obj, types.GeneratorType):
+            return super(JsonProcessor, self).getResponse(obj)
+
+        # Gets first item before starting response, so errors of request itself are still returned as errors
+        try:
+            first = next(obj)
+        except StopIteration:
+            return super(JsonProcessor, self).getResponse([])
+
+        return http.StreamingHttpResponse(self.renderStream(itertools.chain([first], obj)), content_type=self.mime_type + "; charset=utf-8")
 
 
 # ---------------
@@ -166,7 +223,35 @@ class XMLProcessor(MarshallerProcessor):
     marshaller = xml_marshaller
 
 
-processors_list = (JsonProcessor, XMLProcessor)
+# ---------------------
+# MessagePack Processor
+# ---------------------
+class MsgPackProcessor(MarshallerProcessor):
+    '''
+    Provides MessagePack content processor (only available if msgpack is installed)
+    Dates are encoded as msgpack timestamps (if supported by msgpack version, as integer timestamps if not)
+    '''
+    mime_type = 'application/x-msgpack'
+    extensions = ['msgpack']
+    marshaller = msgpack
+
+    @staticmethod
+    def encodeObject(obj):
+        if isinstance(obj, (datetime.datetime, datetime.date)):
+            timestamp = int(time.mktime(obj.timetuple()))
+            return msgpack.Timestamp(timestamp) if hasattr(msgpack, 'Timestamp') else timestamp
+        elif isinstance(obj, types.GeneratorType):
+            return list(obj)
+        return six.text_type(obj)
+
+    def getResponse(self, obj):
+        return http.HttpResponse(content=self.render(obj), content_type=self.mime_type)
+
+    def render(self, obj):
+        return msgpack.packb(obj, default=MsgPackProcessor.encodeObject, use_bin_type=False)
+
+
+processors_list = (JsonProcessor, XMLProcessor) + ((MsgPackProcessor,) if msgpack is not None else ())
 default_processor = JsonProcessor
 available_processors_mime_dict = dict((cls.mime_type, cls) for cls in processors_list)
 available_processors_ext_dict = {}
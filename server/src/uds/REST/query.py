@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from uds.REST.handlers import RequestError
+
+import fnmatch
+import re
+import types
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+__updated__ = '2017-05-22'
+
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+
+
+def _take(params, name):
+    '''
+    Extracts (and removes) a parameter, params can be a dict or a QueryDict
+    '''
+    try:
+        value = params[name]
+        del params[name]
+        return value
+    except (KeyError, TypeError):
+        return None
+
+
+def _lookupFor(pattern):
+    '''
+    Translates a filter pattern (unix file name like, case insensitive) to a database lookup.
+    Returns (lookup, value), (None, None) if pattern matches everything or None if it can't be translated
+    '''
+    if '?' in pattern or '[' in pattern:
+        return None
+
+    parts = pattern.split('*')
+    if len(parts) == 1:
+        return 'iexact', pattern
+    if parts == ['', '']:
+        return None, None
+    if len(parts) == 2:
+        if parts[1] == '':
+            return 'istartswith', parts[0]
+        if parts[0] == '':
+            return 'iendswith', parts[1]
+    if len(parts) == 3 and parts[0] == '' and parts[2] == '' and parts[1] != '':
+        return 'icontains', parts[1]
+    return None
+
+
+class ItemsQuery(object):
+    '''
+    Filtering, sorting and paging of REST items lists.
+
+    Parameters (all of them optional) are:
+       filter=field=pattern: pattern is an unix file name like pattern (case insensitive), with ^ and $ supported
+       sort=field[,field...]: fields to sort by, fields prefixed with "-" are sorted descending
+       offset=n & limit=n: part of the list to return
+       fields=field[,field...]: fields of items to return ("id" is always returned)
+
+    Whenever possible (fields with a known database lookup) this is done by database, so only the requested
+    items are retrieved & converted. Else, it is done over the list of items once converted to dictionaries.
+    The number of items (after filtering, before paging) is stored on "total" (if no query is requested, items
+    are returned as a generator, and total is not computed).
+    Handlers can avoid computing costly fields not requested (see BaseModelHandler.addExpensiveFields)
+    '''
+
+    def __init__(self, params):
+        self.fltr = _take(params, 'filter')
+        sort = _take(params, 'sort')
+        try:
+            self.offset = max(int(_take(params, 'offset') or 0), 0)
+            limit = _take(params, 'limit')
+            self.limit = max(int(limit), 0) if limit not in (None, '') else None
+        except ValueError:
+            raise RequestError('Invalid offset or limit')
+
+        self.sort = [(f[1:], True) if f[0] == '-' else (f, False) for f in (sort or '').split(',') if f != '']
+        fields = _take(params, 'fields')
+        self.fields = set(f for f in fields.split(',') if f != '') | set(['id']) if fields else None
+        self.total = None
+        self.applied = False
+
+        self._field = self._regex = self._lookup = None
+        if self.fltr is not None:
+            logger.debug('Found a filter expression ({})'.format(self.fltr))
+            try:
+                self._field, pattern = self.fltr.split('=')
+                s, e = '', ''
+                if pattern[0] == '^':
+                    pattern = pattern[1:]
+                    s = '^'
+                if pattern[-1] == '$':
+                    pattern = pattern[:-1]
+                    e = '$'
+
+                self._regex = re.compile(s + fnmatch.translate(pattern) + e, re.IGNORECASE)
+                self._lookup = _lookupFor(pattern)
+            except Exception:
+                logger.info('Filtering expression {} is invalid!'.format(self.fltr))
+                raise RequestError('Filtering expression {} is invalid'.format(self.fltr))
+
+    def isEmpty(self):
+        return self.fltr is None and len(self.sort) == 0 and self.offset == 0 and self.limit is None
+
+    def wants(self, field):
+        '''
+        Returns True if field is requested (or used for filtering or sorting)
+        '''
+        return self.fields is None or field in self.fields or field == self._field or any(field == f for f, _ in self.sort)
+
+    def project(self, data):
+        '''
+        Removes from items (or item) the fields not requested
+        '''
+        if self.fields is None:
+            return data
+        if isinstance(data, dict):
+            return dict((k, v) for k, v in data.items() if k in self.fields)
+        if isinstance(data, types.GeneratorType):  # Keep generators as generators, so they can be streamed
+            return (self.project(item) if isinstance(item, dict) else item for item in data)
+        if isinstance(data, (list, tuple)):
+            return [self.project(item) if isinstance(item, dict) else item for item in data]
+        return data
+
+    def __match(self, item):
+        try:
+            return self._field in item and self._regex.match(item[self._field]) is not None
+        except Exception:
+            return False
+
+    def __page(self, data):
+        return data[self.offset:self.offset + self.limit] if self.limit is not None else data[self.offset:]
+
+    def apply(self, queryset, fields, convert, exact=True):
+        '''
+        Applies the query to a queryset, returning the list of converted items (a generator if query is empty)
+
+        :param queryset: Items to return
+        :param fields: Dictionary of (result) field names to database lookups that can be used for filtering & sorting
+        :param convert: Callable that converts an item to a dictionary (or returns None if item must be skipped)
+        :param exact: If False, "convert" can skip items, so paging can't be done by database
+        '''
+        self.applied = True
+
+        dbFilter = self._field is None or (self._field in fields and self._lookup is not None)
+        dbSort = all(f in fields for f, _ in self.sort)
+
+        if self._field is not None and dbFilter and self._lookup[0] is not None:
+            queryset = queryset.filter(**{'{}__{}'.format(fields[self._field], self._lookup[0]): self._lookup[1]})
+        if len(self.sort) > 0 and dbSort:
+            queryset = queryset.order_by(*[('-' if desc else '') + fields[f] for f, desc in self.sort])
+
+        if dbFilter and dbSort and exact:
+            if self.isEmpty():  # Nothing to count, items are converted as they are consumed
+                return (v for v in (convert(item) for item in queryset) if v is not None)
+            if self.offset == 0 and self.limit is None:  # No paging, no need to count
+                data = [v for v in (convert(item) for item in queryset) if v is not None]
+                self.total = len(data)
+                return data
+
+            self.total = queryset.count()
+            if self.limit is not None:
+                queryset = queryset[self.offset:self.offset + self.limit]
+            elif self.offset > 0:
+                queryset = queryset[self.offset:]
+            return [v for v in (convert(item) for item in queryset) if v is not None]
+
+        logger.debug('Query {} can\'t be fully done by database'.format(self.fltr))
+        data = [v for v in (convert(item) for item in queryset) if v is not None]
+        return self.__applyToList(data, isFiltered=dbFilter, isSorted=dbSort)
+
+    def applyToList(self, data):
+        '''
+        Applies the query to a list of items (dictionaries), unless it has already been applied
+        '''
+        # Filtering a non iterable (list or tuple)
+        if self.applied or self.isEmpty() or not isinstance(data, (list, tuple, types.GeneratorType)):
+            return data
+
+        self.applied = True
+        return self.__applyToList(list(data))
+
+    def __applyToList(self, data, isFiltered=False, isSorted=False):
+        if self._field is not None and not isFiltered:
+            data = [item for item in data if self.__match(item)]
+            logger.debug('After filtering: {}'.format(data))
+
+        if not isSorted:
+            for fld, desc in reversed(self.sort):  # Sorts are stable, so sort from least significant field
+                data.sort(key=lambda item: item.get(fld) if isinstance(item, dict) else None, reverse=desc)
+
+        self.total = len(data)
+        return self.__page(data)
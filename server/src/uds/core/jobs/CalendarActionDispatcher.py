@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2012 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.db import connection
+from uds.models import CalendarAction
+from uds.models import getSqlDatetime
+from datetime import datetime, timedelta
+import threading
+import heapq
+import time
+import logging
+
+__updated__ = '2017-05-22'
+
+logger = logging.getLogger(__name__)
+
+
+class CalendarActionThread(threading.Thread):
+    '''
+    Class responsible of executing a calendar action in its own thread
+    '''
+    def __init__(self, calendarAction):
+        super(CalendarActionThread, self).__init__()
+        self._calendarAction = calendarAction
+
+    def run(self):
+        try:
+            self._calendarAction.doAction()
+        except Exception as e:
+            logger.exception('Got an exception executing calendar action {}: {}'.format(self._calendarAction, e))
+        finally:
+            connection.close()
+
+
+class CalendarActionDispatcher(object):
+    '''
+    Executes calendar actions as soon as they are due.
+
+    Keeps an in-memory heap with the next executions of the actions due soon, reloaded every "refresh" seconds
+    so changes done by other servers are noticed. Due actions are claimed with a conditional update (see CalendarAction.claim),
+    so only one server executes each of them and no lock is held, and are executed in parallel, each one on its own thread.
+    '''
+    # How often due actions are checked
+    granularity = 1
+    # How often index is reloaded from database
+    refresh = 30
+
+    # to keep singleton CalendarActionDispatcher
+    _dispatcher = None
+
+    def __init__(self):
+        self._keepRunning = True
+        self._heap = []  # (next execution, calendar action id)
+        self._nextRefresh = 0
+        self._offset = timedelta(seconds=0)  # Database time - local time
+
+    @staticmethod
+    def dispatcher():
+        if CalendarActionDispatcher._dispatcher is None:
+            CalendarActionDispatcher._dispatcher = CalendarActionDispatcher()
+        return CalendarActionDispatcher._dispatcher
+
+    def notifyTermination(self):
+        self._keepRunning = False
+
+    def __loadIndex(self):
+        now = getSqlDatetime()
+        self._offset = now - datetime.now()
+        self._heap = list(CalendarAction.objects.filter(
+            service_pool__service__provider__maintenance_mode=False, next_execution__lt=now + timedelta(seconds=self.refresh * 2)
+        ).values_list('next_execution', 'id'))
+        heapq.heapify(self._heap)
+        self._nextRefresh = time.time() + self.refresh
+
+    def dispatchDue(self):
+        '''
+        Claims & launches all due actions
+        '''
+        if time.time() >= self._nextRefresh:
+            self.__loadIndex()
+
+        now = datetime.now() + self._offset
+        while len(self._heap) > 0 and self._heap[0][0] < now:
+            nextExecution, caId = heapq.heappop(self._heap)
+            try:
+                ca = CalendarAction.objects.select_related('calendar', 'service_pool').get(id=caId)
+            except CalendarAction.DoesNotExist:
+                continue
+
+            if ca.next_execution != nextExecution or ca.claim() is False:
+                continue  # Changed or already executed by someone else
+
+            logger.debug('Executing calendar action {}.{}'.format(ca.service_pool.name, ca.calendar.name))
+            CalendarActionThread(ca).start()
+
+            # Executions before next refresh must also be on index
+            if ca.next_execution is not None and ca.next_execution < now + timedelta(seconds=self.refresh * 2):
+                heapq.heappush(self._heap, (ca.next_execution, ca.id))
+
+    def run(self):
+        logger.debug('At loop')
+        while self._keepRunning:
+            try:
+                time.sleep(self.granularity)
+                self.dispatchDue()
+            except Exception as e:
+                logger.error('Unexpected exception at run loop {0}: {1}'.format(e.__class__, e))
+                self._nextRefresh = 0  # Reload index on next iteration
+                try:
+                    connection.close()
+                except Exception:
+                    logger.exception('Exception clossing connection at calendar action dispatcher')
+        logger.info('Exiting CalendarAction dispatcher because stop has been requested')
@@ -43,7 +43,10 @@ from uds.models import Authenticator
 from uds.core.util import log
 
 from uds.core.util.Config import GlobalConfig
+from uds.core.util.BulkWriter import BulkWriter
 
+import collections
+import threading
 import logging
 import six
 
@@ -64,14 +67,36 @@ transDict = {
 }
 
 
+# Maximum number of owners whose last messages are kept in memory to avoid duplicates
+RECENT_CACHE_SIZE = 10000
+
+
+class LogBuffer(BulkWriter):
+    '''
+    In-process write buffer for logs, bounded by "logsBufferSize" (disabled if 0)
+    '''
+    sizeCfg = GlobalConfig.LOGS_BUFFER_SIZE
+    flushItemsCfg = GlobalConfig.LOGS_FLUSH_ITEMS
+    flushIntervalCfg = GlobalConfig.LOGS_FLUSH_INTERVAL
+
+
 class LogManager(object):
     '''
     Manager for logging (at database) events
+
+    Inserting a log is a single INSERT. Logs of every owner are trimmed to MAX_LOGS_PER_ELEMENT
+    with a single DELETE after a number of writes to that owner (and periodically by LogMaintenance job),
+    so an owner can briefly have a few more logs than the maximum.
+
+    If "logsBufferSize" is not 0, logs are queued in memory and inserted in bulk from a background thread (see LogBuffer).
+    Logs still in the queue are returned by getLogs, so callers do not notice the delay.
     '''
     _manager = None
 
     def __init__(self):
-        pass
+        self._lock = threading.Lock()
+        self._recent = collections.OrderedDict()  # (owner_type, owner_id): {(level, source): message}, least recently used first
+        self._writes = {}  # (owner_type, owner_id): writes since last trim (on this process)
 
     @staticmethod
     def manager():
@@ -79,6 +104,52 @@ class LogManager(object):
             LogManager._manager = LogManager()
         return LogManager._manager
 
+    def __isDuplicate(self, owner_type, owner_id, level, message, source):
+        '''
+        Checks (and updates) the in-memory cache of last message logged for owner, level & source
+        '''
+        key = (owner_type, owner_id)
+        with self._lock:
+            messages = self._recent.pop(key, None) or {}
+            self._recent[key] = messages  # Moved to most recently used
+            if len(self._recent) > RECENT_CACHE_SIZE:
+                self._recent.popitem(last=False)
+            if messages.get((level, source)) == message:
+                return True
+            messages[(level, source)] = message
+        return False
+
+    def __needsTrim(self, owner_type, owner_id, maxLogs):
+        '''
+        Counts the writes for owner, returning True (and reseting count) every "some" writes
+        '''
+        key = (owner_type, owner_id)
+        with self._lock:
+            writes = self._writes.get(key, 0) + 1
+            if writes < max(maxLogs // 4, 1):
+                if len(self._writes) > RECENT_CACHE_SIZE:  # Keep it bounded, LogMaintenance will trim forgotten owners
+                    self._writes.clear()
+                self._writes[key] = writes
+                return False
+            self._writes.pop(key, None)
+            return True
+
+    @staticmethod
+    def trim(owner_type, owner_id, maxLogs):
+        '''
+        Keeps only the newest "maxLogs" logs of the owner, using a single DELETE
+        '''
+        from uds.models import Log
+
+        qs = Log.objects.filter(owner_id=owner_id, owner_type=owner_type)
+        if maxLogs <= 0:  # No logs are kept
+            qs.delete()
+            return
+
+        cut = list(qs.order_by('-id').values_list('id', flat=True)[maxLogs - 1:maxLogs])
+        if len(cut) > 0:
+            qs.filter(id__lt=cut[0]).delete()
+
     def __log(self, owner_type, owner_id, level, message, source, avoidDuplicates):
         '''
         Logs a message associated to owner
@@ -86,27 +157,25 @@ class LogManager(object):
         from uds.models import getSqlDatetime
         from uds.models import Log
 
-        qs = Log.objects.filter(owner_id=owner_id, owner_type=owner_type)
-        # First, ensure we do not have more than requested logs, and we can put one more log item
-        if qs.count() >= GlobalConfig.MAX_LOGS_PER_ELEMENT.getInt():
-            for i in qs.order_by('-created',)[GlobalConfig.MAX_LOGS_PER_ELEMENT.getInt() - 1:]:
-                i.delete()
+        if avoidDuplicates is True and self.__isDuplicate(owner_type, owner_id, level, message, source):
+            # Do not log again, already logged
+            return
 
-        if avoidDuplicates is True:
+        # now, we add new log
+        item = Log(owner_type=owner_type, owner_id=owner_id, created=getSqlDatetime(), source=source, level=level, data=message)
+        logBuffer = LogBuffer.writer()
+        if logBuffer.enabled():
+            logBuffer.add(item)
+        else:
             try:
-                lg = Log.objects.filter(owner_id=owner_id, owner_type=owner_type, level=level, source=source).order_by('-created', '-id')[0]
-                if lg.message == message:
-                    # Do not log again, already logged
-                    return
-            except Exception:  # Do not exists log
-                pass
+                item.save()
+            except:
+                # Some objects will not get logged, such as System administrator objects
+                return
 
-        # now, we add new log
-        try:
-            Log.objects.create(owner_type=owner_type, owner_id=owner_id, created=getSqlDatetime(), source=source, level=level, data=message)
-        except:
-            # Some objects will not get logged, such as System administrator objects
-            pass
+        maxLogs = GlobalConfig.MAX_LOGS_PER_ELEMENT.getInt()
+        if self.__needsTrim(owner_type, owner_id, maxLogs):
+            LogManager.trim(owner_type, owner_id, maxLogs)
 
     def __getLogs(self, owner_type, owner_id, limit):
         '''
@@ -115,7 +184,21 @@ class LogManager(object):
         from uds.models import Log
 
         qs = Log.objects.filter(owner_id=owner_id, owner_type=owner_type)
-        return [{'date': x.created, 'level': x.level, 'source': x.source, 'message': x.data} for x in reversed(qs.order_by('-created', '-id')[:limit])]
+
+        def read():
+            return list(reversed(qs.order_by('-created', '-id')[:limit]))
+
+        logBuffer = LogBuffer.writer()
+        if logBuffer.enabled():
+            # Logs written while reading database are got from it, and not returned again from pending ones
+            logs, pending = logBuffer.readWithPending(lambda x: x.owner_type == owner_type and x.owner_id == owner_id, read)
+            if len(pending) > 0:
+                # Not yet written logs are always newer than stored ones
+                logs = (logs + pending)[-limit:] if limit else []
+        else:
+            logs = read()
+
+        return [{'date': x.created, 'level': x.level, 'source': x.source, 'message': x.data} for x in logs]
 
     def __clearLogs(self, owner_type, owner_id):
         '''
@@ -123,8 +206,16 @@ class LogManager(object):
         '''
         from uds.models import Log
 
+        logBuffer = LogBuffer.writer()
+        if logBuffer.enabled():
+            logBuffer.discard(lambda x: x.owner_type == owner_type and x.owner_id == owner_id)
+
         Log.objects.filter(owner_id=owner_id, owner_type=owner_type).delete()
 
+        with self._lock:
+            self._recent.pop((owner_type, owner_id), None)
+            self._writes.pop((owner_type, owner_id), None)
+
     def doLog(self, wichObject, level, message, source, avoidDuplicates=True):
         '''
         Do the logging for the requested object.
@@ -32,11 +32,20 @@
 from __future__ import unicode_literals
 
 from uds.core.util.Config import GlobalConfig
+from uds.core.util.Storage import Storage
+from uds.core.util.stats.buffer import StatsBuffer
+from uds.core.util.stats.query import getGroupedCounters, getCountersMatrix, getEventsMatrix, getEventsRows
+from uds.core.util.stats import bucketing
+from uds.core.util.stats.archive import StatsArchiver, ArchivedResult, deleteRange
 from uds.models import StatsCounters
+from uds.models import StatsCountersAccum
 from uds.models import getSqlDatetime
+from uds.models import NEVER_UNIX
 from uds.models import StatsEvents
 from uds.models import optimizeTable
 from django.db import connection
+from django.db import transaction
+from django.db.models import Q
 import datetime
 import time
 import six
@@ -45,6 +54,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+ACCUM_CHUNK_SIZE = 10000  # Raw counters accumulated on every transaction
+ACCUM_MAX_CHUNKS = 50  # Max chunks accumulated on every run, so initial accumulation of big tables is splitted among runs
+ACCUM_SAFETY_MARGIN = 60  # Counters stamped later than this (in seconds) ago are not accumulated yet, its inserts could still be uncommited (or buffered)
+
 
 class StatsManager(object):
     '''
@@ -66,14 +79,35 @@ class StatsManager(object):
         return StatsManager._manager
 
     def __doCleanup(self, model):
-        minTime = time.mktime((getSqlDatetime() - datetime.timedelta(days=GlobalConfig.STATS_DURATION.getInt())).timetuple())
+        minTime = int(time.mktime((getSqlDatetime() - datetime.timedelta(days=GlobalConfig.STATS_DURATION.getInt())).timetuple()))
 
-        # Newer Django versions (at least 1.7) does this deletions as it must (executes a DELETE FROM ... WHERE...)
-        model.objects.filter(stamp__lt=minTime).delete()
+        archiver = StatsArchiver()
+        if archiver.enabled():
+            if model is StatsCountersAccum:  # Rollups are removed as counters are archived
+                return
+            archiver.archive(model, minTime)
+        else:
+            deleteRange(model, 0, minTime)
 
         # Optimize mysql tables after deletions
         optimizeTable(model._meta.db_table)
 
+    def __save(self, item):
+        '''
+        Stores an stats item (counter or event), through the write buffer if it is enabled
+        '''
+        statsBuffer = StatsBuffer.buffer()
+        if statsBuffer.enabled():
+            statsBuffer.add(item)
+        else:
+            item.save()
+
+    def flush(self):
+        '''
+        Writes to database the buffered statistics
+        '''
+        StatsBuffer.buffer().flush()
+
     # Counter stats
     def addCounter(self, owner_type, owner_id, counterType, counterValue, stamp=None):
         '''
@@ -99,7 +133,36 @@ class StatsManager(object):
         stamp = int(time.mktime(stamp.timetuple()))  # pylint: disable=maybe-no-member
 
         try:
-            StatsCounters.objects.create(owner_type=owner_type, owner_id=owner_id, counter_type=counterType, value=counterValue, stamp=stamp)
+            self.__save(StatsCounters(owner_type=owner_type, owner_id=owner_id, counter_type=counterType, value=counterValue, stamp=stamp))
+            return True
+        except Exception:
+            logger.error('Exception handling counter stats saving (maybe database is full?)')
+        return False
+
+    def addCounters(self, counters, stamp=None):
+        '''
+        Adds several counters to database, using a single bulk insert
+
+        Args:
+
+            counters: iterable of (owner_type, owner_id, counterType, counterValue) tuples
+            stamp: if not None, this will be used as date for all counters, else current date/time will be get
+
+        Returns:
+
+            Nothing
+        '''
+        if stamp is None:
+            stamp = getSqlDatetime()
+
+        # To Unix epoch
+        stamp = int(time.mktime(stamp.timetuple()))  # pylint: disable=maybe-no-member
+
+        try:
+            StatsCounters.objects.bulk_create([
+                StatsCounters(owner_type=owner_type, owner_id=owner_id, counter_type=counterType, value=counterValue, stamp=stamp)
+                for owner_type, owner_id, counterType, counterValue in counters
+            ])
             return True
         except Exception:
             logger.error('Exception handling counter stats saving (maybe database is full?)')
@@ -119,19 +182,77 @@ class StatsManager(object):
 
         Returns:
 
-            Iterator, containing (date, counter) each element
+            Iterator, containing (unix stamp, counter) each element
         '''
         # To Unix epoch
         since = int(time.mktime(since.timetuple()))
         to = int(time.mktime(to.timetuple()))
 
-        return StatsCounters.get_grouped(ownerType, counterType, owner_id=ownerIds, since=since, to=to, limit=limit, use_max=use_max)
+        accumulated = Storage('statsAccum').getPickle('watermark')
+
+        return getGroupedCounters(ownerType, counterType, owner_id=ownerIds, since=since, to=to, limit=limit, use_max=use_max, accumulated=accumulated, archiver=StatsArchiver())
+
+    def accumulateCounters(self):
+        '''
+        Rolls up the counters added since last invocation into the StatsCountersAccum intervals.
+
+        Watermark is the (stamp, id) of last accumulated counter. Counters are accumulated in (stamp, id) order and only
+        once they are older than ACCUM_SAFETY_MARGIN, so a counter is not skipped even if it is committed after others with
+        greater ids (as long as it is committed within ACCUM_SAFETY_MARGIN seconds of its stamp)
+
+        Returns:
+
+            Number of raw counters processed
+        '''
+        storage = Storage('statsAccum')
+        processed = 0
+        for _ in range(ACCUM_MAX_CHUNKS):
+            stamp, lastId = storage.getPickle('watermark') or (0, 0)
+            limitStamp = getSqlDatetime(unix=True) - ACCUM_SAFETY_MARGIN
+
+            rows = list(StatsCounters.objects.filter(
+                Q(stamp__gt=stamp) | Q(stamp=stamp, id__gt=lastId), stamp__lt=limitStamp
+            ).order_by('stamp', 'id').values_list('id', 'owner_type', 'owner_id', 'counter_type', 'stamp', 'value')[:ACCUM_CHUNK_SIZE])
+
+            if len(rows) == 0:
+                break
+
+            with transaction.atomic():
+                StatsCountersAccum.accumulate(r[1:] for r in rows)
+                storage.putPickle('watermark', (rows[-1][4], rows[-1][0]))
+
+            processed += len(rows)
+            if len(rows) < ACCUM_CHUNK_SIZE:
+                break
+
+        return processed
+
+    def getCountersMatrix(self, ownerType, counterType, ownerIds, since, step, intervals, use_max=False):
+        '''
+        Retrieves counters of several owners grouped by intervals
+
+        Args:
+
+            ownerType: Type of owner
+            counterType: Type of counter
+            ownerIds: ids of owners
+            since: unix stamp of the start of the first interval
+            step: duration of every interval, in seconds
+            intervals: number of intervals
+            use_max: if True, max value of every interval is returned, else the average
+
+        Returns:
+
+            Dict {owner id: [value, ...]}, value is None for intervals without counters
+        '''
+        return getCountersMatrix(ownerType, counterType, ownerIds, since, step, intervals, use_max=use_max, archiver=StatsArchiver())
 
     def cleanupCounters(self):
         '''
         Removes all counters previous to configured max keep time for stat information from database.
         '''
         self.__doCleanup(StatsCounters)
+        self.__doCleanup(StatsCountersAccum)
 
     def getEventFldFor(self, fld):
         return {
@@ -180,7 +301,7 @@ class StatsManager(object):
             fld3 = noneToEmpty(kwargs.get('fld3', kwargs.get('dstip', kwargs.get('version', ''))))
             fld4 = noneToEmpty(kwargs.get('fld4', kwargs.get('uniqueid', '')))
 
-            StatsEvents.objects.create(owner_type=owner_type, owner_id=owner_id, event_type=eventType, stamp=stamp, fld1=fld1, fld2=fld2, fld3=fld3, fld4=fld4)
+            self.__save(StatsEvents(owner_type=owner_type, owner_id=owner_id, event_type=eventType, stamp=stamp, fld1=fld1, fld2=fld2, fld3=fld3, fld4=fld4))
             return True
         except Exception:
             logger.exception('Exception handling event stats saving (maybe database is full?)')
@@ -199,9 +320,55 @@ class StatsManager(object):
 
         Returns:
 
-            Iterator, containing (date, counter) each element
+            Queryset of the events. If the requested interval includes archived events, a list of
+            (unsaved) events, containing both archived and database events
+        '''
+        events = StatsEvents.get_stats(ownerType, eventType, **kwargs)
+
+        archiver = StatsArchiver()
+        since = kwargs.get('since', None)
+        since = since and int(since) or NEVER_UNIX
+        if archiver.enabled() and since < archiver.archivedUntil(StatsEvents):
+            to = kwargs.get('to', None)
+            to = to and int(to) or getSqlDatetime(True)
+            archived = [
+                StatsEvents(**dict((k, int(v) if k == 'id' else v) for k, v in row.items()))
+                for row in archiver.read(StatsEvents, since, to - 1, owner_type=ownerType, event_type=eventType, owner_id=kwargs.get('owner_id', None))
+            ]
+            events = ArchivedResult(archived + list(events))
+
+        return events
+
+    def getEventsMatrix(self, ownerType, eventType, ownerIds, since, step, intervals, distinct=None):
+        '''
+        Retrieves the number of events (and distinct values of field "distinct") of several owners grouped by intervals
+
+        Args:
+
+            ownerType: Type of owner
+            eventType: Type (or types) of events
+            ownerIds: ids of owners, or None to count events of all owners together
+            since: unix stamp of the start of the first interval
+            step: duration of every interval, in seconds
+            intervals: number of intervals
+
+        Returns:
+
+            Dict {owner id: [(count, distinct count), ...]}
+        '''
+        return getEventsMatrix(ownerType, eventType, ownerIds, since, step, intervals, distinct=distinct, archiver=StatsArchiver())
+
+    def getEventsRows(self, ownerType, eventType, fields, **kwargs):
+        '''
+        Retrieves the requested fields of events, ordered by stamp, as tuples. Accepts same filters as getEvents
+        '''
+        return getEventsRows(ownerType, eventType, fields, owner_id=kwargs.get('owner_id'), since=kwargs.get('since'), to=kwargs.get('to'), archiver=StatsArchiver())
+
+    def getEventsStamps(self, ownerType, eventType, **kwargs):
+        '''
+        Retrieves the stamps of events as a compact array (see uds.core.util.stats.bucketing). Accepts same filters as getEvents
         '''
-        return StatsEvents.get_stats(ownerType, eventType, **kwargs)
+        return bucketing.toArray(stamp for stamp, in self.getEventsRows(ownerType, eventType, ('stamp',), **kwargs))
 
     def cleanupEvents(self):
         '''
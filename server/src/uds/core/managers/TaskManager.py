@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 from django.db import connection
 from uds.core.jobs.Scheduler import Scheduler
 from uds.core.jobs.DelayedTaskRunner import DelayedTaskRunner
+from uds.core.jobs.CalendarActionDispatcher import CalendarActionDispatcher
 from uds.core import jobs
 from uds.core.util.Config import GlobalConfig
 import threading
@@ -61,6 +62,14 @@ class DelayedTaskThread(threading.Thread):
         DelayedTaskRunner.runner().notifyTermination()
 
 
+class CalendarActionDispatcherThread(threading.Thread):
+    def run(self):
+        CalendarActionDispatcher.dispatcher().run()
+
+    def notifyTermination(self):
+        CalendarActionDispatcher.dispatcher().notifyTermination()
+
+
 class TaskManager(object):
     keepRunning = True
 
@@ -120,6 +129,11 @@ class TaskManager(object):
             threads.append(thread)
             time.sleep(0.5)
 
+        # Calendar actions are executed on time by its own dispatcher
+        thread = CalendarActionDispatcherThread()
+        thread.start()
+        threads.append(thread)
+
         signal.signal(signal.SIGTERM, TaskManager.sigTerm)
 
         # Debugging stuff
@@ -46,6 +46,7 @@ from uds.core.services import Service
 from uds.core.util.stats import events
 
 from .userservice.opchecker  import UserServiceOpChecker
+from .userservice.governor import ProviderGovernor
 
 import requests
 import json
@@ -109,6 +110,7 @@ class UserServiceManager(object):
         Private method to instatiate an assigned element at database with default state
         '''
         self.__checkMaxDeployedReached(deployedServicePublication.deployed_service)
+        self.getProviderGovernor(deployedServicePublication.deployed_service).acquire(ProviderGovernor.CREATE, force=True)
         now = getSqlDatetime()
         return deployedServicePublication.userServices.create(cache_level=0, state=State.PREPARING, os_state=State.PREPARING,
                                                               state_date=now, creation_date=now, data='',
@@ -122,6 +124,7 @@ class UserServiceManager(object):
         an UserService with no publications, and create them from an DeployedService
         '''
         self.__checkMaxDeployedReached(deployedService)
+        self.getProviderGovernor(deployedService).acquire(ProviderGovernor.CREATE, force=True)
         now = getSqlDatetime()
         return deployedService.userServices.create(cache_level=0, state=State.PREPARING, os_state=State.PREPARING,
                                                    state_date=now, creation_date=now, data='', publication=None, user=user, in_use=False)
@@ -129,9 +132,18 @@ class UserServiceManager(object):
     def createCacheFor(self, deployedServicePublication, cacheLevel):
         '''
         Creates a new cache for the deployed service publication at level indicated
+        If the provider governor does not grants a creation permit right now, nothing is done and None is returned
         '''
         logger.debug('Creating a new cache element at level {0} for publication {1}'.format(cacheLevel, deployedServicePublication))
-        cache = self.__createCacheAtDb(deployedServicePublication, cacheLevel)
+        governor = self.getProviderGovernor(deployedServicePublication.deployed_service)
+        if governor.acquire(ProviderGovernor.CREATE) is False:
+            logger.debug('Creation permit not granted for {}, delaying it'.format(deployedServicePublication))
+            return None
+        try:
+            cache = self.__createCacheAtDb(deployedServicePublication, cacheLevel)
+        except Exception:
+            governor.release(ProviderGovernor.CREATE)
+            raise
         ci = cache.getInstance()
         state = ci.deployForCache(cacheLevel)
 
@@ -161,6 +173,7 @@ class UserServiceManager(object):
         '''
         Creates an assignable service
         '''
+        self.getProviderGovernor(ds).acquire(ProviderGovernor.CREATE, force=True)
         now = getSqlDatetime()
         assignable = ds.userServices.create(cache_level=0, state=State.PREPARING, os_state=State.PREPARING,
                                             state_date=now, creation_date=now, data='', user=user, in_use=False)
@@ -325,26 +338,25 @@ class UserServiceManager(object):
         '''
         return UserService.objects.filter(deployed_service__service__provider__id=provider_id, state=state).count()
 
+    def getProviderGovernor(self, ds):
+        '''
+        Returns the concurrency & rate governor of the provider of the service pool
+        '''
+        return ProviderGovernor(ds.service.provider_id, ds.service.getInstance().parent())
+
     def canRemoveServiceFromDeployedService(self, ds):
         '''
         checks if we can do a "remove" from a deployed service
-        serviceIsntance is just a helper, so if we already have unserialized deployedService
+        This does not consumes any permit, removal itself will account it
         '''
-        removing = self.getServicesInStateForProvider(ds.service.provider_id, State.REMOVING)
-        serviceInstance = ds.service.getInstance()
-        if removing >= serviceInstance.parent().getMaxRemovingServices() and serviceInstance.parent().getIgnoreLimits() is False:
-            return False
-        return True
+        return self.getProviderGovernor(ds).canAcquire(ProviderGovernor.REMOVE)
 
     def canInitiateServiceFromDeployedService(self, ds):
         '''
         Checks if we can start a new service
+        This does not consumes any permit, creation itself will account it
         '''
-        preparing = self.getServicesInStateForProvider(ds.service.provider_id, State.PREPARING)
-        serviceInstance = ds.service.getInstance()
-        if preparing >= serviceInstance.parent().getMaxPreparingServices() and serviceInstance.parent().getIgnoreLimits() is False:
-            return False
-        return True
+        return self.getProviderGovernor(ds).canAcquire(ProviderGovernor.CREATE)
 
     def isReady(self, uService):
         UserService.objects.update()
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2012-2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from uds.core.util.Storage import Storage
+from uds.core.util.State import State
+from uds.models import UserService, Provider, getSqlDatetime
+
+import logging
+
+__updated__ = '2017-06-22'
+
+logger = logging.getLogger(__name__)
+
+GOVERNOR_STORAGE = 'provGovernor'
+
+
+class ProviderGovernor(object):
+    '''
+    Concurrency & rate governor for service providers.
+
+    Keeps, per service provider, the number of "in flight" creation (preparing) and removal operations,
+    and a token bucket for each of them. Counters are persisted at Storage and updated with the
+    row locked, so all servers see the same values.
+
+    Permits are handed out by "acquire", and returned (implicitly) when the user service leaves
+    the preparing or removing state (see UserService.setState). Every RESYNC_TIME seconds the counters
+    are recalculated from database, so any operation lost (for example, an user service deleted while
+    preparing) does not leave the counters drifted.
+    '''
+    CREATE = 'create'
+    REMOVE = 'remove'
+
+    RESYNC_TIME = 67  # Seconds between counters recalculation from database
+
+    _states = {
+        CREATE: State.PREPARING,
+        REMOVE: State.REMOVING
+    }
+
+    def __init__(self, providerId, providerInstance=None):
+        '''
+        providerInstance is needed whenever limits are used (it's not needed for release & state change notifications).
+        Without it, token buckets are neither refilled nor consumed
+        '''
+        self._providerId = providerId
+        self._provider = providerInstance
+        self._storage = Storage(GOVERNOR_STORAGE)
+
+    @staticmethod
+    def operationFor(state):
+        '''
+        Returns the governed operation that corresponds to a user service state, or None if it is not governed
+        '''
+        if state == State.PREPARING:
+            return ProviderGovernor.CREATE
+        if state == State.REMOVING:
+            return ProviderGovernor.REMOVE
+        return None
+
+    def _limits(self, operation):
+        '''
+        Returns (concurrency, rate, ignoreLimits) for operation
+        '''
+        if operation == ProviderGovernor.CREATE:
+            return self._provider.getMaxPreparingServices(), self._provider.getMaxPreparingRate(), self._provider.getIgnoreLimits()
+        return self._provider.getMaxRemovingServices(), self._provider.getMaxRemovingRate(), self._provider.getIgnoreLimits()
+
+    def _count(self, operation):
+        return UserService.objects.filter(deployed_service__service__provider__id=self._providerId, state=ProviderGovernor._states[operation]).count()
+
+    @staticmethod
+    def _needsSync(data, now):
+        return data is None or data.get('synced', 0) + ProviderGovernor.RESYNC_TIME < now
+
+    def _refresh(self, data, now):
+        '''
+        Ensures data is initialized, resynchronized if needed and token buckets refilled
+        '''
+        if ProviderGovernor._needsSync(data, now):
+            data = data or {}
+            for op in (ProviderGovernor.CREATE, ProviderGovernor.REMOVE):
+                opData = data.setdefault(op, {'tokens': None, 'stamp': now})
+                opData['inFlight'] = self._count(op)
+            data['synced'] = now
+
+        if self._provider is not None:
+            for op in (ProviderGovernor.CREATE, ProviderGovernor.REMOVE):
+                opData = data[op]
+                rate = self._limits(op)[1]
+                if rate == 0:
+                    opData['tokens'], opData['stamp'] = None, now
+                    continue
+                capacity = max(rate, 1.0)  # Bursts of up to 1 second of operations
+                tokens = capacity if opData['tokens'] is None else opData['tokens']
+                opData['tokens'] = min(capacity, tokens + (now - opData['stamp']) * rate)
+                opData['stamp'] = now
+
+        return data
+
+    def _allowed(self, data, operation):
+        concurrency, rate, ignoreLimits = self._limits(operation)
+        if ignoreLimits:
+            return True
+        opData = data[operation]
+        if opData['inFlight'] >= concurrency:
+            return False
+        if opData['tokens'] is not None and opData['tokens'] < 1:
+            return False
+        return True
+
+    def acquire(self, operation, force=False):
+        '''
+        Tries to get a permit for starting "operation" (CREATE or REMOVE) on the provider.
+        If force is True, permit is granted always (but accounted), this is used for operations
+        that can't be delayed, as user requested ones.
+        Returns True if the permit has been granted
+        '''
+        now = getSqlDatetime(True)
+        granted = []
+
+        def updater(data):
+            data = self._refresh(data, now)
+            if force or self._allowed(data, operation):
+                opData = data[operation]
+                opData['inFlight'] += 1
+                if opData['tokens'] is not None and self._provider is not None:  # Tokens are only refilled knowing the provider rate
+                    opData['tokens'] -= 1
+                granted.append(True)
+            return data
+
+        self._storage.updatePickle(str(self._providerId), updater)
+        if not granted:
+            logger.debug('Permit for {} denied for provider {}'.format(operation, self._providerId))
+        return len(granted) > 0
+
+    def release(self, operation):
+        '''
+        Returns a permit of "operation" previously acquired
+        '''
+        def updater(data):
+            if data is None:  # Not initialized, nothing to release
+                return self._refresh(data, getSqlDatetime(True))
+            data[operation]['inFlight'] = max(0, data[operation]['inFlight'] - 1)
+            return data
+
+        self._storage.updatePickle(str(self._providerId), updater)
+
+    def _current(self):
+        '''
+        Returns current data, with token buckets refilled. If counters must be resynchronized, they are
+        recalculated and stored back, so database is counted once every RESYNC_TIME and not on every check
+        '''
+        now = getSqlDatetime(True)
+        data = self._storage.getPickle(str(self._providerId))
+        if ProviderGovernor._needsSync(data, now):
+            return self._storage.updatePickle(str(self._providerId), lambda data: self._refresh(data, now))
+        return self._refresh(data, now)
+
+    def canAcquire(self, operation):
+        '''
+        Checks, without consuming it, if a permit for "operation" would be granted right now.
+        Unless counters must be resynchronized, this does not locks anything, so it's suitable for informative or pre-filter uses
+        '''
+        return self._allowed(self._current(), operation)
+
+    def info(self):
+        '''
+        Returns a dictionary with current counters & limits, for informative purposes
+        '''
+        data = self._current()
+        res = {}
+        for op in (ProviderGovernor.CREATE, ProviderGovernor.REMOVE):
+            concurrency, rate, ignoreLimits = self._limits(op)
+            res[op] = {
+                'in_flight': data[op]['inFlight'],
+                'max_concurrent': concurrency,
+                'max_rate': rate,
+                'ignore_limits': ignoreLimits,
+            }
+        return res
+
+    @staticmethod
+    def notifyStateChange(providerId, oldState, newState):
+        '''
+        Invoked whenever an user service changes its state, to keep in flight counters updated
+        '''
+        oldOp, newOp = ProviderGovernor.operationFor(oldState), ProviderGovernor.operationFor(newState)
+        if oldOp == newOp:
+            return
+        if oldOp is not None:
+            ProviderGovernor(providerId).release(oldOp)
+        if newOp is not None:
+            # Provider limits are needed, so its token bucket is refilled before consuming from it
+            ProviderGovernor(providerId, Provider.objects.get(id=providerId).getInstance()).acquire(newOp, force=True)
@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 from uds.core.jobs.DelayedTask import DelayedTask
 from uds.core.jobs.DelayedTaskRunner import DelayedTaskRunner
 from uds.core.util.State import State
+from uds.core.services.Exceptions import ProviderUnavailableError
 from uds.core.util import log
 from uds.models import UserService
 
@@ -241,6 +242,9 @@ class UserServiceOpChecker(DelayedTask):
             UserServiceOpChecker.checkAndUpdateState(uService, ci, state)
         except UserService.DoesNotExist as e:
             logger.error('User service not found (erased from database?) {0} : {1}'.format(e.__class__, e))
+        except ProviderUnavailableError as e:
+            logger.info('Provider unavailable checking {}, will retry later: {}'.format(uService, e))
+            UserServiceOpChecker.checkLater(uService, ci)
         except Exception as e:
             # Exception caught, mark service as errored
             logger.exception("Error {0}, {1} :".format(e.__class__, e))
@@ -41,7 +41,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2015-06-21'
+__updated__ = '2017-06-22'
+
+DEFAULT_DATA_VALIDITY = 300  # Seconds
 
 
 class Report(UserInterface):
@@ -109,6 +111,32 @@ class Report(UserInterface):
         '''
         pass
 
+    def dataVersion(self):
+        '''
+        Returns a value that changes whenever the data used by this report changes, so
+        already generated results can be reused while it does not change.
+        Default implementation changes every few minutes, override it if you know better
+        '''
+        from uds.models import getSqlDatetime
+        return getSqlDatetime(True) // DEFAULT_DATA_VALIDITY
+
+    def setProgressCallback(self, callback):
+        '''
+        Sets the function that will receive progress notifications (percent, 0-100) while generating
+        '''
+        self._progressCallback = callback
+
+    def progress(self, percent):
+        '''
+        Reports can invoke this while generating, to notify their progress
+        '''
+        callback = getattr(self, '_progressCallback', None)
+        if callback is not None:
+            try:
+                callback(percent)
+            except Exception:
+                logger.exception('Notifying report progress')
+
     def generate(self):
         '''
         Generates the reports
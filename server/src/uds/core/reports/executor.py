@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2015 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+Background execution of reports.
+
+Reports are executed by the delayed task runner (so the web workers are not blocked by report generation),
+and its results are stored as DBFiles, so identical requests reuse them while the report data does not change.
+
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from uds.core.jobs.DelayedTask import DelayedTask
+from uds.core.util.Storage import Storage
+from uds.core.util.State import State
+from uds.models import DBFile
+from uds.models import getSqlDatetime
+
+import datetime
+import hashlib
+import json
+import six
+import logging
+
+logger = logging.getLogger(__name__)
+
+__updated__ = '2017-06-22'
+
+REPORTS_OWNER = 'reports'
+RESULT_VALIDITY = 24 * 3600  # Finished reports results are kept this time (seconds)
+STALLED_TIME = 3600  # Reports running for more than this are considered failed
+
+storage = Storage('reportExecutor')
+
+
+def findReport(uuid, values=None):
+    '''
+    Returns an instance of report with the uuid, or None if not found
+    '''
+    from uds import reports
+
+    for i in reports.availableReports:
+        if i.getUuid() == uuid:
+            return i(values)
+    return None
+
+
+def jobIdFor(report, values):
+    '''
+    Job id is a hash of report, its parameters and the version of the data it uses
+    '''
+    h = hashlib.sha1()
+    h.update(report.getUuid().encode('utf-8'))
+    h.update(json.dumps(values, sort_keys=True, default=six.text_type).encode('utf-8'))
+    h.update(six.text_type(report.dataVersion()).encode('utf-8'))
+    return h.hexdigest()
+
+
+def jobInfo(jobId):
+    '''
+    Returns the info (state, progress, ...) of a report job, or None if it does not exists
+    '''
+    return storage.getPickle(jobId)
+
+
+def _setInfo(jobId, **kwargs):
+    def update(info):
+        info = info or {}
+        info.update(kwargs)
+        return info
+    return storage.updatePickle(jobId, update)
+
+
+def submit(uuid, values):
+    '''
+    Submits a report for execution. If an identical report (same parameters and data) has been already submitted,
+    its job is reused.
+
+    Returns the job info (state, progress, ...), or None if report is not found
+    '''
+    report = findReport(uuid, values)
+    if report is None:
+        return None
+
+    jobId = jobIdFor(report, values)
+    now = getSqlDatetime(True)
+
+    info = jobInfo(jobId)
+    if info is not None:
+        stalled = info['state'] in (State.FOR_EXECUTE, State.RUNNING) and now - info['stamp'] > STALLED_TIME
+        if info['state'] != State.ERROR and not stalled:
+            return info
+
+    info = _setInfo(jobId, id=jobId, state=State.FOR_EXECUTE, progress=0, error='', stamp=now,
+                    filename=report.filename, mime_type=report.mime_type, encoded=report.encoded)
+    ReportExecutor(jobId, uuid, values).register(0, 'report-' + jobId, check=False)
+
+    return info
+
+
+def result(jobId):
+    '''
+    Returns the generated data of a finished report (as generateEncoded would), or None if it's not available
+    '''
+    info = jobInfo(jobId)
+    if info is None or info['state'] != State.FINISHED:
+        return None
+    try:
+        data = DBFile.objects.get(name=_fileName(jobId)).data
+    except DBFile.DoesNotExist:
+        return None
+
+    if info['encoded']:
+        return data.encode('base64').replace('\n', '')
+    return data.decode('utf-8')
+
+
+def _fileName(jobId):
+    return REPORTS_OWNER + '/' + jobId
+
+
+def cleanup():
+    '''
+    Removes results of reports generated long ago, and jobs that failed (or never finished) long ago
+    '''
+    limit = getSqlDatetime() - datetime.timedelta(seconds=RESULT_VALIDITY)
+    for name in DBFile.objects.filter(owner=REPORTS_OWNER, modified__lt=limit).values_list('name', flat=True):
+        storage.remove(name.split('/')[-1])
+        DBFile.objects.filter(name=name).delete()
+
+    stampLimit = getSqlDatetime(True) - RESULT_VALIDITY
+    for _, info, _ in storage.filterPickle():
+        if info.get('state') != State.FINISHED and info.get('stamp', 0) < stampLimit:
+            storage.remove(info['id'])
+
+
+class ReportExecutor(DelayedTask):
+    '''
+    Delayed task that generates a report and stores its result
+    '''
+    def __init__(self, jobId, uuid, values):
+        super(ReportExecutor, self).__init__()
+        self._jobId = jobId
+        self._uuid = uuid
+        self._values = values
+
+    def run(self):
+        jobId = self._jobId
+        _setInfo(jobId, state=State.RUNNING, progress=0, stamp=getSqlDatetime(True))
+        try:
+            report = findReport(self._uuid, self._values)
+            if report is None:
+                raise Exception('Report {} not found'.format(self._uuid))
+
+            report.setProgressCallback(lambda progress: _setInfo(jobId, progress=int(progress)))
+
+            data = report.generate()
+            if data is None:
+                raise Exception('Report generation failed')
+            if isinstance(data, six.text_type):
+                data = data.encode('utf-8')
+
+            name = _fileName(jobId)
+            f, _ = DBFile.objects.get_or_create(name=name, defaults={'owner': REPORTS_OWNER})
+            f.data = data
+            f.save()
+
+            _setInfo(jobId, state=State.FINISHED, progress=100)
+        except Exception as e:
+            logger.exception('Generating report {}'.format(self._uuid))
+            _setInfo(jobId, state=State.ERROR, error=six.text_type(e), stamp=getSqlDatetime(True))
+
+        try:
+            cleanup()
+        except Exception:
+            logger.exception('Cleaning up old reports')
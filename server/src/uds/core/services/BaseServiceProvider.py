@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 from uds.core import Module
 from uds.core.util.Config import GlobalConfig
 from uds.core.ui.UserInterface import gui
+from uds.core.services.CircuitBreaker import CircuitBreaker
 import logging
 
 logger = logging.getLogger(__name__)
@@ -115,6 +116,16 @@ class ServiceProvider(Module):
     # : Note: this variable can be either a fixed value (integer, string) or a Gui text field (with a .value)
     maxRemovingServices = None
 
+    # : This defines the maximum number of services creations that can be started per second for this provider (0 means no limit)
+    # : Default is return the GlobalConfig value of GlobalConfig.MAX_PREPARING_RATE
+    # : Note: this variable can be either a fixed value (integer, string) or a Gui text field (with a .value)
+    maxPreparingRate = None
+
+    # : This defines the maximum number of services removals that can be started per second for this provider (0 means no limit)
+    # : Default is return the GlobalConfig value of GlobalConfig.MAX_REMOVING_RATE
+    # : Note: this variable can be either a fixed value (integer, string) or a Gui text field (with a .value)
+    maxRemovingRate = None
+
     # : This defines if the limits (max.. vars) should be taken into accout or simply ignored
     # : Default is return the GlobalConfig value of GlobalConfig.IGNORE_LIMITS
     # : Note: this variable can be either a fixed value (integer, string) or a Gui text field (with a .value)
@@ -189,6 +200,22 @@ class ServiceProvider(Module):
         retVal = int(getattr(val, 'value', val))
         return retVal if retVal > 0 else 1
 
+    def getMaxPreparingRate(self):
+        val = self.maxPreparingRate
+        if val is None:
+            val = self.maxPreparingRate = GlobalConfig.MAX_PREPARING_RATE.getFloat(force=True)  # Recover global an cache till restart
+
+        retVal = float(getattr(val, 'value', val))
+        return retVal if retVal > 0 else 0
+
+    def getMaxRemovingRate(self):
+        val = self.maxRemovingRate
+        if val is None:
+            val = self.maxRemovingRate = GlobalConfig.MAX_REMOVING_RATE.getFloat(force=True)  # Recover global an cache till restart
+
+        retVal = float(getattr(val, 'value', val))
+        return retVal if retVal > 0 else 0
+
     def getIgnoreLimits(self):
         val = self.ignoreLimits
         if val is None:
@@ -197,6 +224,15 @@ class ServiceProvider(Module):
         val = getattr(val, 'value', val)
         return val is True or val == gui.TRUE
 
+    def circuitBreaker(self):
+        '''
+        Returns the circuit breaker associated with this provider.
+        Providers that connects to remote services should pass their client calls through it
+        (for example, returning circuitBreaker().wrap(api) instead of api), so an unreachable
+        server does not blocks every operation for its full timeout
+        '''
+        return CircuitBreaker.breaker(self.env.key)
+
     def __str__(self):
         '''
         Basic implementation, mostly used for debuging and testing, never used
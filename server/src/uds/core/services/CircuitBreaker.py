@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2012 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from uds.core.services.Exceptions import ProviderUnavailableError
+from uds.core.util.Cache import Cache
+
+import collections
+import threading
+import socket
+import time
+import requests
+import logging
+
+__updated__ = '2017-06-21'
+
+logger = logging.getLogger(__name__)
+
+
+def isConnectivityError(e):
+    '''
+    Returns True if the exception looks like a timeout or a connection failure (and not an error
+    returned by a reachable server)
+    '''
+    if isinstance(e, requests.exceptions.HTTPError):
+        return False
+    if isinstance(e, (socket.timeout, socket.error, requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    # Some sdks (oVirt, xenapi, ...) wraps the original error, so we look also at message
+    msg = '{}'.format(e).lower()
+    return 'timed out' in msg or 'timeout' in msg or 'connection refused' in msg
+
+
+class CircuitBreaker(object):
+    '''
+    Circuit breaker for service providers.
+
+    Keeps track of consecutive connectivity errors (timeouts, mostly) against a provider. When FAILURE_THRESHOLD
+    is reached, the breaker opens and, for RESET_TIMEOUT seconds, calls are short-circuited raising
+    ProviderUnavailableError instead of waiting for the full timeout. After that, the breaker gets "half open",
+    and a single call is allowed as probe; if it succeeds, breaker is closed again, if not, it is reopened.
+
+    Results of state reads (see wrap) are remembered, so while the breaker is open the last known state
+    (if not older than LAST_KNOWN_VALIDITY) is returned instead of raising ProviderUnavailableError.
+
+    Breakers are kept in memory (one per provider and process), and its state is published at cache on every transition,
+    so it can be shown by the administration interface (that can be running at another process or server)
+    '''
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    FAILURE_THRESHOLD = 3
+    RESET_TIMEOUT = 60
+    LAST_KNOWN_VALIDITY = 1800  # Seconds a remembered state can be served while breaker is open
+    LAST_KNOWN_MAX = 10000  # Max number of remembered states per breaker (least recently stored are forgotten)
+
+    _breakers = {}
+    _lock = threading.Lock()
+    _cache = Cache('circuitBreaker')
+
+    def __init__(self, key):
+        self._key = key
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._openedAt = 0
+        self._probing = False
+        self._lastKnown = collections.OrderedDict()  # (method, arguments) --> (stamp, result)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def breaker(key):
+        '''
+        Returns the breaker associated with key (normally, the environment key of a provider), creating it if needed
+        '''
+        with CircuitBreaker._lock:
+            br = CircuitBreaker._breakers.get(key)
+            if br is None:
+                br = CircuitBreaker._breakers[key] = CircuitBreaker(key)
+        return br
+
+    @staticmethod
+    def publishedInfo(key):
+        '''
+        Returns last published info of the breaker identified by key (from any process)
+        '''
+        return CircuitBreaker._cache.get(key, {'state': CircuitBreaker.CLOSED, 'failures': 0, 'since': None})
+
+    def _setState(self, state):
+        if state == self._state:
+            return
+        logger.info('Circuit breaker for {} changed from {} to {}'.format(self._key, self._state, state))
+        self._state = state
+        try:
+            self._cache.put(self._key, {'state': state, 'failures': self._failures, 'since': int(time.time())}, CircuitBreaker.RESET_TIMEOUT * 60)
+        except Exception:
+            logger.exception('Publishing circuit breaker state')
+
+    @property
+    def state(self):
+        return self._state
+
+    def isOpen(self):
+        '''
+        True if calls will be short-circuited right now
+        '''
+        with self._lock:
+            if self._state == CircuitBreaker.OPEN:
+                return self._openedAt + CircuitBreaker.RESET_TIMEOUT > time.time()
+            return self._state == CircuitBreaker.HALF_OPEN and self._probing
+
+    def _before(self):
+        with self._lock:
+            if self._state == CircuitBreaker.OPEN:
+                if self._openedAt + CircuitBreaker.RESET_TIMEOUT > time.time():
+                    raise ProviderUnavailableError('Provider {} is unavailable right now'.format(self._key))
+                self._setState(CircuitBreaker.HALF_OPEN)
+            if self._state == CircuitBreaker.HALF_OPEN:
+                if self._probing:  # Only one probe at a time
+                    raise ProviderUnavailableError('Provider {} is unavailable right now'.format(self._key))
+                self._probing = True
+
+    def _success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._setState(CircuitBreaker.CLOSED)
+
+    def _failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == CircuitBreaker.HALF_OPEN or self._failures >= CircuitBreaker.FAILURE_THRESHOLD:
+                self._openedAt = time.time()
+                self._setState(CircuitBreaker.OPEN)
+
+    def call(self, fnc, *args, **kwargs):
+        '''
+        Invokes fnc through the breaker
+        '''
+        self._before()
+        try:
+            res = fnc(*args, **kwargs)
+        except Exception as e:
+            if isConnectivityError(e):
+                self._failure()
+            else:  # Server answered, so it is reachable
+                self._success()
+            raise
+        self._success()
+        return res
+
+    def callStateRead(self, name, fnc, *args, **kwargs):
+        '''
+        Invokes fnc (a state read named "name") through the breaker, remembering its result.
+        If the call is short-circuited, the last known result for the same arguments is returned (if recent enough)
+        '''
+        key = (name, repr(args), repr(sorted(kwargs.items())))
+        try:
+            res = self.call(fnc, *args, **kwargs)
+        except ProviderUnavailableError:
+            with self._lock:
+                known = self._lastKnown.get(key)
+            if known is None or known[0] + CircuitBreaker.LAST_KNOWN_VALIDITY < time.time():
+                raise
+            logger.debug('Provider {} unavailable, returning last known result of {}'.format(self._key, name))
+            return known[1]
+
+        with self._lock:
+            self._lastKnown.pop(key, None)
+            self._lastKnown[key] = (time.time(), res)
+            while len(self._lastKnown) > CircuitBreaker.LAST_KNOWN_MAX:
+                self._lastKnown.popitem(last=False)
+        return res
+
+    def wrap(self, api, stateReads=()):
+        '''
+        Returns a proxy of api, so every method invoked on it goes through this breaker
+        :param stateReads: Names of api methods that read states, whose last known results are served while breaker is open
+        '''
+        return _BreakerProxy(self, api, stateReads)
+
+
+class _BreakerProxy(object):
+    def __init__(self, breaker, api, stateReads):
+        self._breaker = breaker
+        self._api = api
+        self._stateReads = stateReads
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not callable(attr):
+            return attr
+
+        if name in self._stateReads:
+            def wrapper(*args, **kwargs):
+                return self._breaker.callStateRead(name, attr, *args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                return self._breaker.call(attr, *args, **kwargs)
+
+        return wrapper
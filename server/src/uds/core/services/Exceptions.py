@@ -112,3 +112,11 @@ class ServiceNotReadyError(ServiceException):
         self.code = kwargs.get('code', 0x0000)
         self.service = kwargs.get('service', None)
         self.transport = kwargs.get('transport', None)
+
+
+class ProviderUnavailableError(ServiceException):
+    '''
+    The service provider is not reachable right now (its circuit breaker is open), so the operation
+    has not been tried. Operation should be retried later
+    '''
+    pass
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2012 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.db import connection
+
+import collections
+import threading
+import atexit
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriter(object):
+    '''
+    In-process write buffer for model instances.
+
+    Items are stored on a bounded queue and written using bulk_create from a background thread,
+    whenever "flushItems" items are waiting or "flushInterval" milliseconds have passed (if a bulk insert fails,
+    items are saved one by one).
+    If the queue gets full, oldest items are dropped (and counted). Pending items are flushed on shutdown.
+
+    Derived classes provides the configuration values (sizeCfg, flushItemsCfg, flushIntervalCfg),
+    a buffer size of 0 disables the writer (items must be saved directly)
+    '''
+    sizeCfg = None
+    flushItemsCfg = None
+    flushIntervalCfg = None
+
+    _writers = {}
+    _writersLock = threading.Lock()
+
+    def __init__(self):
+        self._pid = os.getpid()
+        self._maxSize = self.sizeCfg.getInt()
+        self._queue = collections.deque(maxlen=max(self._maxSize, 1))
+        self._flushing = []  # Items being written right now
+        self._cond = threading.Condition()
+        self._flushLock = threading.Lock()  # Held while items are being written
+        self._dropped = 0
+        self._written = 0
+        self._thread = None
+        if self._maxSize > 0:
+            self._thread = threading.Thread(target=self.__run, name=self.__class__.__name__)
+            self._thread.daemon = True
+            self._thread.start()
+            atexit.register(self.flush)
+
+    @classmethod
+    def writer(cls):
+        '''
+        Returns the writer of this class for this process (a new one is created after a fork, threads are not inherited)
+        '''
+        w = BulkWriter._writers.get(cls)
+        if w is None or w._pid != os.getpid():
+            with BulkWriter._writersLock:  # Only one writer (and background thread) must be created
+                w = BulkWriter._writers.get(cls)
+                if w is None or w._pid != os.getpid():
+                    w = BulkWriter._writers[cls] = cls()
+        return w
+
+    def enabled(self):
+        return self._maxSize > 0
+
+    def add(self, item):
+        '''
+        Queues a model instance to be saved
+        '''
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self._dropped += 1
+                if self._dropped % 1000 == 1:
+                    logger.warning('{} is full, {} items dropped so far'.format(self.__class__.__name__, self._dropped))
+            self._queue.append(item)  # Deque drops oldest item if full
+            if len(self._queue) >= self.flushItemsCfg.getInt():
+                self._cond.notify()
+
+    def pending(self, fltr):
+        '''
+        Returns the items not yet written to database (in insertion order) for which fltr(item) is True
+        '''
+        with self._cond:
+            return [i for i in self._flushing if fltr(i)] + [i for i in self._queue if fltr(i)]
+
+    def readWithPending(self, fltr, reader):
+        '''
+        Invokes reader (usually a database query) and returns (reader result, pending items for which fltr(item) is True).
+        Pending items are taken before invoking reader, and the ones written meanwhile (so got by reader) are dropped.
+        No flush is done while reader runs, so written items are known by identity (not by value), and every item is returned once
+        '''
+        snapshot = self.pending(fltr)
+        with self._flushLock:
+            res = reader()
+            stillPending = set(id(i) for i in self.pending(fltr))
+        return res, [i for i in snapshot if id(i) in stillPending]
+
+    def discard(self, fltr):
+        '''
+        Removes from queue the items for which fltr(item) is True
+        '''
+        with self._cond:
+            keep = [i for i in self._queue if not fltr(i)]
+            self._queue.clear()
+            self._queue.extend(keep)
+
+    def info(self):
+        return {
+            'pending': len(self._queue),
+            'dropped': self._dropped,
+            'written': self._written,
+        }
+
+    def flush(self):
+        '''
+        Writes all pending items to database, grouped by model, using bulk inserts
+        '''
+        with self._flushLock:
+            with self._cond:
+                items = list(self._queue)
+                self._queue.clear()
+                self._flushing = items
+
+            try:
+                byModel = collections.OrderedDict()
+                for i in items:
+                    byModel.setdefault(type(i), []).append(i)
+
+                for model, objs in byModel.items():
+                    try:
+                        model.objects.bulk_create(objs)
+                        self._written += len(objs)
+                    except Exception:
+                        logger.exception('Exception saving {} items of type {}, saving them one by one'.format(len(objs), model.__name__))
+                        self.__save(model, objs)
+            finally:
+                with self._cond:
+                    self._flushing = []
+
+    def __save(self, model, objs):
+        '''
+        Saves items one by one, so a single wrong item does not make the whole batch to be lost
+        '''
+        failed = 0
+        for o in objs:
+            try:
+                o.save()
+                self._written += 1
+            except Exception:
+                failed += 1
+        if failed > 0:
+            logger.error('{} items of type {} could not be saved (maybe database is full?)'.format(failed, model.__name__))
+
+    def __run(self):
+        while True:
+            try:
+                with self._cond:
+                    if len(self._queue) < self.flushItemsCfg.getInt():
+                        self._cond.wait(self.flushIntervalCfg.getInt() / 1000.0)
+                self.flush()
+            except Exception:
+                logger.exception(self.__class__.__name__)
+                time.sleep(1)
+            finally:
+                # Do not keep a db connection open for this thread between flushes
+                connection.close()
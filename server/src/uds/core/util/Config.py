@@ -126,6 +126,17 @@ class Config(object):
                     logger.error('Default value for {0}.{1} is also invalid (integer expected)'.format(self._section, self._key))
                     return -1
 
+        def getFloat(self, force=False):
+            try:
+                return float(self.get(force))
+            except Exception:
+                logger.error('Value for {0}.{1} is invalid (float expected)'.format(self._section, self._key))
+                try:
+                    return float(self._default)
+                except Exception:
+                    logger.error('Default value for {0}.{1} is also invalid (float expected)'.format(self._section, self._key))
+                    return -1.0
+
         def getBool(self, force=False):
             if self.get(force) == '0':
                 return False
@@ -234,6 +245,10 @@ class GlobalConfig(object):
     MAX_PREPARING_SERVICES = Config.section(GLOBAL_SECTION).value('maxPreparingServices', '15', type=Config.NUMERIC_FIELD)  # Defaults to 15 services at once (per service provider)
     # Max number of service to be at "removal" state at same time
     MAX_REMOVING_SERVICES = Config.section(GLOBAL_SECTION).value('maxRemovingServices', '15', type=Config.NUMERIC_FIELD)  # Defaults to 15 services at once (per service provider)
+    # Max number of services creations started per second (per service provider, can be fractional). 0 means no rate limit
+    MAX_PREPARING_RATE = Config.section(GLOBAL_SECTION).value('maxPreparingRate', '0', type=Config.NUMERIC_FIELD)
+    # Max number of services removals started per second (per service provider, can be fractional). 0 means no rate limit
+    MAX_REMOVING_RATE = Config.section(GLOBAL_SECTION).value('maxRemovingRate', '0', type=Config.NUMERIC_FIELD)
     # If we ignore limits (max....)
     IGNORE_LIMITS = Config.section(GLOBAL_SECTION).value('ignoreLimits', '0', type=Config.BOOLEAN_FIELD)
     # Number of services to initiate removal per run of CacheCleaner
@@ -282,6 +297,22 @@ class GlobalConfig(object):
 
     # Statistics duration, in days
     STATS_DURATION = Config.section(GLOBAL_SECTION).value('statsDuration', '365', type=Config.NUMERIC_FIELD)
+    # Interval, in seconds, between collection of services pools counters (assigned, in use, ...)
+    STATS_COLLECT_INTERVAL = Config.section(GLOBAL_SECTION).value('statsCollectInterval', '120', type=Config.NUMERIC_FIELD)
+    # Directory where statistics older than statsDuration are archived (empty = statistics are simply removed)
+    STATS_ARCHIVE_PATH = Config.section(GLOBAL_SECTION).value('statsArchivePath', '', type=Config.TEXT_FIELD)
+    # Max statistics (counters & events) kept in memory awaiting to be written to database (0 = write them synchronously)
+    STATS_BUFFER_SIZE = Config.section(GLOBAL_SECTION).value('statsBufferSize', '10000', type=Config.NUMERIC_FIELD)
+    # Statistics buffer is flushed when it reaches this number of items...
+    STATS_FLUSH_ITEMS = Config.section(GLOBAL_SECTION).value('statsFlushItems', '500', type=Config.NUMERIC_FIELD)
+    # ... or when this time (in milliseconds) has passed
+    STATS_FLUSH_INTERVAL = Config.section(GLOBAL_SECTION).value('statsFlushInterval', '2000', type=Config.NUMERIC_FIELD)
+    # Max logs kept in memory awaiting to be written to database (0 = write them synchronously)
+    LOGS_BUFFER_SIZE = Config.section(GLOBAL_SECTION).value('logsBufferSize', '0', type=Config.NUMERIC_FIELD)
+    # Logs buffer is flushed when it reaches this number of items...
+    LOGS_FLUSH_ITEMS = Config.section(GLOBAL_SECTION).value('logsFlushItems', '200', type=Config.NUMERIC_FIELD)
+    # ... or when this time (in milliseconds) has passed
+    LOGS_FLUSH_INTERVAL = Config.section(GLOBAL_SECTION).value('logsFlushInterval', '1000', type=Config.NUMERIC_FIELD)
     # If disallow login using /login url, and must go to an authenticator
     DISALLOW_GLOBAL_LOGIN = Config.section(GLOBAL_SECTION).value('disallowGlobalLogin', '0', type=Config.BOOLEAN_FIELD)
 
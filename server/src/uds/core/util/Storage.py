@@ -101,6 +101,64 @@ class Storage(object):
             v = pickle.loads(v)
         return v
 
+    def updatePickle(self, skey, updater, attr1=None):
+        '''
+        Reads the pickled value stored at skey, with its row locked (select for update),
+        invokes "updater" with it (None if it does not exists yet) and stores back the value returned by updater.
+        The whole read-modify-write cycle is done inside a transaction, so it's safe among several servers.
+        Returns the stored value
+        '''
+        key = self.__getKey(skey)
+        attr1 = '' if attr1 is None else attr1
+        with transaction.atomic():
+            try:
+                c = dbStorage.objects.select_for_update().get(pk=key)  # @UndefinedVariable
+                value = pickle.loads(c.data.decode(Storage.CODEC))
+            except dbStorage.DoesNotExist:  # @UndefinedVariable
+                c, value = None, None
+
+            value = updater(value)
+            data = pickle.dumps(value).encode(Storage.CODEC)
+
+            if c is not None:
+                c.data = data
+                c.save(update_fields=['data'])
+            else:
+                try:
+                    with transaction.atomic():  # Savepoint, so a failed insert does not break outer transaction
+                        dbStorage.objects.create(owner=self._owner, key=key, data=data, attr1=attr1)  # @UndefinedVariable
+                except Exception:  # Created meanwhile by someone else, simply overwrite it
+                    dbStorage.objects.filter(key=key).update(owner=self._owner, data=data, attr1=attr1)  # @UndefinedVariable
+        return value
+
+    def setAttr1(self, skey, attr1):
+        '''
+        Updates only the attr1 of skey (if it exists)
+        '''
+        dbStorage.objects.filter(key=self.__getKey(skey)).update(attr1=attr1)  # @UndefinedVariable
+
+    def claimByAttr1(self, attr1Prefix, newAttr1, after=None, candidates=16):
+        '''
+        Atomically "claims" one of the items whose attr1 starts with attr1Prefix, changing its attr1 to newAttr1.
+        Items are tried in attr1 order (starting after "after" attr1 value if provided), reading "candidates" items
+        at a time. The claim is done with a conditional update (only succeeds if attr1 has not been changed meanwhile),
+        so no table or row lock is needed.
+        Returns the data of the claimed item, or None if no item could be claimed (all of them were claimed by others)
+        '''
+        while True:
+            query = dbStorage.objects.filter(owner=self._owner, attr1__startswith=attr1Prefix)  # @UndefinedVariable
+            if after is not None:
+                query = query.filter(attr1__gt=after)
+
+            items = list(query.order_by('attr1').values_list('key', 'data', 'attr1')[:candidates])
+            for key, data, attr1 in items:
+                if dbStorage.objects.filter(key=key, attr1=attr1).update(attr1=newAttr1) == 1:  # @UndefinedVariable
+                    return data.decode(Storage.CODEC)
+
+            if len(items) < candidates:  # No more items
+                return None
+            after = items[-1][2]
+
     def getPickleByAttr1(self, attr1):
         try:
             return pickle.loads(dbStorage.objects.get(owner=self._owner, attr1=attr1).data.decode(Storage.CODEC))  # @UndefinedVariable
@@ -38,21 +38,107 @@ from uds.models.Util import getSqlDatetime
 
 from uds.models.Calendar import Calendar
 
-from uds.core.util.Cache import Cache
-
+import collections
+import threading
 import datetime
-import time
-import six
+import bisect
 import bitarray
 import logging
 
-__updated__ = '2016-10-31'
+__updated__ = '2016-11-02'
 
 
 logger = logging.getLogger(__name__)
 
+# Days precomputed (from the day of the check) for every calendar
+WINDOW_DAYS = 7
+# Max compiled calendars kept in memory (per process)
+MAX_COMPILED = 1000
+
+MINUTES_PER_DAY = 60 * 24
+
+
+class CompiledCalendar(object):
+    '''
+    Minute bitmap of a calendar for WINDOW_DAYS days starting at "start" (a midnight), plus the start & end
+    events of every rule inside that window, so both check and nextEvent are simple lookups.
+    '''
+
+    def __init__(self, calendar, start):
+        self.version = calendar.modified
+        self.start = start
+        self.end = start + datetime.timedelta(days=WINDOW_DAYS)
+        self.data = bitarray.bitarray(MINUTES_PER_DAY * WINDOW_DAYS)
+        self.data.setall(False)
+        self.rules = []  # (rule start, rule end date, rule, sorted start events, sorted end events)
+
+        for rule in calendar.rules.all():
+            rr = rule.as_rrule()
+            ruleDurationMinutes = rule.duration_as_minutes
+            ruleFrequencyMinutes = rule.frequency_as_minutes
+            duration = datetime.timedelta(minutes=ruleDurationMinutes)
+
+            # Occurrences started before window can still be active inside it
+            _start = start - datetime.timedelta(minutes=max(ruleFrequencyMinutes, ruleDurationMinutes))
+            r_end = datetime.datetime.combine(rule.end, datetime.datetime.max.time()) if rule.end is not None else None
+
+            starts, ends = [], []
+            for val in rr.between(_start, self.end, inc=True):
+                if val >= start:
+                    starts.append(val)
+                if start <= val + duration < self.end:
+                    ends.append(val + duration)
+
+                # Skip "bogus" definitions and occurrences after rule end
+                if ruleDurationMinutes == 0 or ruleFrequencyMinutes == 0 or (r_end is not None and val > r_end):
+                    continue
+
+                pos = max(int((val - start).total_seconds() // 60), 0)
+                posdur = min(int((val + duration - start).total_seconds() // 60), len(self.data))
+                if posdur > pos:
+                    self.data[pos:posdur] = True
+
+            self.rules.append((rule.start, rule.end, rule, starts, ends))
+
+    def covers(self, dtime):
+        return self.start <= dtime < self.end
+
+    def check(self, dtime):
+        return self.data[int((dtime - self.start).total_seconds() // 60)]
+
+    def nextEvent(self, checkFrom, startEvent):
+        '''
+        Next start (or end) event strictly after checkFrom of rules active at checkFrom.
+        Events out of the window are obtained from the rule itself
+        '''
+        next_event = None
+        for rStart, rEnd, rule, starts, ends in self.rules:
+            if rStart > checkFrom or (rEnd is not None and rEnd < checkFrom.date()):
+                continue
+
+            events = starts if startEvent else ends
+            pos = bisect.bisect_right(events, checkFrom)
+            if pos < len(events):
+                event = events[pos]
+            elif startEvent:
+                event = rule.as_rrule().after(max(checkFrom, self.end - datetime.timedelta(microseconds=1)))
+            else:
+                event = rule.as_rrule_end().after(max(checkFrom, self.end - datetime.timedelta(microseconds=1)))
+
+            if next_event is None or (event is not None and next_event > event):
+                next_event = event
+
+        return next_event
+
 
 class CalendarChecker(object):
+    '''
+    Checks calendars using CompiledCalendar instances kept in memory (one per calendar, per process).
+
+    Compiled data is identified by calendar "modified" date (that is updated on any rule change), so every process
+    notices changes of calendars as soon as it gets an updated Calendar from database.
+    Checks out of the compiled window (i.e. on another week) simply compiles a new window.
+    '''
     calendar = None
 
     # For performance checking
@@ -60,59 +146,49 @@ class CalendarChecker(object):
     cache_hit = 0
     hits = 0
 
-    cache = Cache('calChecker')
+    _compiled = collections.OrderedDict()  # uuid: CompiledCalendar, least recently used first
+    _lock = threading.Lock()
 
     def __init__(self, calendar):
         self.calendar = calendar
 
-    def _updateData(self, dtime):
-        # Else, update the array
-        CalendarChecker.updates += 1
-
-        data = bitarray.bitarray(60 * 24)  # Granurality is minute
-        data.setall(False)
-
-        data_date = dtime.date()
-
-        start = datetime.datetime.combine(data_date, datetime.datetime.min.time())
-        end = datetime.datetime.combine(data_date, datetime.datetime.max.time())
-
-        for rule in self.calendar.rules.all():
-            rr = rule.as_rrule()
-
-            r_end = datetime.datetime.combine(rule.end, datetime.datetime.max.time()) if rule.end is not None else None
-
-            ruleDurationMinutes = rule.duration_as_minutes
-            ruleFrequencyMinutes = rule.frequency_as_minutes
+    @staticmethod
+    def invalidate(calendar):
+        '''
+        Removes compiled data of calendar on this process
+        '''
+        with CalendarChecker._lock:
+            CalendarChecker._compiled.pop(calendar.uuid, None)
 
-            # Skip "bogus" definitions
-            if ruleDurationMinutes == 0 or ruleFrequencyMinutes == 0:
-                continue
+    def _compiledFor(self, dtime, compile=True):
+        '''
+        Returns the compiled calendar whose window contains dtime, compiling a new window (from dtime day)
+        if needed and "compile" is True (else returns None)
+        '''
+        with CalendarChecker._lock:
+            compiled = CalendarChecker._compiled.pop(self.calendar.uuid, None)
+            if compiled is not None and compiled.version == self.calendar.modified:
+                CalendarChecker._compiled[self.calendar.uuid] = compiled  # Moved to most recently used
+            else:
+                compiled = None
 
-            # ruleDurationMinutes = ruleDurationMinutes
-            # Relative start, rrule can "spawn" the days, so we get the start at least the ruleDurationMinutes of rule to see if it "matches"
-            # This means, we need the previous matching day to be "executed" so we can get the "actives" correctly
-            diff = ruleFrequencyMinutes if ruleFrequencyMinutes > ruleDurationMinutes else ruleDurationMinutes
-            _start = (start if start > rule.start else rule.start) - datetime.timedelta(minutes=diff)
+        if compiled is not None and compiled.covers(dtime):
+            CalendarChecker.cache_hit += 1
+            return compiled
 
-            _end = end if r_end is None or end < r_end else r_end
+        if compile is False:
+            return None
 
-            for val in rr.between(_start, _end, inc=True):
-                if val.date() != data_date:
-                    diff = int((start - val).total_seconds() / 60)
-                    pos = 0
-                    posdur = ruleDurationMinutes - diff
-                    if posdur <= 0:
-                        continue
-                else:
-                    pos = val.hour * 60 + val.minute
-                    posdur = pos + ruleDurationMinutes
-                if posdur > 60 * 24:
-                    posdur = 60 * 24
-                data[pos:posdur] = True
+        CalendarChecker.updates += 1
+        compiled = CompiledCalendar(self.calendar, datetime.datetime.combine(dtime.date(), datetime.datetime.min.time()))
 
-        return data
+        with CalendarChecker._lock:
+            CalendarChecker._compiled.pop(self.calendar.uuid, None)
+            CalendarChecker._compiled[self.calendar.uuid] = compiled
+            while len(CalendarChecker._compiled) > MAX_COMPILED:
+                CalendarChecker._compiled.popitem(last=False)
 
+        return compiled
 
     def _updateEvents(self, checkFrom, startEvent=True):
 
@@ -135,27 +211,11 @@ class CalendarChecker(object):
         '''
         Checks if the given time is a valid event on calendar
         @param dtime: Datetime object to check
-        TODO: We can improve performance of this by getting from a cache first if we can
         '''
         if dtime is None:
             dtime = getSqlDatetime()
 
-        # First, try to get data from cache if it is valid
-        cacheKey = six.text_type(hash(self.calendar.modified)) + six.text_type(dtime.date().toordinal()) + self.calendar.uuid + 'checker'
-        cached = CalendarChecker.cache.get(cacheKey, None)
-
-        if cached is not None:
-            data = bitarray.bitarray()  # Empty bitarray
-            data.frombytes(cached)
-            CalendarChecker.cache_hit += 1
-        else:
-            data = self._updateData(dtime)
-
-            # Now data can be accessed as an array of booleans.
-            # Store data on persistent cache
-            CalendarChecker.cache.put(cacheKey, data.tobytes(), 3600 * 24)
-
-        return data[dtime.hour * 60 + dtime.minute]
+        return self._compiledFor(dtime).check(dtime)
 
     def nextEvent(self, checkFrom=None, startEvent=True, offset=None):
         '''
@@ -169,20 +229,21 @@ class CalendarChecker(object):
         if offset is None:
             offset = datetime.timedelta(minutes=0)
 
-        cacheKey = six.text_type(hash(self.calendar.modified)) + self.calendar.uuid + six.text_type(offset.seconds) + six.text_type(int(time.mktime(checkFrom.timetuple()))) + 'event' + ('x' if startEvent is True else '_')
-        next_event = CalendarChecker.cache.get(cacheKey, None)
-        if next_event is None:
-            logger.debug('Regenerating cached nextEvent')
-            next_event = self._updateEvents(checkFrom - offset, startEvent)  # We substract on checkin, so we can take into account for next execution the "offset" on start & end (just the inverse of current, so we substract it)
-            if next_event is not None:
-                next_event += offset
-            CalendarChecker.cache.put(cacheKey, next_event, 3600)
-        else:
-            logger.debug('nextEvent cache hit')
+        # We substract on checkin, so we can take into account for next execution the "offset" on start & end (just the inverse of current, so we substract it)
+        checkFrom -= offset
+
+        # Do not compile windows for past dates (i.e. calendar actions last execution), simply use rules for them
+        compiled = self._compiledFor(checkFrom, compile=checkFrom >= datetime.datetime.now() - datetime.timedelta(days=1))
+        if compiled is not None:
             CalendarChecker.hits += 1
+            next_event = compiled.nextEvent(checkFrom, startEvent)
+        else:
+            next_event = self._updateEvents(checkFrom, startEvent)
 
-        return next_event
+        if next_event is not None:
+            next_event += offset
 
+        return next_event
 
     def debug(self):
 
@@ -32,11 +32,13 @@
 '''
 from __future__ import unicode_literals
 
-__updated__ = '2015-03-09'
+__updated__ = '2017-05-22'
 
+from django.db.models import Q
 from uds.models import Permissions
 from uds.core.util import ot
 
+import six
 import logging
 
 logger = logging.getLogger(__name__)
@@ -85,6 +87,69 @@ def getPermissionName(perm):
     return Permissions.permissionAsString(perm)
 
 
+class Resolver(object):
+    '''
+    Resolves the effective permissions of an user over any number of objects, reading
+    all the permissions of the user (and of its groups) with a single query.
+
+    Intended to be used during a single request, so permissions changes are not seen by an existing resolver.
+    '''
+
+    def __init__(self, user):
+        self._user = user
+        self._permissions = None  # (object_type, object_id) --> permission. object_id is None for "root" (type) permissions
+
+    def __load(self):
+        if self._permissions is None:
+            self._permissions = {}
+            for objType, objId, perm in Permissions.objects.filter(Q(user=self._user) | Q(group__in=self._user.groups.all())).values_list('object_type', 'object_id', 'permission'):
+                if perm > self._permissions.get((objType, objId), PERMISSION_NONE):
+                    self._permissions[(objType, objId)] = perm
+        return self._permissions
+
+    def __shortcut(self):
+        '''
+        Permission that is granted without looking at permissions table, or None if they have to be read
+        '''
+        if self._user.is_admin is True:
+            return PERMISSION_ALL
+
+        if self._user.staff_member is False:
+            return PERMISSION_NONE
+
+        return None
+
+    def getEffectivePermission(self, obj, root=False):
+        perm = self.__shortcut()
+        if perm is not None:
+            return perm
+
+        permissions = self.__load()
+        objType = ot.getObjectType(obj)
+        perm = permissions.get((objType, None), PERMISSION_NONE)
+        if root is False:
+            perm = max(perm, permissions.get((objType, obj.pk), PERMISSION_NONE))
+        return perm
+
+    def checkPermissions(self, obj, permission=PERMISSION_ALL, root=False):
+        return self.getEffectivePermission(obj, root) >= permission
+
+    def filter(self, queryset, permission=PERMISSION_READ):
+        '''
+        Restricts queryset to the objects the user has, at least, "permission" over
+        '''
+        perm = self.__shortcut()
+        if perm is not None:
+            return queryset if perm >= permission else queryset.none()
+
+        permissions = self.__load()
+        objType = ot.getObjectType(queryset.model())
+        if permissions.get((objType, None), PERMISSION_NONE) >= permission:
+            return queryset
+
+        return queryset.filter(pk__in=[objId for (oType, objId), perm in six.iteritems(permissions) if oType == objType and objId is not None and perm >= permission])
+
+
 def revokePermissionById(permId):
     try:
         return Permissions.objects.get(uuid=permId).delete()
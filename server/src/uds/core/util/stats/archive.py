@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+
+Archival of old statistics to compressed columnar files.
+
+Every file contains a whole month ("partition") of a stats table. Files are gzip compressed, and contain
+blocks of up to ARCHIVE_BLOCK_ROWS rows, so months are written & read without keeping them whole in memory.
+Every block is a json header (a line) followed by every column, one after another:
+  * numeric columns are stored as arrays (as dumped by array module)
+  * text columns are stored as a json list
+'''
+from __future__ import unicode_literals
+
+from django.db import transaction
+from uds.core.util.Config import GlobalConfig
+from uds.core.util.Storage import Storage
+from uds.models import StatsCounters
+from uds.models import StatsCountersAccum
+from uds.models import StatsEvents
+
+import datetime
+import calendar
+import array
+import gzip
+import json
+import sys
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+DELETE_CHUNK_SIZE = 5000  # Rows deleted on every delete statement, so tables are not locked for long
+ARCHIVE_BLOCK_ROWS = 50000  # Max rows of every block of archive files
+
+TEXT = 'text'
+
+# Archived models, with its columns & types (array typecode or TEXT)
+# Ids are stored as doubles, exact for any id we can get
+COLUMNS = {
+    StatsCounters: (
+        ('id', 'd'), ('owner_id', 'i'), ('owner_type', 'h'), ('counter_type', 'h'), ('stamp', 'i'), ('value', 'i'),
+    ),
+    StatsEvents: (
+        ('id', 'd'), ('owner_id', 'i'), ('owner_type', 'h'), ('event_type', 'h'), ('stamp', 'i'),
+        ('fld1', TEXT), ('fld2', TEXT), ('fld3', TEXT), ('fld4', TEXT),
+    ),
+}
+
+
+# Months are UTC months, so they are made of whole rollup buckets (StatsCountersAccum intervals are UTC aligned)
+def _monthStart(stamp):
+    d = datetime.datetime.utcfromtimestamp(stamp)
+    return calendar.timegm(datetime.datetime(d.year, d.month, 1).timetuple())
+
+
+def _nextMonth(stamp):
+    d = datetime.datetime.utcfromtimestamp(stamp)
+    d = datetime.datetime(d.year + 1, 1, 1) if d.month == 12 else datetime.datetime(d.year, d.month + 1, 1)
+    return calendar.timegm(d.timetuple())
+
+
+class ColumnsWriter(object):
+    '''
+    Writes blocks of columns ((name, type), ...) to a new file at path.
+    File is written to a temporary file and renamed on close, so readers never see incomplete files
+    '''
+    def __init__(self, path, columns):
+        self._path = path
+        self._tmpPath = path + '.tmp'
+        self._columns = columns
+        self._file = gzip.open(self._tmpPath, 'wb')
+
+    def write(self, data):
+        '''
+        Writes a block with data (a dict name: sequence of values), nothing is written if data has no rows
+        '''
+        rows = len(data[self._columns[0][0]]) if self._columns else 0
+        if rows == 0:
+            return
+        chunks = []
+        for name, kind in self._columns:
+            if kind == TEXT:
+                chunk = json.dumps(list(data[name])).encode('utf-8')
+            else:
+                a = array.array(str(kind), data[name])
+                if sys.byteorder != 'little':
+                    a.byteswap()
+                chunk = a.tostring()
+            chunks.append(chunk)
+
+        header = {
+            'version': ARCHIVE_VERSION,
+            'rows': rows,
+            'columns': [(c[0], c[1], array.array(str(c[1])).itemsize if c[1] != TEXT else 0, len(chunks[i])) for i, c in enumerate(self._columns)],
+        }
+        self._file.write(json.dumps(header).encode('utf-8') + b'\n')
+        for chunk in chunks:
+            self._file.write(chunk)
+
+    def close(self):
+        self._file.close()
+        os.rename(self._tmpPath, self._path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmpPath)
+
+
+def readBlocks(path, names=None):
+    '''
+    Yields the blocks of a file written by ColumnsWriter, as dicts name: sequence of values.
+    If names is not None, only those columns are returned
+    '''
+    f = gzip.open(path, 'rb')
+    try:
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            header = json.loads(line.decode('utf-8'))
+            if header['version'] != ARCHIVE_VERSION:
+                raise Exception('Unsupported stats archive version {} at {}'.format(header['version'], path))
+
+            res = {}
+            for name, kind, itemSize, size in header['columns']:
+                chunk = f.read(size)
+                if names is not None and name not in names:
+                    continue
+                if kind == TEXT:
+                    res[name] = json.loads(chunk.decode('utf-8'))
+                else:
+                    a = array.array(str(kind))
+                    if a.itemsize != itemSize:
+                        raise Exception('Stats archive {} was created on an incompatible platform'.format(path))
+                    a.fromstring(chunk)
+                    if sys.byteorder != 'little':
+                        a.byteswap()
+                    res[name] = a
+            yield res
+    finally:
+        f.close()
+
+
+def deleteRange(model, since, to):
+    '''
+    Removes the rows of model with stamp in [since, to) in small chunks, to avoid locking big tables for long
+    '''
+    while True:
+        with transaction.atomic():
+            ids = list(model.objects.filter(stamp__gte=since, stamp__lt=to).values_list('id', flat=True)[:DELETE_CHUNK_SIZE])
+            if len(ids) == 0:
+                break
+            model.objects.filter(id__in=ids).delete()
+
+
+class ArchivedResult(list):
+    '''
+    List of stats (archived & from database) that provides the basic queryset methods used by reports
+    '''
+    def count(self, *args):
+        if len(args) > 0:
+            return list.count(self, *args)
+        return len(self)
+
+    def order_by(self, *fields):
+        res = ArchivedResult(self)
+        for f in reversed(fields):
+            res.sort(key=lambda x: getattr(x, f.lstrip('-')), reverse=f.startswith('-'))
+        return res
+
+
+class StatsArchiver(object):
+    '''
+    Moves whole months of statistics older than the configured stats duration from database
+    to the archive directory (statsArchivePath), and reads them back for queries.
+    '''
+
+    def __init__(self, path=None):
+        self._path = path if path is not None else GlobalConfig.STATS_ARCHIVE_PATH.get()
+        self._storage = Storage('statsArchive')
+
+    def enabled(self):
+        return self._path != ''
+
+    def _fileFor(self, model, month):
+        return os.path.join(self._path, '{}-{}.ucol.gz'.format(model._meta.db_table, datetime.datetime.utcfromtimestamp(month).strftime('%Y%m')))
+
+    def archivedUntil(self, model):
+        '''
+        Stamp until which (not included) the stats of model are only at the archive
+        '''
+        return self._storage.getPickle(model._meta.db_table) or 0
+
+    def archive(self, model, minTime):
+        '''
+        Archives every whole month of model stats older than minTime.
+        Returns the number of rows archived
+        '''
+        if os.path.isdir(self._path) is False:
+            os.makedirs(self._path)
+
+        columns = COLUMNS[model]
+        names = [c[0] for c in columns]
+        archived = 0
+        while True:
+            first = model.objects.order_by('stamp').values_list('stamp', flat=True)[:1]
+            if len(first) == 0:
+                break
+            month = _monthStart(first[0])
+            end = _nextMonth(month)
+            if end > minTime:
+                break
+
+            path = self._fileFor(model, month)
+            writer = ColumnsWriter(path, columns)
+            try:
+                # If a previous run was interrupted after writing the file, keep already archived rows
+                known = set()
+                if os.path.exists(path):
+                    for block in readBlocks(path):
+                        known.update(int(i) for i in block['id'])
+                        writer.write(block)
+
+                block = dict((n, []) for n in names)
+                for row in model.objects.filter(stamp__gte=month, stamp__lt=end).order_by('id').values_list(*names).iterator():
+                    if row[0] in known:
+                        continue
+                    for i, n in enumerate(names):
+                        block[n].append(row[i])
+                    archived += 1
+                    if len(block['id']) >= ARCHIVE_BLOCK_ROWS:
+                        writer.write(block)
+                        block = dict((n, []) for n in names)
+                writer.write(block)
+            except Exception:
+                writer.abort()
+                raise
+            writer.close()
+            logger.info('Archived {} stats of month {} to {}'.format(model._meta.db_table, datetime.datetime.utcfromtimestamp(month).strftime('%Y-%m'), path))
+
+            deleteRange(model, month, end)
+            if model is StatsCounters:
+                # Rollups of archived months are no longer needed, archives are read directly
+                deleteRange(StatsCountersAccum, month, end)
+            # Archive is only read once the month is no longer at database, so no row is read twice
+            # (if interrupted, next run completes the archive of this month & its removal)
+            self._storage.putPickle(model._meta.db_table, end)
+
+        return archived
+
+    def read(self, model, since, to, names=None, **filters):
+        '''
+        Yields dicts (column: value) of the archived rows of model with stamp in [since, to] matching filters.
+        Filters are column=value or column=list of values
+        '''
+        filters = dict((k, set(v) if isinstance(v, (list, tuple, set)) else set((v,))) for k, v in filters.items() if v is not None)
+        if names is not None:
+            names = set(names) | set(filters.keys()) | set(('stamp',))
+        until = min(to, self.archivedUntil(model) - 1)
+        if not self.enabled() or since > until:
+            return
+
+        month = _monthStart(since)
+        while month <= until:
+            path = self._fileFor(model, month)
+            month = _nextMonth(month)
+            if os.path.exists(path) is False:
+                continue
+            for data in readBlocks(path, names):
+                cols = list(data.keys())
+                stamps = data['stamp']
+                for i in range(len(stamps)):
+                    if stamps[i] < since or stamps[i] > until:
+                        continue
+                    if any(data[k][i] not in v for k, v in filters.items()):
+                        continue
+                    yield dict((c, data[c][i]) for c in cols)
+
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Time bucketing helpers for statistics.
+
+Stamps (unix timestamps) are kept as compact arrays, numpy arrays if numpy is available or
+array module arrays if not, and bucketed with vectorized operations when possible.
+
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+import datetime
+import calendar
+import array
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+
+def toArray(values):
+    '''
+    Converts an iterable of integers (i.e. stamps) to a compact array
+    '''
+    if numpy is not None:
+        return numpy.fromiter(values, dtype=numpy.int64)
+    return array.array(str('l'), values)
+
+
+def _utcOffset(day):
+    '''
+    Local time offset (seconds) at noon of "day" (days since epoch)
+    '''
+    stamp = day * DAY + DAY // 2
+    return calendar.timegm(datetime.datetime.fromtimestamp(stamp).timetuple()) - stamp
+
+
+def toLocal(stamps):
+    '''
+    Converts unix stamps to "local" stamps (seconds since epoch, as if local time was UTC), so
+    hours & days can be computed with integer arithmetic.
+    Offset is computed once per distinct day (at noon)
+    '''
+    if numpy is not None:
+        stamps = numpy.asarray(stamps, dtype=numpy.int64)
+        if len(stamps) == 0:
+            return stamps
+        days, inverse = numpy.unique(stamps // DAY, return_inverse=True)
+        offsets = numpy.array([_utcOffset(int(d)) for d in days], dtype=numpy.int64)
+        return stamps + offsets[inverse]
+
+    offsets = {}
+    res = array.array(str('l'))
+    for s in stamps:
+        day = s // DAY
+        offset = offsets.get(day)
+        if offset is None:
+            offset = offsets[day] = _utcOffset(day)
+        res.append(s + offset)
+    return res
+
+
+def histogram(stamps, since, step, intervals):
+    '''
+    Counts stamps in "intervals" consecutive intervals of "step" seconds, starting at "since".
+    Stamps out of range are ignored. Returns a list of counts
+    '''
+    if numpy is not None:
+        stamps = numpy.asarray(stamps, dtype=numpy.int64)
+        buckets = (stamps - since) // step
+        buckets = buckets[(buckets >= 0) & (buckets < intervals)]
+        return numpy.bincount(buckets, minlength=intervals).tolist()
+
+    res = [0] * intervals
+    for s in stamps:
+        b = (s - since) // step
+        if 0 <= b < intervals:
+            res[b] += 1
+    return res
+
+
+def weekHourMatrix(stamps):
+    '''
+    Returns a 7x24 matrix (list of lists) with the number of stamps on every (local time) weekday and hour.
+    Weekdays are numbered as datetime.weekday (0 is monday)
+    '''
+    local = toLocal(stamps)
+    if numpy is not None:
+        # Epoch (1970-01-01) was thursday (weekday 3)
+        cells = ((local // DAY + 3) % 7) * 24 + (local % DAY) // 3600
+        return numpy.bincount(cells, minlength=7 * 24).reshape(7, 24).tolist()
+
+    res = [[0] * 24 for _ in range(7)]
+    for s in local:
+        res[(s // DAY + 3) % 7][(s % DAY) // 3600] += 1
+    return res
+
+
+def weekAndHourHistograms(stamps):
+    '''
+    Returns (weekday histogram (7 items), hour histogram (24 items)) of stamps, on local time
+    '''
+    matrix = weekHourMatrix(stamps)
+    return [sum(row) for row in matrix], [sum(matrix[d][h] for d in range(7)) for h in range(24)]
+
+
+def percentiles(values, percents):
+    '''
+    Returns the requested percentiles (0-100) of values (nearest rank), or None for each one if values is empty
+    '''
+    if numpy is not None:
+        values = numpy.asarray(values)
+        if len(values) == 0:
+            return [None] * len(percents)
+        return [v.item() for v in numpy.percentile(values, percents, interpolation='nearest')]
+
+    values = sorted(values)
+    if len(values) == 0:
+        return [None] * len(percents)
+    return [values[min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))] for p in percents]
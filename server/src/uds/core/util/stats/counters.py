@@ -36,6 +36,7 @@ from uds.models import NEVER
 from django.utils.translation import ugettext_lazy as _
 from uds.core.managers import statsManager
 import datetime
+import time
 
 import logging
 
@@ -71,6 +72,26 @@ def addCounter(obj, counterType, counterValue, stamp=None):
     return statsManager().addCounter(__transDict[type(obj)], obj.id, counterType, counterValue, stamp)
 
 
+def addCounters(items, stamp=None):
+    '''
+    Adds several counter stats at once
+
+    Args:
+        items: iterable of (obj, counterType, counterValue) tuples
+        stamp: (optional) date for the counters, current date/time if not provided
+
+    note: Unsupported stats are skipped (and logged), as in addCounter
+    '''
+    values = []
+    for obj, counterType, counterValue in items:
+        if type(obj) not in __caWrite.get(counterType, ()):
+            logger.error('Type {0} does not accepts counter of type {1}'.format(type(obj), counterValue))
+            continue
+        values.append((__transDict[type(obj)], obj.id, counterType, counterValue))
+
+    return statsManager().addCounters(values, stamp)
+
+
 def getCounters(obj, counterType, **kwargs):
     '''
     Get counters
@@ -110,9 +131,35 @@ def getCounters(obj, counterType, **kwargs):
     else:
         owner_ids = None
 
-    for i in statsManager().getCounters(__transDict[type(obj)], counterType, owner_ids, since, to, limit, use_max):
-        val = (datetime.datetime.fromtimestamp(i.stamp), i.value)
-        yield val
+    for stamp, value in statsManager().getCounters(__transDict[type(obj)], counterType, owner_ids, since, to, limit, use_max):
+        yield (datetime.datetime.fromtimestamp(stamp), value)
+
+
+def getCountersMatrix(objs, counterType, since, step, intervals, use_max=False):
+    '''
+    Get counters of several objects (all of them of same type) at once, grouped by intervals
+
+    Args:
+        objs: Objects for which to recover stats counters
+        counterType: type of counter to recover
+        since: start date of first interval
+        step: duration of intervals, in seconds
+        intervals: number of intervals
+        use_max: if True, max of every interval is returned instead of average
+
+    Returns:
+        A dict {obj.id: [value, ...]}, one value per interval (None if no counters were stored on that interval)
+    '''
+    objs = list(objs)
+    if len(objs) == 0:
+        return {}
+
+    if type(objs[0]) not in __caWrite.get(counterType, ()):
+        logger.error('Type {0} has no registerd stats of type {1}'.format(type(objs[0]), counterType))
+        return {}
+
+    since = int(time.mktime(since.timetuple()))
+    return statsManager().getCountersMatrix(__transDict[type(objs[0])], counterType, [o.id for o in objs], since, step, intervals, use_max)
 
 
 def getCounterTitle(counterType):
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2013 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.db import connection
+from uds.models import StatsCounters
+from uds.models import StatsCountersAccum
+from uds.models import StatsEvents
+from uds.models import NEVER_UNIX
+from uds.models import getSqlDatetime
+
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+FETCH_SIZE = 1000
+MIN_INTERVAL = 60  # Minimum grouping interval, counters are not collected more often than this
+
+
+def _listOf(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    if hasattr(value, '__iter__'):  # Generators
+        return list(value)
+    return [value]
+
+
+def _inClause(field, values, params):
+    '''
+    Returns an "field IN (%s, ...)" clause, appending the values to params
+    '''
+    params.extend(values)
+    return '{} IN ({})'.format(field, ','.join(['%s'] * len(values)))
+
+
+def _where(owner_type, owner_id, counter_type, since, to, params):
+    '''
+    Builds a where clause, with columns in the order of the composite indexes:
+    (owner_type, counter_type, stamp) or (owner_type, owner_id, counter_type, stamp)
+    '''
+    clauses = [_inClause('owner_type', owner_type, params)]
+    if owner_id is not None:
+        clauses.append(_inClause('owner_id', owner_id, params))
+    clauses.append('counter_type=%s')
+    clauses.append('stamp>=%s')
+    clauses.append('stamp<=%s')
+    params.extend((counter_type, since, to))
+    return ' AND '.join(clauses)
+
+
+def _fetch(query, params):
+    '''
+    Executes the query, yielding rows as they are fetched
+    '''
+    logger.debug('Stats query: {} {}'.format(query, params))
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+
+def _merge(first, second):
+    '''
+    Merges two streams of (bucket, count, sum, max) sorted by bucket, combining the rows of same bucket
+    '''
+    a = next(first, None)
+    b = next(second, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a
+            a = next(first, None)
+        elif a is None or b[0] < a[0]:
+            yield b
+            b = next(second, None)
+        else:
+            yield (a[0], a[1] + b[1], a[2] + b[2], max(a[3], b[3]))
+            a = next(first, None)
+            b = next(second, None)
+
+
+def _firstStamp(owner_type, owner_id, counter_type):
+    q = StatsCounters.objects.filter(owner_type__in=owner_type, counter_type=counter_type)
+    if owner_id is not None:
+        q = q.filter(owner_id__in=owner_id)
+    first = q.order_by('stamp').values_list('stamp', flat=True)[:1]
+    return first[0] if len(first) > 0 else None
+
+
+def getGroupedCounters(owner_type, counter_type, owner_id=None, since=None, to=None, limit=None, use_max=False, accumulated=None, archiver=None):
+    '''
+    Returns a generator of (stamp, value) of counters grouped by interval (the value is the average of interval, or max if use_max).
+
+    Args:
+        owner_type: owner type or list of owner types
+        counter_type: counter type
+        owner_id: (optional) owner id or list of owner ids
+        since, to: (optional) unix timestamps of interval, defaults to "all counters until now"
+        limit: (optional) approximate number of points to return. The group interval will be computed from this
+        use_max: if True, max of every interval is returned instead of average
+        accumulated: (stamp, id) of last counter already rolled up at StatsCountersAccum (None if none)
+        archiver: (optional) StatsArchiver used to include archived counters
+
+    Grouping is done at database, over the coarsest rollup able to provide "limit" points, plus
+    the raw counters not yet accumulated. Archived counters (if any requested) are grouped here.
+    '''
+    owner_type = _listOf(owner_type)
+    owner_id = _listOf(owner_id)
+    if owner_id is not None and len(owner_id) == 0:  # Owner without elements, nothing to return
+        return
+
+    since = since and int(since) or NEVER_UNIX
+    to = to and int(to) or getSqlDatetime(True)
+
+    interval = MIN_INTERVAL
+    if limit is not None:
+        elements = max(int(limit), 2)  # Protect for division a few lines below... :-)
+        if since == NEVER_UNIX:  # Use first stored counter as start, so we really get "limit" points
+            since = _firstStamp(owner_type, owner_id, counter_type) or since
+        interval = max(interval, int((to - since) / (elements - 1)))
+
+    # Group by a multiple of the rollup used, so rollup intervals are never splitted
+    # Intervals finer than any rollup are computed from raw counters only
+    interval_type, duration = StatsCountersAccum.intervalFor(interval)
+    if interval < duration:
+        accumulated = None
+    else:
+        interval = interval - interval % duration
+
+    def accumulatedRows():
+        if accumulated is None:
+            return
+        params = [interval, interval_type]
+        query = ('SELECT FLOOR(stamp/%s), SUM(v_count), SUM(v_sum), MAX(v_max) FROM {} '
+                 'WHERE interval_type=%s AND {} GROUP BY 1 ORDER BY 1').format(
+                     StatsCountersAccum._meta.db_table, _where(owner_type, owner_id, counter_type, since, to, params))
+        for row in _fetch(query, params):
+            yield row
+
+    def rawRows():
+        params = [interval]
+        where = _where(owner_type, owner_id, counter_type, since, to, params)
+        if accumulated is not None:  # Only counters after the accumulation watermark
+            where += ' AND (stamp>%s OR (stamp=%s AND id>%s))'
+            params.extend((accumulated[0], accumulated[0], accumulated[1]))
+        query = ('SELECT FLOOR(stamp/%s), COUNT(*), SUM(value), MAX(value) FROM {} '
+                 'WHERE {} GROUP BY 1 ORDER BY 1').format(StatsCounters._meta.db_table, where)
+        for row in _fetch(query, params):
+            yield row
+
+    def archivedRows():
+        if archiver is None or not archiver.enabled():
+            return
+        groups = {}
+        for row in archiver.read(StatsCounters, since, to, ('value',), owner_type=owner_type, owner_id=owner_id, counter_type=counter_type):
+            bucket, value = row['stamp'] // interval, row['value']
+            v = groups.get(bucket)
+            if v is None:
+                groups[bucket] = [1, value, value]
+            else:
+                v[0] += 1
+                v[1] += value
+                v[2] = max(v[2], value)
+        for bucket in sorted(groups):
+            v = groups[bucket]
+            yield (bucket, v[0], v[1], v[2])
+
+    rows = _merge(archivedRows(), _merge(accumulatedRows(), rawRows()))
+    for bucket, count, total, maximum in rows:
+        if use_max:
+            value = int(maximum)
+        else:
+            value = int(math.ceil(float(total) / int(count)))
+        yield (int(bucket) * interval, value)
+
+
+def getCountersMatrix(owner_type, counter_type, owner_id, since, step, intervals, use_max=False, archiver=None):
+    '''
+    Returns the counters of several owners grouped in "intervals" consecutive intervals of "step" seconds starting at "since",
+    as a dict {owner_id: [value, ...]} (one value per interval, None if there are no counters on it).
+    Value is the average of the interval, or max if use_max.
+
+    All owners & intervals are obtained with a single grouped query
+    '''
+    owner_type = _listOf(owner_type)
+    owner_id = _listOf(owner_id)
+    to = since + step * intervals - 1
+
+    groups = {}  # (owner, bucket): [count, sum, max]
+
+    def add(owner, bucket, count, total, maximum):
+        v = groups.get((owner, bucket))
+        if v is None:
+            groups[(owner, bucket)] = [count, total, maximum]
+        else:
+            v[0] += count
+            v[1] += total
+            v[2] = max(v[2], maximum)
+
+    if owner_id is None or len(owner_id) > 0:
+        params = [since, step]
+        query = ('SELECT owner_id, FLOOR((stamp-%s)/%s), COUNT(*), SUM(value), MAX(value) FROM {} '
+                 'WHERE {} GROUP BY 1, 2').format(StatsCounters._meta.db_table, _where(owner_type, owner_id, counter_type, since, to, params))
+        for owner, bucket, count, total, maximum in _fetch(query, params):
+            add(owner, int(bucket), int(count), int(total), int(maximum))
+
+        if archiver is not None and archiver.enabled():
+            for row in archiver.read(StatsCounters, since, to, ('owner_id', 'value'), owner_type=owner_type, owner_id=owner_id, counter_type=counter_type):
+                add(row['owner_id'], (row['stamp'] - since) // step, 1, row['value'], row['value'])
+
+    res = dict((o, [None] * intervals) for o in (owner_id or ()))
+    for (owner, bucket), v in groups.items():
+        res.setdefault(owner, [None] * intervals)[bucket] = v[2] if use_max else int(math.ceil(float(v[1]) / v[0]))
+    return res
+
+
+def getEventsMatrix(owner_type, event_type, owner_id, since, step, intervals, distinct=None, archiver=None):
+    '''
+    Returns the number of events of several owners grouped in "intervals" consecutive intervals of "step" seconds starting at "since",
+    as a dict {owner_id: [(count, distinct count), ...]} (one tuple per interval).
+    If owner_id is None, events of all owners are counted together, under the None key.
+    If distinct is a field name (fld1, ...), distinct count is the number of different values of that field, else it is 0.
+
+    All owners & intervals are obtained with a single grouped query.
+    Note: the distinct count of an interval that is partially archived is approximated (archived and database values are added)
+    '''
+    owner_type = _listOf(owner_type)
+    event_type = _listOf(event_type)
+    owner_ids = _listOf(owner_id)
+    to = since + step * intervals - 1
+
+    res = dict((o, [(0, 0)] * intervals) for o in (owner_ids if owner_ids is not None else (None,)))
+
+    def add(owner, bucket, count, distinctCount):
+        if owner_ids is None:
+            owner = None
+        v = res.setdefault(owner, [(0, 0)] * intervals)
+        v[bucket] = (v[bucket][0] + count, v[bucket][1] + distinctCount)
+
+    if owner_ids is not None and len(owner_ids) == 0:
+        return res
+
+    params = [since, step]
+    clauses = [_inClause('owner_type', owner_type, params)]
+    if owner_ids is not None:
+        clauses.append(_inClause('owner_id', owner_ids, params))
+    clauses.append(_inClause('event_type', event_type, params))
+    clauses.append('stamp>=%s')
+    clauses.append('stamp<=%s')
+    params.extend((since, to))
+
+    query = ('SELECT {}, FLOOR((stamp-%s)/%s), COUNT(*), {} FROM {} WHERE {} GROUP BY 1, 2').format(
+        'owner_id' if owner_ids is not None else '0',
+        'COUNT(DISTINCT {})'.format(distinct) if distinct is not None else '0',
+        StatsEvents._meta.db_table,
+        ' AND '.join(clauses)
+    )
+    for owner, bucket, count, distinctCount in _fetch(query, params):
+        add(owner, int(bucket), int(count), int(distinctCount))
+
+    if archiver is not None and archiver.enabled():
+        archived = {}
+        names = ('owner_id', distinct) if distinct is not None else ('owner_id',)
+        for row in archiver.read(StatsEvents, since, to, names, owner_type=owner_type, owner_id=owner_ids, event_type=event_type):
+            v = archived.setdefault((row['owner_id'], (row['stamp'] - since) // step), [0, set()])
+            v[0] += 1
+            if distinct is not None:
+                v[1].add(row[distinct])
+        for (owner, bucket), v in archived.items():
+            add(owner, bucket, v[0], len(v[1]))
+
+    return res
+
+
+def getEventsRows(owner_type, event_type, fields, owner_id=None, since=None, to=None, archiver=None):
+    '''
+    Yields tuples with the requested fields of events, ordered by stamp, without creating model instances
+    (archived events, if any requested, are also included)
+    '''
+    owner_type = _listOf(owner_type)
+    event_type = _listOf(event_type)
+    owner_id = _listOf(owner_id)
+    since = since and int(since) or NEVER_UNIX
+    to = to and int(to) or getSqlDatetime(True)
+
+    if archiver is not None and archiver.enabled():
+        for row in sorted(archiver.read(StatsEvents, since, to - 1, fields, owner_type=owner_type, owner_id=owner_id, event_type=event_type),
+                          key=lambda x: x['stamp']):
+            yield tuple(row[f] for f in fields)
+
+    q = StatsEvents.objects.filter(owner_type__in=owner_type, event_type__in=event_type, stamp__gte=since, stamp__lt=to)
+    if owner_id is not None:
+        q = q.filter(owner_id__in=owner_id)
+
+    for row in q.order_by('stamp').values_list(*fields).iterator():
+        yield row
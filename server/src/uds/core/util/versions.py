@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2012 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import signals
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+__updated__ = '2017-05-22'
+
+PREFIX = 'modelVersion:'
+# Versions are kept (at shared django cache) for this time
+VERSION_TIMEOUT = 30 * 24 * 3600
+
+_tracked = set()
+
+
+def _key(name):
+    return PREFIX + name
+
+
+def bump(name):
+    '''
+    Changes the version of "name" (model name or any other resource name).
+    Versions are milliseconds timestamps, so they can also be used as modification dates
+    '''
+    try:
+        cache.set(_key(name), int(time.time() * 1000), VERSION_TIMEOUT)
+    except Exception:
+        logger.exception('Bumping version of {}'.format(name))
+
+
+def _modelChanged(sender, **kwargs):
+    # Bumped once committed, so the version key is not kept locked by the (maybe long) transaction of the change
+    name = sender.__name__
+    transaction.on_commit(lambda: bump(name))
+
+
+def track(*models):
+    '''
+    Bumps the version of models whenever any instance is saved or deleted
+    Note that queryset updates & bulk inserts do not sent signals, so they do not bump versions
+    Every bump is a write on (database) cache, so only models changed by administration should be tracked,
+    never those frequently changed by the broker itself (user services, users, ...)
+    '''
+    for model in models:
+        if model in _tracked:
+            continue
+        signals.post_save.connect(_modelChanged, sender=model, weak=False)
+        signals.post_delete.connect(_modelChanged, sender=model, weak=False)
+        _tracked.add(model)
+
+
+def get(*names):
+    '''
+    Returns the versions of names (0 if unknown), using a single cache access
+    '''
+    try:
+        values = cache.get_many([_key(n) for n in names])
+    except Exception:
+        logger.exception('Getting versions')
+        values = {}
+    return [values.get(_key(n), 0) for n in names]
@@ -32,30 +32,30 @@
 '''
 from __future__ import unicode_literals
 
-from django.db import transaction
-
-from uds.core.util.Config import GlobalConfig
 from uds.models import CalendarAction, getSqlDatetime
-from uds.core.util.State import State
 from uds.core.jobs.Job import Job
-from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class ScheduledAction(Job):
-    frecuency = 29  # Frecuncy for this job
+    '''
+    Calendar actions are executed on time by CalendarActionDispatcher. This job simply catches up
+    the ones that could be missed (i.e. dispatcher stopped), claiming them the same way, so no lock is held.
+    '''
+    frecuency = 293  # Frecuncy for this job
     friendly_name = 'Scheduled action runner'
 
     def __init__(self, environment):
         super(ScheduledAction, self).__init__(environment)
 
     def run(self):
-        with transaction.atomic():
-            for ca in CalendarAction.objects.select_for_update().filter(service_pool__service__provider__maintenance_mode=False, next_execution__lt=getSqlDatetime()).order_by('next_execution'):
-                logger.debug('Executing calendar action {}.{}'.format(ca.service_pool.name, ca.calendar.name))
-                try:
-                    ca.execute()
-                except Exception as e:
-                    logger.exception('Got an exception executing calendar access action: {}'.format(e))
+        for ca in CalendarAction.objects.select_related('calendar', 'service_pool').filter(service_pool__service__provider__maintenance_mode=False, next_execution__lt=getSqlDatetime()).order_by('next_execution'):
+            if ca.claim() is False:
+                continue
+            logger.debug('Executing calendar action {}.{}'.format(ca.service_pool.name, ca.calendar.name))
+            try:
+                ca.doAction()
+            except Exception as e:
+                logger.exception('Got an exception executing calendar access action: {}'.format(e))
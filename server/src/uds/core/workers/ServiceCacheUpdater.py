@@ -124,6 +124,11 @@ class ServiceCacheUpdater(Job):
                 servicesPools.append((sp, inCacheL1, inCacheL2, inAssigned))
                 continue
 
+            # If provider is not reachable right now, do not try to grow its cache
+            if sp.service.getInstance().parent().circuitBreaker().isOpen():
+                logger.debug('The provider of {} is unreachable right now, skipping it'.format(sp))
+                continue
+
             # If this service don't allows more starting user services, continue
             if UserServiceManager.manager().canInitiateServiceFromDeployedService(sp) is False:
                 logger.debug('This provider has the max allowed starting services running: {0}'.format(sp))
@@ -31,10 +31,13 @@
 '''
 from __future__ import unicode_literals
 
+from django.db.models import Count, Sum, Case, When, IntegerField
 from uds.models import DeployedService
+from uds.models import UserService
 from uds.core.util.State import State
 from uds.core.util.stats import counters
 from uds.core.managers import statsManager
+from uds.core.util.Config import GlobalConfig
 from uds.core.jobs.Job import Job
 
 import logging
@@ -44,10 +47,11 @@ logger = logging.getLogger(__name__)
 
 class DeployedServiceStatsCollector(Job):
     '''
-    This Job is responsible for collecting stats for every deployed service every ten minutes
+    This Job is responsible for collecting stats for every deployed service every "statsCollectInterval" seconds
     '''
 
-    frecuency = 599  # Once every ten minutes, 601 is prime, 599 also is prime
+    frecuency = 120
+    frecuency_cfg = GlobalConfig.STATS_COLLECT_INTERVAL
     friendly_name = 'Deployed Service Stats'
 
     def __init__(self, environment):
@@ -56,19 +60,49 @@ class DeployedServiceStatsCollector(Job):
     def run(self):
         logger.debug('Starting Deployed service stats collector')
 
-        for ds in DeployedService.objects.filter(state=State.ACTIVE):
-            try:
-                fltr = ds.assignedUserServices().exclude(state__in=State.INFO_STATES)
-                assigned = fltr.count()
-                inUse = fltr.filter(in_use=True).count()
-                counters.addCounter(ds, counters.CT_ASSIGNED, assigned)
-                counters.addCounter(ds, counters.CT_INUSE, inUse)
-            except Exception:
-                logger.exception('Getting counters for deployed service {0}'.format(ds))
+        try:
+            # Counters of all pools with a single grouped query
+            values = {}
+            for v in UserService.objects.filter(
+                deployed_service__state=State.ACTIVE, cache_level=0
+            ).exclude(state__in=State.INFO_STATES).values('deployed_service').annotate(
+                assigned=Count('id'),
+                inUse=Sum(Case(When(in_use=True, then=1), default=0, output_field=IntegerField()))
+            ).order_by('deployed_service'):
+                values[v['deployed_service']] = (v['assigned'], v['inUse'] or 0)
+
+            items = []
+            for dsId in DeployedService.objects.filter(state=State.ACTIVE).values_list('id', flat=True):
+                ds = DeployedService(id=dsId)  # Just used to identify the owner of the counters
+                assigned, inUse = values.get(dsId, (0, 0))
+                items.append((ds, counters.CT_ASSIGNED, assigned))
+                items.append((ds, counters.CT_INUSE, inUse))
+
+            counters.addCounters(items)
+        except Exception:
+            logger.exception('Getting counters for deployed services')
 
         logger.debug('Done Deployed service stats collector')
 
 
+class StatsAccumulator(Job):
+    '''
+    This Job rolls up the new counters into the accumulated (ten minutes, hourly and daily) counters
+    '''
+    frecuency = 593  # Near ten minutes, prime
+    friendly_name = 'Statistics accumulator'
+
+    def run(self):
+        logger.debug('Starting statistics accumulation')
+        try:
+            processed = statsManager().accumulateCounters()
+            logger.debug('Accumulated {} counters'.format(processed))
+        except Exception:
+            logger.exception('Accumulating counters')
+
+        logger.debug('Done statistics accumulation')
+
+
 class StatsCleaner(Job):
     '''
     This Job is responsible of housekeeping of stats tables.
@@ -34,7 +34,11 @@ from __future__ import unicode_literals
 
 from uds.core.util.Cache import Cache
 from uds.core.jobs.Job import Job
+from uds.core.managers.LogManager import LogManager
+from uds.core.util.Config import GlobalConfig
 from uds.models import TicketStore
+from uds.models import Log
+from django.db.models import Count
 from django.conf import settings
 from importlib import import_module
 
@@ -93,3 +97,23 @@ class SessionsCleaner(Job):
             pass  # No problem if no cleanup
 
         logger.debug('Done session cleanup')
+
+
+class LogMaintenance(Job):
+
+    frecuency = 3600 * 2  # Every two hours
+    friendly_name = 'Log maintenance'
+
+    def __init__(self, environment):
+        super(LogMaintenance, self).__init__(environment)
+
+    def run(self):
+        logger.debug('Starting log maintenance')
+        maxLogs = GlobalConfig.MAX_LOGS_PER_ELEMENT.getInt()
+        # Owners with too many logs, with a single grouped query
+        for v in Log.objects.values('owner_type', 'owner_id').annotate(logs=Count('id')).filter(logs__gt=maxLogs).order_by():
+            try:
+                LogManager.trim(v['owner_type'], v['owner_id'], maxLogs)
+            except Exception:
+                logger.exception('Trimming logs of {}'.format(v))
+        logger.debug('Done log maintenance')
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Simulates the actors of the machines of Simulated providers, driving /rest/actor ready/login/logout
+as real actors do, so the whole broker can be benchmarked without real machines.
+
+@author: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from uds.core.util.Config import Config, SECURITY_SECTION
+from uds.core.util.State import State
+from uds.core.util.ThreadPool import ThreadPool
+from uds.models import UserService, Provider
+
+import requests
+import random
+import json
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Simulates the actors of the machines of Simulated service providers (ready, login & logout)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', dest='url', default='http://localhost:8000', help='Base url of broker')
+        parser.add_argument('--threads', dest='threads', type=int, default=16, help='Number of concurrent actors requests')
+        parser.add_argument('--interval', dest='interval', type=float, default=5, help='Seconds between checks')
+        parser.add_argument('--session', dest='session', type=float, default=300, help='Mean duration, in seconds, of simulated user sessions')
+        parser.add_argument('--login-probability', dest='loginProbability', type=float, default=0.5,
+                            help='Probability (0-1) of an assigned and not in use machine getting logged in on every check')
+        parser.add_argument('--iterations', dest='iterations', type=int, default=0, help='Number of checks to do (0 means forever)')
+
+    def handle(self, *args, **options):
+        self._url = options['url'].rstrip('/') + '/rest/actor'
+        self._key = Config.section(SECURITY_SECTION).value('Master Key').get(True)
+        self._session = options['session']
+        self._loginProbability = options['loginProbability']
+        self._sessions = {}  # uuid -> logout time
+        self._stats = {'ready': 0, 'login': 0, 'logout': 0, 'errors': 0}
+        self._statsLock = threading.Lock()
+        pool = ThreadPool(options['threads'], queueSize=options['threads'] * 64)
+
+        iteration = 0
+        try:
+            while options['iterations'] == 0 or iteration < options['iterations']:
+                iteration += 1
+                self.step(pool)
+                pool.wait_completion()
+                with self._statsLock:
+                    stats = dict(self._stats)
+                self.stdout.write('Iteration {}: {}'.format(iteration, stats))
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pool.wait_completion()
+
+    def _inc(self, counter):
+        with self._statsLock:
+            self._stats[counter] += 1
+
+    def step(self, pool):
+        now = time.time()
+        # Real actors notifies ready once the machine has booted, so get running machines of all simulators at once
+        running = set()
+        for p in Provider.objects.filter(data_type='SimulatedProvider'):
+            running.update(p.getInstance().peekRunningMacs())
+
+        services = UserService.objects.filter(
+            deployed_service__service__provider__data_type='SimulatedProvider',
+            state__in=(State.PREPARING, State.USABLE)
+        ).select_related('user', 'deployed_service__service')
+
+        for us in services:
+            if us.unique_id == '':
+                continue
+            if us.os_state == State.PREPARING:
+                if us.unique_id.upper() in running:
+                    pool.add_task(self.ready, us.unique_id)
+                continue
+
+            if us.user is None or us.state != State.USABLE:
+                continue
+
+            if us.uuid in self._sessions:
+                if self._sessions[us.uuid] <= now:
+                    del self._sessions[us.uuid]
+                    pool.add_task(self.message, us.uuid, 'logout', us.user.name)
+            elif us.in_use is False and random.random() < self._loginProbability:
+                self._sessions[us.uuid] = now + random.expovariate(1.0 / self._session)
+                pool.add_task(self.message, us.uuid, 'login', us.user.name)
+
+    def ready(self, uniqueId):
+        try:
+            r = requests.get(self._url + '/init', params={'key': self._key, 'version': '2.1.0', 'id': uniqueId}, timeout=30).json()
+            if 'error' in r:
+                raise Exception(r['result'])
+            uuid = r['result'][0]
+            self.message(uuid, 'ready', {'ips': [[uniqueId, '127.0.0.1']], 'hostname': uniqueId.replace(':', '')})
+        except Exception as e:
+            logger.error('Error simulating ready of {}: {}'.format(uniqueId, e))
+            self._inc('errors')
+
+    def message(self, uuid, message, data):
+        try:
+            r = requests.post(
+                '{}/{}/{}'.format(self._url, uuid, message),
+                data=json.dumps({'data': data}),
+                headers={'content-type': 'application/json'},
+                timeout=30
+            ).json()
+            if 'error' in r:
+                raise Exception(r['result'])
+            self._inc(message)
+        except Exception as e:
+            logger.error('Error simulating {} of {}: {}'.format(message, uuid, e))
+            self._inc('errors')
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uds', '0024_auto_20170510_0821'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsCountersAccum',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.IntegerField(default=0)),
+                ('owner_type', models.SmallIntegerField(default=0)),
+                ('counter_type', models.SmallIntegerField(default=0)),
+                ('interval_type', models.SmallIntegerField(default=0)),
+                ('stamp', models.IntegerField(db_index=True, default=0)),
+                ('v_count', models.IntegerField(default=0)),
+                ('v_sum', models.BigIntegerField(default=0)),
+                ('v_max', models.IntegerField(default=0)),
+                ('v_min', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'uds_stats_c_acum',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='statscountersaccum',
+            unique_together=set([('interval_type', 'owner_type', 'counter_type', 'owner_id', 'stamp')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='statscountersaccum',
+            index_together=set([('interval_type', 'counter_type', 'owner_type', 'stamp')]),
+        ),
+    ]
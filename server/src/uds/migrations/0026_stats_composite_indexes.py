@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uds', '0025_statscountersaccum'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='statscounters',
+            index_together=set([('owner_type', 'counter_type', 'stamp'), ('owner_type', 'owner_id', 'counter_type', 'stamp')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='statsevents',
+            index_together=set([('owner_type', 'event_type', 'stamp')]),
+        ),
+    ]
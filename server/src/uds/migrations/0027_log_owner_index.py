@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uds', '0026_stats_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='log',
+            index_together=set([('owner_type', 'owner_id')]),
+        ),
+    ]
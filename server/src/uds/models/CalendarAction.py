@@ -34,7 +34,7 @@
 
 from __future__ import unicode_literals
 
-__updated__ = '2017-03-10'
+__updated__ = '2017-05-22'
 
 from django.utils.translation import ugettext_lazy as _
 from django.db import models
@@ -90,9 +90,18 @@ class CalendarAction(UUIDModel):
     def execute(self, save=True):
         logger.debug('Executing action')
         self.last_execution = getSqlDatetime()
-        params = json.loads(self.params)
 
-        saveServicePool = save
+        # On save, will regenerate nextExecution
+        if save:
+            self.save()
+
+        self.doAction(saveServicePool=save)
+
+    def doAction(self, saveServicePool=True):
+        '''
+        Applies the action to the service pool (without updating execution dates of this action)
+        '''
+        params = json.loads(self.params)
 
         if CALENDAR_ACTION_CACHE_L1['id'] == self.action:
             self.service_pool.cache_l1_srvs = int(params['size'])
@@ -106,13 +115,33 @@ class CalendarAction(UUIDModel):
             self.service_pool.publish(changeLog='Scheduled publication action')
             saveServicePool = False
 
-        # On save, will regenerate nextExecution
-        if save:
-            self.save()
-
         if saveServicePool:
             self.service_pool.save()
 
+    def claim(self):
+        '''
+        Marks this action as executed now, calculating its next execution.
+        The update is conditional (next execution must not have been changed meanwhile), so if several servers
+        try to claim the same action only one succeeds, and no lock is held. Returns True if claimed
+        '''
+        now = getSqlDatetime()
+        nextExecution = calendar.CalendarChecker(self.calendar).nextEvent(checkFrom=now, startEvent=self.at_start, offset=self.offset)
+        if CalendarAction.objects.filter(id=self.id, next_execution=self.next_execution).update(last_execution=now, next_execution=nextExecution) != 1:
+            return False
+
+        self.last_execution, self.next_execution = now, nextExecution
+        return True
+
+    @staticmethod
+    def recalculate(cal):
+        '''
+        Recalculates (from now) the next execution of the actions of a calendar, used when its rules are changed
+        '''
+        now = getSqlDatetime()
+        checker = calendar.CalendarChecker(cal)
+        for ca in CalendarAction.objects.filter(calendar=cal):
+            nextExecution = checker.nextEvent(checkFrom=now, startEvent=ca.at_start, offset=ca.offset)
+            CalendarAction.objects.filter(id=ca.id).update(next_execution=nextExecution)
 
     def save(self, *args, **kwargs):
         self.next_execution = calendar.CalendarChecker(self.calendar).nextEvent(checkFrom=self.last_execution, startEvent=self.at_start, offset=self.offset)
@@ -33,7 +33,7 @@
 
 from __future__ import unicode_literals
 
-__updated__ = '2016-10-31'
+__updated__ = '2016-11-02'
 
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
@@ -155,7 +155,28 @@ class CalendarRule(UUIDModel):
         self.calendar.modified = getSqlDatetime()
         self.calendar.save()
 
-        return UUIDModel.save(self, *args, **kwargs)
+        res = UUIDModel.save(self, *args, **kwargs)
+        self.__calendarChanged()
+        return res
+
+    def delete(self, *args, **kwargs):
+        self.calendar.modified = getSqlDatetime()
+        self.calendar.save()
+
+        res = UUIDModel.delete(self, *args, **kwargs)
+        self.__calendarChanged()
+        return res
+
+    def __calendarChanged(self):
+        '''
+        Drops compiled data of calendar and recalculates its actions next execution
+        (calendar modification date is also updated, so compiled calendars are rebuilt on every server)
+        '''
+        from uds.core.util.calendar import CalendarChecker
+        from uds.models.CalendarAction import CalendarAction
+
+        CalendarChecker.invalidate(self.calendar)
+        CalendarAction.recalculate(self.calendar)
 
     def __str__(self):
         return 'Rule {0}: {1}-{2}, {3}, Interval: {4}, duration: {5}'.format(self.name, self.start, self.end, self.frequency, self.interval, self.duration)
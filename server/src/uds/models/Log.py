@@ -33,7 +33,7 @@
 
 from __future__ import unicode_literals
 
-__updated__ = '2014-04-24'
+__updated__ = '2017-06-26'
 
 from django.db import models
 
@@ -64,6 +64,7 @@ class Log(models.Model):
         '''
         db_table = 'uds_log'
         app_label = 'uds'
+        index_together = (('owner_type', 'owner_id'),)
 
     def __unicode__(self):
         return u"Log of {0}({1}): {2} - {3} - {4} - {5}".format(self.owner_type, self.owner_id, self.created, self.source, self.level, self.data)
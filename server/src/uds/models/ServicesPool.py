@@ -62,7 +62,7 @@ from datetime import datetime, timedelta
 import logging
 import pickle
 
-__updated__ = '2017-05-19'
+__updated__ = '2017-05-22'
 
 
 logger = logging.getLogger(__name__)
@@ -220,47 +220,94 @@ class DeployedService(UUIDModel, TaggingMixin):
         '''
         Checks if the access for a service pool is allowed or not (based esclusively on associated calendars)
         '''
-        if chkDateTime is None:
-            chkDateTime = getSqlDatetime()
-
-        access = self.fallbackAccess
-        # Let's see if we can access by current datetime
-        for ac in self.calendaraccess_set.order_by('priority'):
-            if CalendarChecker(ac.calendar).check(chkDateTime) is True:
-                access = ac.access
-                break  # Stops on first rule match found
-
-        return access == states.action.ALLOW
+        return DeployedService.getAccessInfo([self], chkDateTime, deadlines=False)[self.id][0]
 
     def getDeadline(self, chkDateTime=None):
         '''
         Gets the deadline for an access on chkDateTime
         '''
+        return DeployedService.getAccessInfo([self], chkDateTime)[self.id][1]
+
+    @staticmethod
+    def getAccessInfo(servicePools, chkDateTime=None, deadlines=True):
+        '''
+        Evaluates the calendar based access of several service pools at once.
+
+        Access rules of all pools (and their calendars) are read with a single query, and every calendar
+        is checked just once, even if it is shared by several pools or rules.
+
+        Args:
+            servicePools: Service pools to evaluate
+            chkDateTime: Date to check (defaults to now)
+            deadlines: If False, deadlines are not calculated (and returned as None)
+
+        Returns:
+            Dictionary, indexed by service pool id, of tuples (access allowed, deadline), where deadline
+            has the same meaning as result of getDeadline
+        '''
+        from uds.models.CalendarAccess import CalendarAccess
+
         if chkDateTime is None:
             chkDateTime = getSqlDatetime()
 
-        if self.isAccessAllowed(chkDateTime) is False:
-            return -1
+        servicePools = list(servicePools)
+
+        rules = {}
+        for ac in CalendarAccess.objects.filter(service_pool__in=[sp.id for sp in servicePools]).select_related('calendar').order_by('priority'):
+            rules.setdefault(ac.service_pool_id, []).append(ac)
+
+        checks = {}  # calendar id: result of check
+        events = {}  # (calendar id, start event): next event
+
+        def check(calendar):
+            if calendar.id not in checks:
+                checks[calendar.id] = CalendarChecker(calendar).check(chkDateTime)
+            return checks[calendar.id]
+
+        def nextEvent(calendar, startEvent):
+            if (calendar.id, startEvent) not in events:
+                events[(calendar.id, startEvent)] = CalendarChecker(calendar).nextEvent(chkDateTime, startEvent)
+            return events[(calendar.id, startEvent)]
+
+        res = {}
+        for sp in servicePools:
+            spRules = rules.get(sp.id, ())
+
+            access = sp.fallbackAccess
+            # Let's see if we can access by current datetime
+            for ac in spRules:
+                if check(ac.calendar) is True:
+                    access = ac.access
+                    break  # Stops on first rule match found
+
+            allowed = access == states.action.ALLOW
+
+            if deadlines is False:
+                res[sp.id] = (allowed, None)
+                continue
+
+            if allowed is False:
+                res[sp.id] = (False, -1)
+                continue
 
-        deadLine = None
+            deadLine = None
 
-        for ac in self.calendaraccess_set.all():
-            if ac.access == states.action.ALLOW and self.fallbackAccess == states.action.DENY:
-                nextE = CalendarChecker(ac.calendar).nextEvent(chkDateTime, False)
-                if deadLine is None or deadLine > nextE:
-                    deadLine = nextE
-            elif ac.access == states.action.DENY:  # DENY
-                nextE = CalendarChecker(ac.calendar).nextEvent(chkDateTime, True)
-                if deadLine is None or deadLine > nextE:
-                    deadLine = nextE
+            for ac in spRules:
+                if ac.access == states.action.ALLOW and sp.fallbackAccess == states.action.DENY:
+                    nextE = nextEvent(ac.calendar, False)
+                    if deadLine is None or deadLine > nextE:
+                        deadLine = nextE
+                elif ac.access == states.action.DENY:  # DENY
+                    nextE = nextEvent(ac.calendar, True)
+                    if deadLine is None or deadLine > nextE:
+                        deadLine = nextE
 
-        if deadLine is None:
-            if self.fallbackAccess == states.action.ALLOW:
-                return None
+            if deadLine is None:
+                res[sp.id] = (True, None if sp.fallbackAccess == states.action.ALLOW else -1)
             else:
-                return -1
+                res[sp.id] = (True, int((deadLine - chkDateTime).total_seconds()))
 
-        return int((deadLine - chkDateTime).total_seconds())
+        return res
 
 
     def storeValue(self, name, value):
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2012 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+
+from __future__ import unicode_literals
+
+from django.db import models
+
+import six
+import logging
+
+
+__updated__ = '2017-06-12'
+
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCountersAccum(models.Model):
+    '''
+    Counter statistics rolled up by intervals (ten minutes, hours and days), so
+    long periods can be read without scanning the raw counters table
+    '''
+    # Interval types, with its duration in seconds. Must be ordered from finer to coarser
+    (TEN_MINUTES, HOUR, DAY) = range(3)
+    INTERVALS = (
+        (TEN_MINUTES, 600),
+        (HOUR, 3600),
+        (DAY, 86400),
+    )
+
+    owner_id = models.IntegerField(default=0)
+    owner_type = models.SmallIntegerField(default=0)
+    counter_type = models.SmallIntegerField(default=0)
+    interval_type = models.SmallIntegerField(default=0)
+    stamp = models.IntegerField(db_index=True, default=0)  # Start of interval
+    v_count = models.IntegerField(default=0)
+    v_sum = models.BigIntegerField(default=0)
+    v_max = models.IntegerField(default=0)
+    v_min = models.IntegerField(default=0)
+
+    class Meta:
+        '''
+        Meta class to declare db table
+        '''
+        db_table = 'uds_stats_c_acum'
+        app_label = 'uds'
+        unique_together = (('interval_type', 'owner_type', 'counter_type', 'owner_id', 'stamp'),)
+        index_together = (('interval_type', 'counter_type', 'owner_type', 'stamp'),)
+
+    @staticmethod
+    def intervalFor(interval):
+        '''
+        Returns the coarsest (interval_type, duration) whose duration fits in "interval" seconds
+        '''
+        res = StatsCountersAccum.INTERVALS[0]
+        for i in StatsCountersAccum.INTERVALS:
+            if i[1] <= interval:
+                res = i
+        return res
+
+    @staticmethod
+    def accumulate(counters):
+        '''
+        Adds raw counters, an iterable of (owner_type, owner_id, counter_type, stamp, value) tuples, to every interval.
+        Must be invoked inside a transaction, so the rollups are consistent with the processed raw counters.
+
+        Returns the number of rollup rows created or updated
+        '''
+        acc = {}
+        for owner_type, owner_id, counter_type, stamp, value in counters:
+            for interval_type, duration in StatsCountersAccum.INTERVALS:
+                key = (interval_type, owner_type, counter_type, owner_id, stamp - stamp % duration)
+                v = acc.get(key)
+                if v is None:
+                    acc[key] = [1, value, value, value]
+                else:
+                    v[0] += 1
+                    v[1] += value
+                    v[2] = max(v[2], value)
+                    v[3] = min(v[3], value)
+
+        updated = 0
+        for interval_type, _ in StatsCountersAccum.INTERVALS:
+            keys = [k for k in acc if k[0] == interval_type]
+            if len(keys) == 0:
+                continue
+
+            stamps = [k[4] for k in keys]
+            q = StatsCountersAccum.objects.filter(
+                interval_type=interval_type,
+                owner_type__in=set(k[1] for k in keys),
+                counter_type__in=set(k[2] for k in keys),
+                stamp__gte=min(stamps), stamp__lte=max(stamps)
+            )
+            for a in q:
+                v = acc.pop((a.interval_type, a.owner_type, a.counter_type, a.owner_id, a.stamp), None)
+                if v is None:
+                    continue
+                a.v_count += v[0]
+                a.v_sum += v[1]
+                a.v_max = max(a.v_max, v[2])
+                a.v_min = min(a.v_min, v[3])
+                a.save(update_fields=['v_count', 'v_sum', 'v_max', 'v_min'])
+                updated += 1
+
+        StatsCountersAccum.objects.bulk_create(
+            StatsCountersAccum(interval_type=k[0], owner_type=k[1], counter_type=k[2], owner_id=k[3], stamp=k[4], v_count=v[0], v_sum=v[1], v_max=v[2], v_min=v[3])
+            for k, v in six.iteritems(acc)
+        )
+
+        return updated + len(acc)
+
+    def __unicode__(self):
+        return u"Accumulated counter of {0}({1}): {2} - {3} ({4}) - {5}/{6}".format(self.owner_type, self.owner_id, self.stamp, self.counter_type, self.interval_type, self.v_sum, self.v_count)
@@ -40,7 +40,7 @@ from uds.models.Util import getSqlDatetime
 
 import logging
 
-__updated__ = '2016-01-19'
+__updated__ = '2017-06-14'
 
 
 logger = logging.getLogger(__name__)
@@ -68,6 +68,9 @@ class StatsEvents(models.Model):
         '''
         db_table = 'uds_stats_e'
         app_label = 'uds'
+        index_together = (
+            ('owner_type', 'event_type', 'stamp'),
+        )
 
     @staticmethod
     def get_stats(owner_type, event_type, **kwargs):
@@ -322,6 +322,10 @@ class UserService(UUIDModel):
         logger.debug(' *** Setting state to {} from {} for {}'.format(State.toString(state), State.toString(self.state), self))
 
         if state != self.state:
+            from uds.core.managers.userservice.governor import ProviderGovernor
+            # Keep provider in flight operations updated (only transitions entering or leaving a governed state are notified)
+            if self.id is not None and ProviderGovernor.operationFor(self.state) != ProviderGovernor.operationFor(state):
+                ProviderGovernor.notifyStateChange(self.deployed_service.service.provider_id, self.state, state)
             self.state_date = getSqlDatetime()
             self.state = state
 
@@ -76,6 +76,7 @@ from .Log import Log
 # Stats
 from .StatsCounters import StatsCounters
 from .StatsEvents import StatsEvents
+from .StatsCountersAccum import StatsCountersAccum
 
 
 # General utility models, such as a database cache (for caching remote content of slow connections to external services providers for example)
@@ -115,8 +116,15 @@ from .Tag import Tag
 # Utility
 from .DBFile import DBFile
 
-__updated__ = '2017-01-20'
+from uds.core.util import versions
+
+__updated__ = '2017-05-22'
 
 
 logger = logging.getLogger(__name__)
 
+# Models (edited by administration) whose changes are notified to REST clients (see uds.REST.conditional)
+# High churn models (user services, users, publications...) are not tracked, their changes are seen after conditional.MAX_AGE
+versions.track(Provider, Service, OSManager, Transport, Network, Authenticator, Group, DeployedService, ServicesPoolGroup,
+               Image, Calendar, CalendarRule, CalendarAccess, CalendarAction, Account, Proxy)
+
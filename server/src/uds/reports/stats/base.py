@@ -34,9 +34,11 @@ from __future__ import unicode_literals
 
 from django.utils.translation import ugettext_noop as _
 from uds.core import reports
+from uds.models import StatsCounters
+from uds.models import StatsEvents
 
 
-__updated__ = '2015-06-21'
+__updated__ = '2017-06-22'
 
 
 class StatsReport(reports.Report):
@@ -44,3 +46,26 @@ class StatsReport(reports.Report):
     Base report por stats reports
     '''
     group = _('Statistics')  # So we can make submenus with reports
+
+    def dataRangeEnd(self):
+        '''
+        Stamp until which (not included) the report reads stats, or None if it is not known.
+        Default is the end of the day of "endDate" field (or "startDate" if report has no "endDate")
+        '''
+        field = getattr(self, 'endDate', None) or getattr(self, 'startDate', None)
+        try:
+            return field.stamp() + 86400
+        except Exception:
+            return None
+
+    def dataVersion(self):
+        '''
+        Stats only grow, so last stored stats before the end of report range identifies the data used
+        (stats stored after the range, as the ones collected every few minutes, do not change report data)
+        '''
+        end = self.dataRangeEnd()
+        res = []
+        for model in (StatsCounters, StatsEvents):
+            query = model.objects.all() if end is None else model.objects.filter(stamp__lt=end)
+            res.append(list(query.order_by('-stamp', '-id').values_list('stamp', 'id')[:1]))
+        return res
@@ -38,6 +38,7 @@ import django.template.defaultfilters as filters
 from uds.core.ui.UserInterface import gui
 from uds.core.reports.tools import UDSImage, UDSGeraldoReport
 from uds.core.util.stats import events
+from uds.core.util.stats import bucketing
 
 import csv
 
@@ -60,7 +61,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2017-05-04'
+__updated__ = '2017-06-20'
 
 # several constants as Width height, margins, ..
 WIDTH, HEIGHT = 1800, 1000
@@ -187,11 +188,15 @@ class StatsReportLogin(StatsReport):
             samplingIntervals.append((prevVal, val))
             prevVal = val
 
+        # Logins of every interval, with a single grouped query
+        step = (end - start) / (samplingPoints + 1)
+        matrix = events.statsManager().getEventsMatrix(events.OT_AUTHENTICATOR, events.ET_LOGIN, None, start, step, len(samplingIntervals))
+
         data = []
         reportData = []
-        for interval in samplingIntervals:
+        for i, interval in enumerate(samplingIntervals):
             key = (interval[0] + interval[1]) / 2
-            val = events.statsManager().getEvents(events.OT_AUTHENTICATOR, events.ET_LOGIN, since=interval[0], to=interval[1]).count()
+            val = matrix[None][i][0]
             data.append((key, val))  # @UndefinedVariable
             reportData.append(
                 {
@@ -206,14 +211,8 @@ class StatsReportLogin(StatsReport):
         start = self.startDate.stamp()
         end = self.endDate.stamp()
 
-        dataWeek = [0] * 7
-        dataHour = [0] * 24
-        for val in events.statsManager().getEvents(events.OT_AUTHENTICATOR, events.ET_LOGIN, since=start, to=end):
-            s = datetime.datetime.fromtimestamp(val.stamp)
-            dataWeek[s.weekday()] += 1
-            dataHour[s.hour] += 1
-
-        return (dataWeek, dataHour)
+        stamps = events.statsManager().getEventsStamps(events.OT_AUTHENTICATOR, events.ET_LOGIN, since=start, to=end)
+        return bucketing.weekAndHourHistograms(stamps)
 
     def generate(self):
         # Sample query:
@@ -373,7 +372,7 @@ class StatsReportLoginCSV(StatsReportLogin):
     samplingPoints = StatsReportLogin.samplingPoints
 
     def generate(self):
-        output = StringIO.StringIO()
+        output = six.StringIO()
         writer = csv.writer(output)
 
         reportData = self.getRangeData()[2]
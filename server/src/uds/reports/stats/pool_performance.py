@@ -33,7 +33,6 @@
 from __future__ import unicode_literals
 
 from django.utils.translation import ugettext, ugettext_lazy as _
-from django.db.models import Count
 import django.template.defaultfilters as filters
 
 from uds.core.ui.UserInterface import gui
@@ -64,7 +63,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2017-05-04'
+__updated__ = '2017-06-20'
 
 # several constants as Width height, margins, ..
 WIDTH, HEIGHT = 1800, 1000
@@ -218,24 +217,25 @@ class PoolPerformanceReport(StatsReport):
 
         fld = events.statsManager().getEventFldFor('username')
 
+        # Accesses & distinct users of every pool on every interval, with a single grouped query
+        step = (end - start) / (samplingPoints + 1)
+        matrix = events.statsManager().getEventsMatrix(events.OT_DEPLOYED, events.ET_ACCESS, [p[0] for p in pools], start, step, len(samplingIntervals), distinct=fld)
+
         reportData = []
         for p in pools:
             dataUsers = []
             dataAccesses = []
-            for interval in samplingIntervals:
+            for i, interval in enumerate(samplingIntervals):
                 key = (interval[0] + interval[1]) / 2
-                q = events.statsManager().getEvents(events.OT_DEPLOYED, events.ET_ACCESS, since=interval[0], to=interval[1], owner_id=p[0]).values(fld).annotate(cnt=Count(fld))
-                accesses = 0
-                for v in q:
-                    accesses += v['cnt']
+                accesses, users = matrix[p[0]][i]
 
-                dataUsers.append((key, len(q)))  # @UndefinedVariable
+                dataUsers.append((key, users))  # @UndefinedVariable
                 dataAccesses.append((key, accesses))
                 reportData.append(
                     {
                         'name': p[1],
                         'date': tools.timestampAsStr(interval[0], xLabelFormat) + ' - ' + tools.timestampAsStr(interval[1], xLabelFormat),
-                        'users': len(q),
+                        'users': users,
                         'accesses': accesses
                     }
                 )
@@ -254,6 +254,7 @@ class PoolPerformanceReport(StatsReport):
         end = self.endDate.stamp()
 
         xLabelFormat, poolsData, reportData = self.getRangeData()
+        self.progress(50)  # Data gathered, charts & pdf generation remains
 
         surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, WIDTH, HEIGHT)  # @UndefinedVariable
 
@@ -369,7 +370,7 @@ class PoolPerformanceReportCSV(PoolPerformanceReport):
     samplingPoints = PoolPerformanceReport.samplingPoints
 
     def generate(self):
-        output = StringIO.StringIO()
+        output = six.StringIO()
         writer = csv.writer(output)
 
         reportData = self.getRangeData()[2]
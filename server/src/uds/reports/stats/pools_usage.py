@@ -65,7 +65,7 @@ import six
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2017-05-03'
+__updated__ = '2017-06-20'
 
 # several constants as Width height, margins, ..
 WIDTH, HEIGHT = 1800, 1000
@@ -156,28 +156,17 @@ class CountersPoolAssigned(StatsReport):
     def getData(self):
         # Generate the sampling intervals and get dataUsers from db
         start = self.startDate.date()
-        end = self.startDate.date() + datetime.timedelta(days=1)
 
-        data = []
-
-        for poolUuid in self.pools.value:
-            try:
-                pool = ServicePool.objects.get(uuid=poolUuid)
-            except Exception:
-                pass  # Ignore pool
-
-            hours = {}
-            for i in range(24):
-                hours[i] = 0
+        pools = list(ServicePool.objects.filter(uuid__in=self.pools.value))
 
-            for x in counters.getCounters(pool, counters.CT_ASSIGNED, since=start, to=end, limit=24, use_max=True, all=False):
-                hour = x[0].hour
-                val = int(x[1])
-                if hours[hour] < val:
-                    hours[hour] = val
-
-            data.append({'uuid':pool.uuid, 'name': pool.name, 'hours': hours})
+        # Max assigned services of every hour, for all pools at once
+        matrix = counters.getCountersMatrix(pools, counters.CT_ASSIGNED, since=start, step=3600, intervals=24, use_max=True)
 
+        data = []
+        for pool in pools:
+            values = matrix.get(pool.id, [None] * 24)
+            hours = dict((i, int(values[i] or 0)) for i in range(24))
+            data.append({'uuid': pool.uuid, 'name': pool.name, 'hours': hours})
 
         logger.debug('data: {}'.format(data))
 
@@ -185,6 +174,7 @@ class CountersPoolAssigned(StatsReport):
 
     def generate(self):
         items = self.getData()
+        self.progress(50)  # Data gathered, charts & pdf generation remains
 
         surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, WIDTH, HEIGHT)  # @UndefinedVariable
 
@@ -55,7 +55,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2016-05-17'
+__updated__ = '2017-06-20'
 
 # several constants as Width height, margins, ..
 WIDTH, HEIGHT = 1800, 1000
@@ -132,23 +132,20 @@ class UsageByPool(StatsReport):
         logger.debug(self.pool.value)
         pool = ServicePool.objects.get(uuid=self.pool.value)
 
-        items = events.statsManager().getEvents(events.OT_DEPLOYED, (events.ET_LOGIN, events.ET_LOGOUT), owner_id=pool.id, since=start, to=end).order_by('stamp')
+        items = events.statsManager().getEventsRows(events.OT_DEPLOYED, (events.ET_LOGIN, events.ET_LOGOUT), ('event_type', 'stamp', 'fld4'), owner_id=pool.id, since=start, to=end)
 
         logins = {}
         data = []
-        for i in items:
-            # if '\\' in i.fld1:
-            #    continue
-
-            if i.event_type == events.ET_LOGIN:
-                logins[i.fld4] = i.stamp
+        for eventType, eventStamp, username in items:
+            if eventType == events.ET_LOGIN:
+                logins[username] = eventStamp
             else:
-                if i.fld4 in logins:
-                    stamp = logins[i.fld4]
-                    del logins[i.fld4]
-                    total = i.stamp - stamp
+                if username in logins:
+                    stamp = logins[username]
+                    del logins[username]
+                    total = eventStamp - stamp
                     data.append({
-                        'name': i.fld4,
+                        'name': username,
                         'date': datetime.datetime.fromtimestamp(stamp),
                         'time': total
                     })
@@ -180,7 +177,7 @@ class UsageByPoolCSV(UsageByPool):
     endDate = UsageByPool.endDate
 
     def generate(self):
-        output = StringIO.StringIO()
+        output = six.StringIO()
         writer = csv.writer(output)
 
         reportData, poolName = self.getData()
@@ -57,7 +57,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2017-05-09'
+__updated__ = '2017-06-20'
 
 # several constants as Width height, margins, ..
 WIDTH, HEIGHT = 1800, 1000
@@ -134,21 +134,18 @@ class UsageSummaryByPool(StatsReport):
         end = self.endDate.stamp()
         logger.debug(self.pool.value)
 
-        items = events.statsManager().getEvents(events.OT_DEPLOYED, (events.ET_LOGIN, events.ET_LOGOUT), owner_id=pool.id, since=start, to=end).order_by('stamp')
+        items = events.statsManager().getEventsRows(events.OT_DEPLOYED, (events.ET_LOGIN, events.ET_LOGOUT), ('event_type', 'stamp', 'fld4'), owner_id=pool.id, since=start, to=end)
 
         logins = {}
         users = {}
-        for i in items:
-            # if '\\' in i.fld1:
-            #    continue
-            username = i.fld4
-            if i.event_type == events.ET_LOGIN:
-                logins[username] = i.stamp
+        for eventType, eventStamp, username in items:
+            if eventType == events.ET_LOGIN:
+                logins[username] = eventStamp
             else:
                 if username in logins:
                     stamp = logins[username]
                     del logins[username]
-                    total = i.stamp - stamp
+                    total = eventStamp - stamp
                     if username not in users:
                         users[username] = { 'sessions': 0, 'time': 0 }
                     users[username]['sessions'] += 1
@@ -31,6 +31,7 @@
 .. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
 '''
 from uds.core.services import UserDeployment
+from uds.core.services.Exceptions import ProviderUnavailableError
 from uds.core.util.State import State
 from uds.core.util import log
 from .OVirtJobs import OVirtDeferredRemoval
@@ -308,6 +309,9 @@ class OVirtLinkedDeployment(UserDeployment):
 
             execFnc()
 
+            return State.RUNNING
+        except ProviderUnavailableError:
+            self.__pushFrontOp(opRetry)  # Provider is not reachable right now, retry operation later
             return State.RUNNING
         except Exception as e:
             return self.__error(e)
@@ -494,6 +498,8 @@ class OVirtLinkedDeployment(UserDeployment):
                 return self.__executeQueue()
 
             return state
+        except ProviderUnavailableError:
+            return State.RUNNING  # Provider is not reachable right now, simply check again later
         except Exception as e:
             return self.__error(e)
 
@@ -131,7 +131,7 @@ class Provider(ServiceProvider):
         if self._api is None:
             APIClass = self._api = client.getClient(self.ovirtVersion.value)
             self._api = APIClass(self.host.value, self.username.value, self.password.value, self.timeout.value, self.cache)
-        return self._api
+        return self.circuitBreaker().wrap(self._api, stateReads=('getMachineState', 'getTemplateState'))
 
     # There is more fields type, but not here the best place to cover it
     def initialize(self, values=None):
@@ -125,7 +125,7 @@ class OGDeployment(UserDeployment):
         Deploys an service instance for an user.
         '''
         logger.debug('Deploying for user')
-        self.__initQueueForDeploy(False)
+        self.__initQueueForDeploy()
         return self.__executeQueue()
 
     def deployForCache(self, cacheLevel):
@@ -38,6 +38,7 @@ from .OGPublication import OGPublication
 from . import helpers
 
 from uds.core.ui import gui
+from uds.models.Util import getSqlDatetime
 
 import logging
 
@@ -45,6 +46,9 @@ __updated__ = '2017-05-18'
 
 logger = logging.getLogger(__name__)
 
+STASH_KEY = 'reservations'
+STASH_VALIDITY = 300  # Seconds a bulk reserved machine can wait in stash before being released
+
 
 class OGService(Service):
     '''
@@ -131,6 +135,18 @@ class OGService(Service):
         required=False
     )
 
+    reserveBatch = gui.NumericField(
+        length=3,
+        label=_("Reservations batch"),
+        order=111,
+        tooltip=_('Number of machines reserved at once when the cache needs to grow. Extra reserved machines are kept for next deployments'),
+        defvalue='1',
+        minValue=1,
+        maxValue=64,
+        tab=_('Advanced'),
+        required=False
+    )
+
     ov = gui.HiddenField(value=None)
     ev = gui.HiddenField(value=None)  # We need to keep the env so we can instantiate the Provider
 
@@ -142,7 +158,9 @@ class OGService(Service):
         initialized by __init__ method of base class, before invoking this.
         '''
         if values is not None:
-            pass
+            # Image can be newer than the cached catalog, so getImage refreshes it if image is not found
+            if self.parent().api.getImage(self.ou.value, self.image.value) is None:
+                raise Service.ValidationException(ugettext('The selected image is not available for remote pc on OpenGnsys'))
 
     def initGui(self):
         '''
@@ -155,10 +173,66 @@ class OGService(Service):
         self.ev.setDefValue(self.parent().env.key)
 
     def status(self, machineId):
-        return self.parent().status(machineId)
+        # Status is requested by lab, so all deployments of the same lab shares the request
+        return self.parent().statusMany([machineId])[machineId]
 
     def reserve(self):
-        return self.parent().reserve(self.ou.value, self.image.value, self.lab.value, self.maxReservationTime.num())
+        '''
+        Reserves a machine.
+        If reservations batch is greater than 1, machines are reserved in bulk, and the extra ones are
+        stashed (at service storage) for next invocations. Stashed machines not used in STASH_VALIDITY seconds
+        are released.
+        '''
+        batch = self.reserveBatch.num()
+        if batch <= 1:
+            return self.parent().reserve(self.ou.value, self.image.value, self.lab.value, self.maxReservationTime.num())
+
+        now = getSqlDatetime(True)
+        got, expired = [], []
+
+        def popStash(stash):
+            stash = stash or []
+            expired.extend(r for r in stash if r['stamp'] + STASH_VALIDITY < now)
+            stash = [r for r in stash if r['stamp'] + STASH_VALIDITY >= now]
+            if stash:
+                got.append(stash.pop(0))
+            return stash
+
+        self.storage.updatePickle(STASH_KEY, popStash)
+
+        for r in expired:
+            self.__unreserveQuietly(r['id'])
+
+        if got:
+            return got[0]
+
+        reservations = self.parent().reserveMany(self.ou.value, self.image.value, self.lab.value, self.maxReservationTime.num(), batch)
+        if len(reservations) == 0:
+            raise Exception('No machines available for reservation')
+
+        for r in reservations[1:]:
+            r['stamp'] = now
+
+        def pushStash(stash):
+            return (stash or []) + reservations[1:]
+
+        self.storage.updatePickle(STASH_KEY, pushStash)
+
+        return reservations[0]
 
     def unreserve(self, machineId):
         return self.parent().unreserve(machineId)
+
+    def __unreserveQuietly(self, machineId):
+        try:
+            self.unreserve(machineId)
+        except Exception as e:
+            logger.info('Error releasing stashed reservation {}: {}'.format(machineId, e))
+
+    def destroy(self):
+        '''
+        Releases stashed reservations (if any)
+        '''
+        for r in self.storage.getPickle(STASH_KEY) or []:
+            self.__unreserveQuietly(r['id'])
+        self.storage.remove(STASH_KEY)
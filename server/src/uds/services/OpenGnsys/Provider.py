@@ -127,7 +127,7 @@ class OGProvider(ServiceProvider):
     @property
     def api(self):
         if self._api is None:
-            self._api = og.OpenGnsysClient(self.username.value, self.password.value, self.endpoint, self.cache, self.checkCert.isTrue())
+            self._api = og.OpenGnsysClient(self.username.value, self.password.value, self.endpoint, self.cache, self.checkCert.isTrue(), self.timeout.num())
 
         logger.debug('Api: {}'.format(self._api))
         return self._api
@@ -179,3 +179,9 @@ class OGProvider(ServiceProvider):
 
     def status(self, machineId):
         return self.api.status(machineId)
+
+    def reserveMany(self, ou, image, lab=0, maxtime=0, count=1):
+        return self.api.reserveMany(ou, image, lab, maxtime, count)
+
+    def statusMany(self, machineIds):
+        return self.api.statusMany(machineIds)
@@ -28,8 +28,9 @@ def getResources(parameters):
 
     api = provider.api
 
-    labs = [gui.choiceItem('0', _('All Labs'))] + [gui.choiceItem(l['id'], l['name']) for l in api.getLabs(ou=parameters['ou'])]
-    images = [gui.choiceItem(z['id'], z['name']) for z in api.getImages(ou=parameters['ou'])]
+    # Administrator is choosing, so catalogs are refreshed (new labs or images must be seen at once)
+    labs = [gui.choiceItem('0', _('All Labs'))] + [gui.choiceItem(l['id'], l['name']) for l in api.getLabs(ou=parameters['ou'], force=True)]
+    images = [gui.choiceItem(z['id'], z['name']) for z in api.getImages(ou=parameters['ou'], force=True)]
 
     data = [
         {'name': 'lab', 'values': labs },
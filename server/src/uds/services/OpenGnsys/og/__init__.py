@@ -38,6 +38,7 @@ from . import fake
 import sys
 import imp
 import re
+import threading
 
 import logging
 import six
@@ -45,6 +46,8 @@ import six
 import requests
 import  json
 
+from uds.core.util.ThreadPool import ThreadPool
+
 __updated__ = '2017-05-18'
 
 logger = logging.getLogger(__name__)
@@ -54,6 +57,27 @@ logger = logging.getLogger(__name__)
 # Fake part
 FAKE = True
 CACHE_VALIDITY = 180
+CATALOG_CACHE_VALIDITY = 600  # Ous, labs & images catalog
+STATUS_CACHE_VALIDITY = 10  # Status of all clients of a lab
+BULK_THREADS = 8  # Concurrent requests for bulk operations
+
+# Pooled http sessions, one per endpoint, shared by all clients of this process
+_sessions = {}
+_sessionsLock = threading.Lock()
+
+
+def getSession(endpoint):
+    '''
+    Returns the (keep alive, pooled) http session used to talk with an OpenGnsys endpoint
+    '''
+    with _sessionsLock:
+        session = _sessions.get(endpoint)
+        if session is None:
+            session = _sessions[endpoint] = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=BULK_THREADS * 2)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
 
 
 # Decorator
@@ -83,14 +107,16 @@ def ensureResponseIsValid(response, errMsg=None):
     return json.loads(response.content)
 
 class OpenGnsysClient(object):
-    def __init__(self, username, password, endpoint, cache, verifyCert=False):
+    def __init__(self, username, password, endpoint, cache, verifyCert=False, timeout=10):
         self.username = username
         self.password = password
         self.endpoint = endpoint
         self.auth = None
         self.cache = cache
         self.verifyCert = verifyCert
+        self.timeout = int(timeout)
         self.cachedVersion = None
+        self.session = getSession(endpoint)
 
     @property
     def headers(self):
@@ -106,7 +132,7 @@ class OpenGnsysClient(object):
     def _post(self, path, data, errMsg=None):
         if not FAKE:
             return ensureResponseIsValid(
-                requests.post(self._ogUrl(path), data=json.dumps(data), headers=self.headers, verify=self.verifyCert),
+                self.session.post(self._ogUrl(path), data=json.dumps(data), headers=self.headers, verify=self.verifyCert, timeout=self.timeout),
                 errMsg=errMsg
             )
         # FAKE Connection :)
@@ -115,7 +141,7 @@ class OpenGnsysClient(object):
     def _get(self, path, errMsg=None):
         if not FAKE:
             return ensureResponseIsValid(
-                requests.get(self._ogUrl(path), headers=self.headers, verify=self.verifyCert),
+                self.session.get(self._ogUrl(path), headers=self.headers, verify=self.verifyCert, timeout=self.timeout),
                 errMsg=errMsg
             )
         # FAKE Connection :)
@@ -125,11 +151,24 @@ class OpenGnsysClient(object):
     def _delete(self, path, errMsg=None):
         if not FAKE:
             return ensureResponseIsValid(
-                requests.delete(self._ogUrl(path), headers=self.headers, verify=self.verifyCert),
+                self.session.delete(self._ogUrl(path), headers=self.headers, verify=self.verifyCert, timeout=self.timeout),
                 errMsg=errMsg
             )
         return fake.delete(path, errMsg)
 
+    def _cachedGet(self, cacheKey, path, errMsg, force=False, validity=CATALOG_CACHE_VALIDITY):
+        '''
+        Gets path, using the cached result if available and not forced to refresh it
+        '''
+        cacheKey = '{}{}'.format(self.endpoint, cacheKey)
+        if force is False:
+            res = self.cache.get(cacheKey)
+            if res is not None:
+                return res
+        res = self._get(path, errMsg=errMsg)
+        self.cache.put(cacheKey, res, validity)
+        return res
+
     def connect(self):
         if self.auth is not None:
             return
@@ -162,29 +201,43 @@ class OpenGnsysClient(object):
         return self.cachedVersion
 
     @ensureConnected
-    def getOus(self):
+    def getOus(self, force=False):
         # Returns an array of elements with:
         # 'id': OpenGnsys Id
         # 'name': OU name
         # OpenGnsys already returns it in this format :)
-        return self._get(urls.OUS, errMsg='Getting list of ous')
+        return self._cachedGet('ous', urls.OUS, errMsg='Getting list of ous', force=force)
 
     @ensureConnected
-    def getLabs(self, ou):
+    def getLabs(self, ou, force=False):
         # Returns a list of available labs on an ou
         # /ous/{ouid}/labs
         # Take into accout that we must exclude the ones with "inremotepc" set to false.
         errMsg = 'Getting list of labs from ou {}'.format(ou)
-        return [{'id': l['id'], 'name': l['name']} for l in self._get(urls.LABS.format(ou=ou), errMsg=errMsg) if l.get('inremotepc', False) is True]
+        labs = self._cachedGet('labs{}'.format(ou), urls.LABS.format(ou=ou), errMsg=errMsg, force=force)
+        return [{'id': l['id'], 'name': l['name']} for l in labs if l.get('inremotepc', False) is True]
 
 
     @ensureConnected
-    def getImages(self, ou):
+    def getImages(self, ou, force=False):
         # Returns a list of available labs on an ou
         # /ous/{ouid}/images
         # Take into accout that we must exclude the ones with "inremotepc" set to false.
         errMsg = 'Getting list of images from ou {}'.format(ou)
-        return [{'id': l['id'], 'name': l['name']} for l in self._get(urls.IMAGES.format(ou=ou), errMsg=errMsg) if l.get('inremotepc', False) is True]
+        images = self._cachedGet('images{}'.format(ou), urls.IMAGES.format(ou=ou), errMsg=errMsg, force=force)
+        return [{'id': l['id'], 'name': l['name']} for l in images if l.get('inremotepc', False) is True]
+
+    def getImage(self, ou, image):
+        '''
+        Returns an image from catalog. If not found at cached catalog, catalog is refreshed (refresh on miss)
+        Returns None if image does not exists (or it's not available for remote pc)
+        Used to validate the image of services
+        '''
+        for force in (False, True):
+            for i in self.getImages(ou, force=force):
+                if six.text_type(i['id']) == six.text_type(image):
+                    return i
+        return None
 
     @ensureConnected
     def reserve(self, ou, image, lab=0, maxtime=24):
@@ -210,6 +263,31 @@ class OpenGnsysClient(object):
             'mac': ':'.join(re.findall('..', res['mac']))
         }
 
+    def reserveMany(self, ou, image, lab=0, maxtime=24, count=1):
+        '''
+        Reserves "count" machines, issuing the reservations concurrently over the pooled session
+        Returns the list of reservations obtained (can be less than count, if OpenGnsys has no more machines available)
+        '''
+        self.connect()
+        results = []
+        lock = threading.Lock()
+
+        def doReserve():
+            try:
+                r = self.reserve(ou, image, lab, maxtime)
+            except Exception as e:
+                logger.info('Reservation failed on bulk reserve: {}'.format(e))
+                return
+            with lock:
+                results.append(r)
+
+        pool = ThreadPool(min(count, BULK_THREADS))
+        for __ in range(count):
+            pool.add_task(doReserve)
+        pool.wait_completion()
+
+        return results
+
     @ensureConnected
     def unreserve(self, id):
         # This method releases the previous reservation
@@ -226,3 +304,37 @@ class OpenGnsysClient(object):
         # Look at api at informatica.us..
         ou, lab, client = id.split('.')
         return self._get(urls.STATUS.format(ou=ou, lab=lab, client=client))
+
+    @ensureConnected
+    def labStatus(self, ou, lab, force=False):
+        '''
+        Returns a dictionary client id -> status of all clients of a lab, using one request
+        /ous/{uoid}/labs/{labid}/clients/status
+        Result is cached for a few seconds, so many deployments of same lab share the request
+        '''
+        res = self._cachedGet('status{}.{}'.format(ou, lab), urls.LABSTATUS.format(ou=ou, lab=lab),
+                              errMsg='Getting status of lab {} in ou {}'.format(lab, ou), force=force, validity=STATUS_CACHE_VALIDITY)
+        return dict((six.text_type(s['id']), s) for s in res)
+
+    def statusMany(self, ids):
+        '''
+        Returns a dictionary id -> status for all the ids requested, with one request per lab instead of one per machine.
+        Machines not found at its lab status are requested individually
+        '''
+        res = {}
+        byLab = {}
+        for id in ids:
+            ou, lab, client = id.split('.')
+            byLab.setdefault((ou, lab), []).append((id, client))
+
+        for (ou, lab), clients in six.iteritems(byLab):
+            try:
+                status = self.labStatus(ou, lab) if lab != '0' else {}
+            except Exception as e:
+                logger.info('Could not get status of lab {}: {}'.format(lab, e))
+                status = {}
+            for id, client in clients:
+                if client not in status:  # Refresh on miss
+                    status[client] = self.status(id)
+                res[id] = status[client]
+        return res
@@ -191,6 +191,7 @@ def post(path, data, errMsg):
         res = copy.deepcopy(RESERVE)
         res['name'] += six.text_type(random.randint(5000, 100000))
         res['mac'] = ''.join(random.choice('0123456789ABCDEF') for __ in range(12))
+        res['id'] = random.randint(1, 32)
         return res
 
     raise Exception('Unknown FAKE URL on POST: {}'.format(path))
@@ -210,6 +211,13 @@ def get(path, errMsg):
         return IMAGES
     elif path == urls.IMAGES.format(ou=2):
         return []
+    elif path[-14:] == 'clients/status':  # Status of all clients of a lab
+        res = []
+        for client in range(1, 33):
+            st = copy.deepcopy(STATUS_READY_LINUX if random.randint(0, 100) < 25 else STATUS_OFF)
+            st['id'] = client
+            res.append(st)
+        return res
     elif path[-6:] == 'status':
         rnd = random.randint(0, 100)
         if rnd < 25:
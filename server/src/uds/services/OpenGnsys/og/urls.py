@@ -43,3 +43,4 @@ IMAGES = '/ous/{ou}/images'
 RESERVE = '/ous/{ou}/images/{image}/reserve'
 UNRESERVE = '/ous/{ou}/labs/{lab}/clients/{client}/unreserve'
 STATUS = '/ous/{ou}/labs/{lab}/clients/{client}/status'
+LABSTATUS = '/ous/{ou}/labs/{lab}/clients/status'
@@ -127,12 +127,12 @@ class Provider(ServiceProvider):
             self.timeout.value = validators.validateTimeout(self.timeout.value, returnAsInteger=False)
 
     def api(self, projectId=None, region=None):
-        return openStack.Client(self.host.value, self.port.value,
+        return self.circuitBreaker().wrap(openStack.Client(self.host.value, self.port.value,
                                      self.domain.value, self.username.value, self.password.value,
                                      useSSL=self.ssl.isTrue(),
                                      projectId=projectId,
                                      region=region,
-                                     access=self.access.value)
+                                     access=self.access.value), stateReads=('getServer',))
 
     def sanitizeVmName(self, name):
         return openStack.sanitizeName(name)
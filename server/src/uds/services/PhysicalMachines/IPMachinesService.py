@@ -35,17 +35,36 @@ from django.utils.translation import ugettext_lazy as _
 from uds.core import services
 from uds.core.services import types as serviceTypes
 from uds.core.ui.UserInterface import gui
+from uds.models.Util import getSqlDatetime
 from .IPMachineDeployed import IPMachineDeployed
+import hashlib
 import logging
 import pickle
+import re
 
 logger = logging.getLogger(__name__)
 
+# Selection policies
+LRU = 'lru'
+ROUND_ROBIN = 'rr'
+
+# Status index (attr1 of every ip entry on storage)
+FREE = 'ipf'
+ASSIGNED = 'ipa'
+
+INDEX_VERSION = '1'
+
+# Ip entries are stored as "ip~position". Other entries (pickled ips list, index hash, cursor) never match this
+IP_ENTRY_RE = re.compile(r'^[^\s~]+~\d+$')
+
 
 class IPMachinesService(services.Service):
 
     # Gui
     ipList = gui.EditableList(label=_('List of IPS'))
+    selectionPolicy = gui.ChoiceField(label=_('Selection policy'), tooltip=_('How a free machine is choosen when assigning a new one'),
+                                      values=[gui.choiceItem(LRU, _('Least recently used')), gui.choiceItem(ROUND_ROBIN, _('Round robin'))],
+                                      defvalue=LRU)
 
     # Description of service
     typeName = _('Static Multiple IP')
@@ -66,45 +85,99 @@ class IPMachinesService(services.Service):
 
     def __init__(self, environment, parent, values=None):
         super(IPMachinesService, self).__init__(environment, parent, values)
+        self._policy = LRU
         if values is None or values.get('ipList', None) is None:
             self._ips = []
         else:
             self._ips = list('{}~{}'.format(ip, i) for i, ip in enumerate(values['ipList']))  # Allow duplicates right now
             self._ips.sort()
+            self._policy = values.get('selectionPolicy') or LRU
+            self.__syncIndex()
 
     def valuesDict(self):
         ips = (i.split('~')[0] for i in self._ips)
 
-        return {'ipList': gui.convertToList(ips)}
+        return {'ipList': gui.convertToList(ips), 'selectionPolicy': self._policy}
 
     def marshal(self):
         self.storage.saveData('ips', pickle.dumps(self._ips))
-        return 'v1'
+        return str('v2\t' + self._policy)
 
     def unmarshal(self, vals):
-        if vals == 'v1':
+        if vals.startswith('v'):
             self._ips = pickle.loads(str(self.storage.readData('ips')))
+        if vals.startswith('v2'):
+            self._policy = vals.split('\t')[1]
+
+    def __indexHash(self):
+        h = hashlib.md5()
+        h.update(INDEX_VERSION)
+        h.update(self._policy)
+        for ip in self._ips:
+            h.update(ip.encode('utf-8'))
+        return h.hexdigest()
+
+    def __freeAttr(self, ip):
+        '''
+        Attr1 of a free entry. Entries are taken in attr1 order, so for least recently used
+        the release time goes first, and for round robin only the position of the ip counts
+        '''
+        stamp = getSqlDatetime(True) if self._policy == LRU else 0
+        return '{}{:010d}{:05d}'.format(FREE, stamp, int(ip.split('~')[1]))
+
+    def __syncIndex(self):
+        '''
+        Keeps the storage status index (one entry per ip, with attr1 FREE+order or ASSIGNED) in sync with the ip list.
+        Entries from versions with no index (existence of the entry meant "assigned") are converted to ASSIGNED
+        '''
+        indexHash = self.__indexHash()
+        if self.storage.readData('ipIndex') == indexHash:
+            return
+
+        current = set(self._ips)
+        existing = set()
+        for _key, ip, attr1 in self.storage.filter(None):
+            ip = ip.decode('utf-8')
+            if IP_ENTRY_RE.match(ip) is None:  # Not an ip entry (ips list, index hash, cursor, ...)
+                continue
+            existing.add(ip)
+            if attr1 is None or attr1 == '':  # Pre index entry, means assigned
+                self.storage.setAttr1(ip, ASSIGNED)
+            elif attr1.startswith(FREE):
+                if ip not in current:
+                    self.storage.remove(ip)
+                elif self._policy == ROUND_ROBIN:
+                    self.storage.setAttr1(ip, self.__freeAttr(ip))
+
+        for ip in current - existing:
+            self.storage.saveData(ip, ip, self.__freeAttr(ip))
+
+        self.storage.saveData('ipIndex', indexHash)
 
     def getUnassignedMachine(self):
-        # Search first unassigned machine
+        # Take first free machine (in policy order) using an atomic conditional update, so no lock is needed
         try:
-            self.storage.lock()
-            for ip in self._ips:
-                if self.storage.readData(ip) == None:
-                    self.storage.saveData(ip, ip)
-                    return ip
-            return None
+            self.__syncIndex()
+            if self._policy == ROUND_ROBIN:
+                cursor = self.storage.readData('rrCursor')
+                ip = self.storage.claimByAttr1(FREE, ASSIGNED, after=cursor)
+                if ip is None and cursor is not None:  # Wrap around
+                    ip = self.storage.claimByAttr1(FREE, ASSIGNED)
+                if ip is not None:
+                    self.storage.saveData('rrCursor', self.__freeAttr(ip))
+            else:
+                ip = self.storage.claimByAttr1(FREE, ASSIGNED)
+
+            return ip.decode('utf-8') if ip is not None else None
         except Exception:
             logger.exception("Exception at getUnassignedMachine")
             return None
-        finally:
-            self.storage.unlock()
 
     def unassignMachine(self, ip):
         try:
-            self.storage.lock()
-            self.storage.remove(ip)
+            if ip in self._ips:
+                self.storage.setAttr1(ip, self.__freeAttr(ip))
+            else:  # Removed from list while assigned
+                self.storage.remove(ip)
         except Exception:
-            logger.exception("Exception at getUnassignedMachine")
-        finally:
-            self.storage.unlock()
+            logger.exception("Exception at unassignMachine")
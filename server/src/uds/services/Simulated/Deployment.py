@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from uds.core.services import UserDeployment
+from uds.core.services.Exceptions import ProviderUnavailableError
+from uds.core.util.State import State
+from uds.core.util import log
+
+from . import simulator
+
+import pickle
+import random
+import six
+import logging
+
+__updated__ = '2017-06-22'
+
+logger = logging.getLogger(__name__)
+
+opCreate, opStart, opStop, opRemove, opWait, opError, opFinish, opRetry = range(8)
+
+NO_MORE_NAMES = 'NO-NAME-ERROR'
+
+
+class SimulatedDeployment(UserDeployment):
+    '''
+    User deployment of simulated machines.
+
+    Machines go through create -> start -> (wait for actor) -> finish, and through an extra stop
+    for L2 cache, the same way a real hypervisor based deployment does.
+    Errors caused by api rate limits are retried later, as a real deployment should do.
+    '''
+
+    # : Recheck every five seconds by default (for task methods)
+    suggestedTime = 5
+
+    def initialize(self):
+        self._name = ''
+        self._ip = ''
+        self._mac = ''
+        self._vmid = ''
+        self._reason = ''
+        self._queue = []
+
+    # Serializable needed methods
+    def marshal(self):
+        return '\1'.join(['v1', self._name, self._ip, self._mac, self._vmid, self._reason, pickle.dumps(self._queue)])
+
+    def unmarshal(self, str_):
+        vals = str_.split('\1')
+        if vals[0] == 'v1':
+            self._name, self._ip, self._mac, self._vmid, self._reason, queue = vals[1:]
+            self._queue = pickle.loads(queue)
+
+    def getName(self):
+        if self._name == '':
+            try:
+                self._name = self.nameGenerator().get(self.service().getBaseName(), self.service().getLenName())
+            except KeyError:
+                return NO_MORE_NAMES
+        return self._name
+
+    def setIp(self, ip):
+        logger.debug('Setting IP to {}'.format(ip))
+        self._ip = ip
+
+    def getUniqueId(self):
+        if self._mac == '':
+            self._mac = self.macGenerator().get(self.service().getMacRange())
+        return self._mac.upper()
+
+    def getIp(self):
+        return self._ip
+
+    def setReady(self):
+        if self.cache.get('ready') == '1':
+            return State.FINISHED
+
+        if self.service().getMachineState(self._vmid) == simulator.UNKNOWN:
+            return self.__error('Machine is not available anymore')
+
+        self.service().startMachine(self._vmid)
+        self.cache.put('ready', '1')
+        return State.FINISHED
+
+    def notifyReadyFromOsManager(self, data):
+        if self.__getCurrentOp() == opWait:
+            logger.debug('Machine is ready. Moving to level 2')
+            self.__popCurrentOp()  # Remove current state
+            return self.__executeQueue()
+        return State.FINISHED
+
+    def deployForUser(self, user):
+        self.__initQueueForDeploy(False)
+        return self.__executeQueue()
+
+    def deployForCache(self, cacheLevel):
+        self.__initQueueForDeploy(cacheLevel == self.L2_CACHE)
+        return self.__executeQueue()
+
+    def __initQueueForDeploy(self, forLevel2=False):
+        if forLevel2 is False:
+            self._queue = [opCreate, opStart, opFinish]
+        else:
+            self._queue = [opCreate, opStart, opWait, opStop, opFinish]
+
+    def __checkMachineState(self, chkState):
+        state = self.service().getMachineState(self._vmid)
+
+        if state == simulator.UNKNOWN:
+            return self.__error('Machine not found')
+
+        return State.FINISHED if state == chkState else State.RUNNING
+
+    def __getCurrentOp(self):
+        if len(self._queue) == 0:
+            return opFinish
+
+        return self._queue[0]
+
+    def __popCurrentOp(self):
+        if len(self._queue) == 0:
+            return opFinish
+
+        return self._queue.pop(0)
+
+    def __pushFrontOp(self, op):
+        self._queue.insert(0, op)
+
+    def __error(self, reason):
+        logger.debug('Setting error state, reason: {0}'.format(reason))
+        self.doLog(log.ERROR, reason)
+
+        if self._vmid != '':
+            try:
+                self.service().removeMachine(self._vmid)
+            except Exception:
+                logger.debug('Can\'t remove machine')
+
+        self._queue = [opError]
+        self._reason = six.text_type(reason)
+        return State.ERROR
+
+    def __executeQueue(self):
+        op = self.__getCurrentOp()
+
+        if op == opError:
+            return State.ERROR
+
+        if op == opFinish:
+            return State.FINISHED
+
+        fncs = {
+            opCreate: self.__create,
+            opRetry: self.__retry,
+            opStart: self.__startMachine,
+            opStop: self.__stopMachine,
+            opWait: self.__wait,
+            opRemove: self.__remove,
+        }
+
+        try:
+            execFnc = fncs.get(op, None)
+
+            if execFnc is None:
+                return self.__error('Unknown operation found at execution queue ({0})'.format(op))
+
+            execFnc()
+
+            return State.RUNNING
+        except (ProviderUnavailableError, simulator.RateLimitExceeded):
+            self.__pushFrontOp(opRetry)  # Retry operation later
+            return State.RUNNING
+        except Exception as e:
+            return self.__error(e)
+
+    # Queue execution methods
+    def __retry(self):
+        return State.FINISHED
+
+    def __wait(self):
+        return State.RUNNING
+
+    def __create(self):
+        name = self.getName()
+        if name == NO_MORE_NAMES:
+            raise Exception('No more names available for this service. (Increase digits for this service to fix)')
+
+        # Mac is assigned before creating, so simulator can be queried by it (see simulateActors command)
+        self._vmid = self.service().deployFromTemplate(name, self.publication().getTemplateId(), self.getUniqueId())
+        self._ip = '10.{}.{}.{}'.format(random.randint(0, 255), random.randint(0, 255), random.randint(1, 254))
+
+    def __remove(self):
+        self.service().removeMachine(self._vmid)
+
+    def __startMachine(self):
+        self.service().startMachine(self._vmid)
+
+    def __stopMachine(self):
+        self.service().stopMachine(self._vmid)
+
+    # Check methods
+    def __checkCreate(self):
+        return self.__checkMachineState(simulator.STOPPED)
+
+    def __checkStart(self):
+        return self.__checkMachineState(simulator.RUNNING)
+
+    def __checkStop(self):
+        return self.__checkMachineState(simulator.STOPPED)
+
+    def __checkRemoved(self):
+        return State.FINISHED if self.service().getMachineState(self._vmid) == simulator.UNKNOWN else State.RUNNING
+
+    def checkState(self):
+        op = self.__getCurrentOp()
+
+        if op == opError:
+            return State.ERROR
+
+        if op == opFinish:
+            return State.FINISHED
+
+        fncs = {
+            opCreate: self.__checkCreate,
+            opRetry: self.__retry,
+            opWait: self.__wait,
+            opStart: self.__checkStart,
+            opStop: self.__checkStop,
+            opRemove: self.__checkRemoved,
+        }
+
+        try:
+            chkFnc = fncs.get(op, None)
+
+            if chkFnc is None:
+                return self.__error('Unknown operation found at check queue ({0})'.format(op))
+
+            state = chkFnc()
+            if state == State.FINISHED:
+                self.__popCurrentOp()  # Remove runing op
+                return self.__executeQueue()
+
+            return state
+        except (ProviderUnavailableError, simulator.RateLimitExceeded):
+            return State.RUNNING  # Simply check again later
+        except Exception as e:
+            return self.__error(e)
+
+    def finish(self):
+        pass
+
+    def assignToUser(self, user):
+        pass
+
+    def moveToCache(self, newLevel):
+        if opRemove in self._queue:
+            return State.RUNNING
+
+        if newLevel == self.L1_CACHE:
+            self._queue = [opStart, opFinish]
+        else:
+            self._queue = [opStart, opStop, opFinish]
+
+        return self.__executeQueue()
+
+    def userLoggedIn(self, user):
+        pass
+
+    def userLoggedOut(self, user):
+        pass
+
+    def reasonOfError(self):
+        return self._reason
+
+    def destroy(self):
+        op = self.__getCurrentOp()
+
+        if op == opError:
+            return self.__error('Machine is already in error state!')
+
+        if op in (opFinish, opWait, opStart, opStop, opCreate, opRetry):
+            self._queue = [opRemove, opFinish]
+            return self.__executeQueue()
+
+        self._queue = [op, opRemove, opFinish]
+        return State.RUNNING
+
+    def cancel(self):
+        return self.destroy()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.utils.translation import ugettext_noop as _
+from uds.core.services import ServiceProvider
+from uds.core.ui import gui
+
+from .Service import SimulatedService
+from . import simulator
+
+import logging
+import six
+
+__updated__ = '2017-06-22'
+
+logger = logging.getLogger(__name__)
+
+
+class Provider(ServiceProvider):
+    '''
+    Simulated service provider.
+
+    Does not connects to anything, but simulates the behavior (latencies, failures, api limits) of a
+    real hypervisor, so UDS can be tested at scale without one.
+    '''
+    offers = [SimulatedService]
+    typeName = _('Simulated Provider')
+    typeType = 'SimulatedProvider'
+    typeDescription = _('Simulated service provider for load and scale testing')
+    iconFile = 'provider.png'
+
+    latency = gui.NumericField(length=5, label=_('Operations latency'), defvalue='10', minValue=0, order=1,
+                               tooltip=_('Mean duration, in seconds, of machine operations (create, start, stop, remove)'), required=True)
+    jitter = gui.NumericField(length=5, label=_('Latency deviation'), defvalue='5', minValue=0, order=2,
+                              tooltip=_('Deviation, in seconds, of operations duration'), required=True)
+    distribution = gui.ChoiceField(label=_('Latency distribution'), order=3, tooltip=_('Distribution of operations duration'), required=True,
+                                   values=[gui.choiceItem(v, v) for v in simulator.DISTRIBUTIONS], defvalue=simulator.UNIFORM)
+    failureRate = gui.NumericField(length=3, label=_('Failure rate'), defvalue='0', minValue=0, maxValue=100, order=4,
+                                   tooltip=_('Percentage of api calls that will fail'), required=True)
+    rateLimit = gui.NumericField(length=5, label=_('Api rate limit'), defvalue='0', minValue=0, order=5,
+                                 tooltip=_('Maximum number of api calls per second (0 means no limit)'), required=True)
+    callCost = gui.NumericField(length=5, label=_('Api call cost'), defvalue='0', minValue=0, order=6,
+                                tooltip=_('Time, in milliseconds, every api call takes'), required=True)
+
+    maxPreparingServices = gui.NumericField(length=3, label=_('Creation concurrency'), defvalue='10', minValue=1, maxValue=65536, order=50, tooltip=_('Maximum number of concurrently creating VMs'), required=True, tab=gui.ADVANCED_TAB)
+    maxRemovingServices = gui.NumericField(length=3, label=_('Removal concurrency'), defvalue='5', minValue=1, maxValue=65536, order=51, tooltip=_('Maximum number of concurrently removing VMs'), required=True, tab=gui.ADVANCED_TAB)
+
+    # Own variables
+    _api = None
+
+    def initialize(self, values=None):
+        '''
+        We will use the "autosave" feature for form fields
+        '''
+        self._api = None
+
+        if values is not None and self.distribution.value not in simulator.DISTRIBUTIONS:
+            raise ServiceProvider.ValidationException(_('Invalid latency distribution'))
+
+    def getSimulator(self):
+        '''
+        Returns the simulated hypervisor (not passed through circuit breaker)
+        '''
+        if self._api is None:
+            self._api = simulator.SimulatedHypervisor(
+                self.env.key,
+                self.storage,
+                latency=self.latency.num(),
+                jitter=self.jitter.num(),
+                distribution=self.distribution.value,
+                failureRate=self.failureRate.num(),
+                rateLimit=self.rateLimit.num(),
+                callCost=self.callCost.num()
+            )
+        return self._api
+
+    @property
+    def api(self):
+        return self.circuitBreaker().wrap(self.getSimulator(), stateReads=('getMachineState',))
+
+    def testConnection(self):
+        try:
+            self.api.test()
+        except Exception as e:
+            return [False, six.text_type(e)]
+        return [True, _('Simulated provider is working fine')]
+
+    @staticmethod
+    def test(env, data):
+        '''
+        Test Simulated Provider connectivity
+
+        Args:
+            env: environment passed for testing (temporal environment passed)
+            data: data passed for testing (data obtained from the form definition)
+
+        Returns:
+            Array of two elements, first is True of False, depending on test
+            (True is all right, false is error),
+            second is an String with error, preferably internacionalizated..
+        '''
+        return Provider(env, data).testConnection()
+
+    def stats(self):
+        '''
+        Returns the counters of api calls done to this provider (on this process)
+        '''
+        return self.getSimulator().stats()
+
+    def makeTemplate(self, name):
+        return self.api.makeTemplate(name)
+
+    def checkTemplatePublished(self, templateId):
+        return self.api.isTemplateReady(templateId)
+
+    def removeTemplate(self, templateId):
+        return self.api.removeTemplate(templateId)
+
+    def deployFromTemplate(self, name, templateId, mac=''):
+        return self.api.createMachine(name, templateId, mac)
+
+    def getMachineState(self, machineId):
+        return self.api.getMachineState(machineId)
+
+    def peekMachineState(self, machineId):
+        return self.getSimulator().peekMachineState(machineId)
+
+    def peekRunningMacs(self):
+        return self.getSimulator().peekRunningMacs()
+
+    def startMachine(self, machineId):
+        return self.api.startMachine(machineId)
+
+    def stopMachine(self, machineId):
+        return self.api.stopMachine(machineId)
+
+    def removeMachine(self, machineId):
+        return self.api.removeMachine(machineId)
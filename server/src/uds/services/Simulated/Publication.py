@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from uds.core.services import Publication
+from uds.core.util.State import State
+
+import six
+import logging
+
+__updated__ = '2017-06-22'
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedPublication(Publication):
+    '''
+    Publication of simulated machines. Simply "creates" a simulated template
+    '''
+    suggestedTime = 5  # : Suggested recheck time if publication is unfinished in seconds
+
+    def initialize(self):
+        self._name = ''
+        self._reason = ''
+        self._templateId = ''
+        self._state = 'r'
+
+    def marshal(self):
+        return '\t'.join(['v1', self._name, self._reason, self._templateId, self._state])
+
+    def unmarshal(self, data):
+        vals = data.split('\t')
+        if vals[0] == 'v1':
+            self._name, self._reason, self._templateId, self._state = vals[1:]
+
+    def publish(self):
+        self._name = 'UDSP ' + self.dsName() + "-" + six.text_type(self.revision())
+        self._reason = ''
+        self._state = 'running'
+        try:
+            self._templateId = self.service().makeTemplate(self._name)
+        except Exception as e:
+            self._state = 'error'
+            self._reason = six.text_type(e)
+            return State.ERROR
+
+        return State.RUNNING
+
+    def checkState(self):
+        if self._state == 'running':
+            try:
+                if self.service().checkTemplatePublished(self._templateId) is False:
+                    return State.RUNNING
+                self._state = 'ok'
+            except Exception as e:
+                self._state = 'error'
+                self._reason = six.text_type(e)
+
+        if self._state == 'error':
+            return State.ERROR
+
+        return State.FINISHED
+
+    def finish(self):
+        pass
+
+    def reasonOfError(self):
+        return self._reason
+
+    def destroy(self):
+        try:
+            self.service().removeTemplate(self._templateId)
+        except Exception as e:
+            self._state = 'error'
+            self._reason = six.text_type(e)
+            return State.ERROR
+
+        return State.FINISHED
+
+    def cancel(self):
+        return self.destroy()
+
+    def getTemplateId(self):
+        return self._templateId
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+from django.utils.translation import ugettext_noop as _
+from uds.core.transports import protocols
+from uds.core.services import Service, types as serviceTypes
+from uds.core.ui import gui
+
+from .Publication import SimulatedPublication
+from .Deployment import SimulatedDeployment
+
+import logging
+
+__updated__ = '2017-06-22'
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedService(Service):
+    '''
+    Simulated machines service
+    '''
+    typeName = _('Simulated machines')
+    typeType = 'SimulatedService'
+    typeDescription = _('Simulated machines, for load and scale testing')
+    iconFile = 'service.png'
+
+    maxDeployed = -1
+    usesCache = True
+    cacheTooltip = _('Number of desired machines to keep running waiting for an user')
+    usesCache_L2 = True
+    cacheTooltip_L2 = _('Number of desired machines to keep stopped waiting for use')
+
+    needsManager = True
+    mustAssignManually = False
+
+    publicationType = SimulatedPublication
+    deployedType = SimulatedDeployment
+
+    allowedProtocols = protocols.GENERIC
+    servicesTypeProvided = (serviceTypes.VDI,)
+
+    baseName = gui.TextField(label=_('Machine Names'), rdonly=False, order=1, tooltip=('Base name for simulated machines'), required=True, defvalue='SIM')
+    lenName = gui.NumericField(length=1, label=_('Name Length'), defvalue=5, order=2, tooltip=_('Size of numeric part for the names of these machines (between 3 and 6)'), required=True)
+    macsRange = gui.TextField(length=36, label=_('Macs range'), defvalue='52:54:AA:00:00:00-52:54:AA:FF:FF:FF', order=3,
+                              tooltip=_('Range of macs for simulated machines. Actors simulator identifies machines by them'), required=True)
+
+    def initialize(self, values):
+        if values is not None:
+            if self.baseName.value.isdigit():
+                raise Service.ValidationException(_('The machine name can\'t be only numbers'))
+
+    def getBaseName(self):
+        return self.baseName.value
+
+    def getLenName(self):
+        return int(self.lenName.value)
+
+    def getMacRange(self):
+        return self.macsRange.value
+
+    def makeTemplate(self, name):
+        return self.parent().makeTemplate(name)
+
+    def checkTemplatePublished(self, templateId):
+        return self.parent().checkTemplatePublished(templateId)
+
+    def removeTemplate(self, templateId):
+        return self.parent().removeTemplate(templateId)
+
+    def deployFromTemplate(self, name, templateId, mac=''):
+        return self.parent().deployFromTemplate(name, templateId, mac)
+
+    def getMachineState(self, machineId):
+        return self.parent().getMachineState(machineId)
+
+    def startMachine(self, machineId):
+        return self.parent().startMachine(machineId)
+
+    def stopMachine(self, machineId):
+        return self.parent().stopMachine(machineId)
+
+    def removeMachine(self, machineId):
+        return self.parent().removeMachine(machineId)
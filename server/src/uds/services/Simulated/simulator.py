@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (c) 2017 Virtual Cable S.L.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#    * Neither the name of Virtual Cable S.L. nor the names of its contributors
+#      may be used to endorse or promote products derived from this software
+#      without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+'''
+Simulated hypervisor used by the Simulated provider.
+
+Machines are kept at provider storage (so every broker server sees the same "hypervisor"), and
+each one has a current state, the time at which the running operation will finish and the state
+reached then. States are evaluated lazily at getMachineState, so no background thread is needed.
+
+.. moduleauthor:: Adolfo Gómez, dkmaster at dkmon dot com
+'''
+from __future__ import unicode_literals
+
+import threading
+import random
+import time
+import logging
+
+__updated__ = '2017-06-22'
+
+logger = logging.getLogger(__name__)
+
+# Machine states
+CREATING = 'creating'
+STARTING = 'starting'
+RUNNING = 'running'
+STOPPING = 'stopping'
+STOPPED = 'stopped'
+REMOVING = 'removing'
+UNKNOWN = 'unknown'
+
+# Latency distributions
+FIXED = 'fixed'
+UNIFORM = 'uniform'
+NORMAL = 'normal'
+EXPONENTIAL = 'exponential'
+
+DISTRIBUTIONS = (FIXED, UNIFORM, NORMAL, EXPONENTIAL)
+
+
+class SimulatedError(Exception):
+    '''
+    Simulated failure of the hypervisor api
+    '''
+    pass
+
+
+class RateLimitExceeded(SimulatedError):
+    '''
+    Simulated "too many requests" answer of the hypervisor api
+    '''
+    pass
+
+
+class Stats(object):
+    '''
+    Per process counters of simulated api usage, so benchmarks can see what the broker is asking for
+    '''
+    _lock = threading.Lock()
+    _counters = {}
+
+    @staticmethod
+    def inc(key, counter):
+        with Stats._lock:
+            c = Stats._counters.setdefault(key, {})
+            c[counter] = c.get(counter, 0) + 1
+
+    @staticmethod
+    def get(key):
+        with Stats._lock:
+            return dict(Stats._counters.get(key, {}))
+
+
+class RateLimiter(object):
+    '''
+    Simple per process token bucket
+    '''
+    _lock = threading.Lock()
+    _buckets = {}
+
+    @staticmethod
+    def consume(key, rate):
+        if rate <= 0:
+            return True
+        now = time.time()
+        with RateLimiter._lock:
+            tokens, stamp = RateLimiter._buckets.get(key, (rate, now))
+            tokens = min(rate, tokens + (now - stamp) * rate)
+            if tokens < 1:
+                RateLimiter._buckets[key] = (tokens, now)
+                return False
+            RateLimiter._buckets[key] = (tokens - 1, now)
+            return True
+
+
+class SimulatedHypervisor(object):
+    '''
+    Simulated hypervisor api
+    '''
+    def __init__(self, key, storage, latency=10, jitter=5, distribution=UNIFORM, failureRate=0, rateLimit=0, callCost=0):
+        '''
+        Args:
+            key: Identifier of this hypervisor (used for rate limiting and stats)
+            storage: Storage where machines are kept
+            latency: Mean duration, in seconds, of operations (create, start, stop, remove)
+            jitter: Deviation of latency (meaning depends on distribution)
+            distribution: One of DISTRIBUTIONS
+            failureRate: Percentage (0-100) of api calls that will fail
+            rateLimit: Max api calls per second (0 means unlimited)
+            callCost: Time, in milliseconds, that every api call takes
+        '''
+        self._key = key
+        self._storage = storage
+        self._latency = float(latency)
+        self._jitter = float(jitter)
+        self._distribution = distribution
+        self._failureRate = float(failureRate)
+        self._rateLimit = float(rateLimit)
+        self._callCost = float(callCost) / 1000.0
+
+    def _duration(self):
+        if self._distribution == FIXED:
+            res = self._latency
+        elif self._distribution == NORMAL:
+            res = random.gauss(self._latency, self._jitter)
+        elif self._distribution == EXPONENTIAL:
+            res = random.expovariate(1.0 / self._latency) if self._latency > 0 else 0
+        else:
+            res = random.uniform(self._latency - self._jitter, self._latency + self._jitter)
+        return max(0.0, res)
+
+    def _call(self, operation):
+        '''
+        Accounts & simulates the cost of an api call, raising the simulated errors
+        '''
+        Stats.inc(self._key, operation)
+        if RateLimiter.consume(self._key, self._rateLimit) is False:
+            Stats.inc(self._key, 'throttled')
+            raise RateLimitExceeded('Rate limit exceeded')
+        if self._callCost > 0:
+            time.sleep(self._callCost)
+        if self._failureRate > 0 and random.uniform(0, 100) < self._failureRate:
+            Stats.inc(self._key, 'failed')
+            raise SimulatedError('Simulated failure on {}'.format(operation))
+
+    @staticmethod
+    def _resolve(vm, now):
+        if vm is not None and vm['until'] <= now:
+            vm['state'], vm['until'] = vm['next'], 0
+        return vm
+
+    def _load(self, machineId):
+        return self._resolve(self._storage.getPickle(machineId), time.time())
+
+    def _transition(self, machineId, vm, state, nextState):
+        vm['state'], vm['next'], vm['until'] = state, nextState, time.time() + self._duration()
+        self._storage.putPickle(machineId, vm)
+
+    def test(self):
+        self._call('test')
+        return True
+
+    def makeTemplate(self, name):
+        self._call('makeTemplate')
+        templateId = 'tpl-{}'.format(random.randint(0, 0xFFFFFFFF))
+        self._storage.putPickle(templateId, {'name': name, 'state': CREATING, 'next': STOPPED, 'until': time.time() + self._duration()})
+        return templateId
+
+    def isTemplateReady(self, templateId):
+        self._call('isTemplateReady')
+        vm = self._load(templateId)
+        if vm is None:
+            raise SimulatedError('Template {} not found'.format(templateId))
+        return vm['state'] == STOPPED
+
+    def removeTemplate(self, templateId):
+        self._call('removeTemplate')
+        self._storage.remove(templateId)
+
+    def createMachine(self, name, templateId, mac=''):
+        self._call('createMachine')
+        machineId = 'vm-{}'.format(random.randint(0, 0xFFFFFFFF))
+        vm = {'name': name, 'template': templateId, 'mac': mac}
+        self._transition(machineId, vm, CREATING, STOPPED)
+        return machineId
+
+    def startMachine(self, machineId):
+        self._call('startMachine')
+        vm = self._load(machineId)
+        if vm is None:
+            raise SimulatedError('Machine {} not found'.format(machineId))
+        if vm['state'] in (RUNNING, STARTING):
+            return
+        self._transition(machineId, vm, STARTING, RUNNING)
+
+    def stopMachine(self, machineId):
+        self._call('stopMachine')
+        vm = self._load(machineId)
+        if vm is None:
+            raise SimulatedError('Machine {} not found'.format(machineId))
+        if vm['state'] in (STOPPED, STOPPING):
+            return
+        self._transition(machineId, vm, STOPPING, STOPPED)
+
+    def removeMachine(self, machineId):
+        self._call('removeMachine')
+        vm = self._load(machineId)
+        if vm is None:
+            return
+        self._transition(machineId, vm, REMOVING, UNKNOWN)
+
+    def getMachineState(self, machineId):
+        self._call('getMachineState')
+        vm = self._load(machineId)
+        if vm is None:
+            return UNKNOWN
+        if vm['state'] == UNKNOWN:  # Removal finished, free storage
+            self._storage.remove(machineId)
+        return vm['state']
+
+    def peekMachineState(self, machineId):
+        '''
+        Returns machine state without simulating an api call (no cost, no limits, not accounted)
+        '''
+        vm = self._load(machineId)
+        return UNKNOWN if vm is None else vm['state']
+
+    def peekRunningMacs(self):
+        '''
+        Returns the set of macs of running machines, reading the whole storage at once
+        without simulating api calls (no cost, no limits, not accounted)
+        '''
+        now = time.time()
+        return set(
+            vm['mac'] for _, vm, _ in self._storage.filterPickle()
+            if vm.get('mac') and self._resolve(vm, now)['state'] == RUNNING
+        )
+
+    def stats(self):
+        return Stats.get(self._key)
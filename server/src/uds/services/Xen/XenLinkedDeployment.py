@@ -32,6 +32,7 @@
 '''
 
 from uds.core.services import UserDeployment
+from uds.core.services.Exceptions import ProviderUnavailableError
 from uds.core.util.State import State
 from uds.core.util import log
 
@@ -286,6 +287,9 @@ class XenLinkedDeployment(UserDeployment):
 
             execFnc()
 
+            return State.RUNNING
+        except ProviderUnavailableError:
+            self.__pushFrontOp(opRetry)  # Provider is not reachable right now, retry operation later
             return State.RUNNING
         except Exception as e:
             return self.__error(e)
@@ -484,6 +488,8 @@ class XenLinkedDeployment(UserDeployment):
                 return self.__executeQueue()
 
             return state
+        except ProviderUnavailableError:
+            return State.RUNNING  # Provider is not reachable right now, simply check again later
         except Exception as e:
             return self.__error(e)
 
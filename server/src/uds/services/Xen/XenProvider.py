@@ -119,7 +119,7 @@ class Provider(ServiceProvider):
         logger.debug('API verifySSL: {} {}'.format(self.verifySSL.value, self.verifySSL.isTrue()))
         if self._api is None or force:
             self._api = XenServer(self.host.value, '443', self.username.value, self.password.value, True, self.verifySSL.isTrue())
-        return self._api
+        return self.circuitBreaker().wrap(self._api, stateReads=('getVMPowerState',))
 
     # There is more fields type, but not here the best place to cover it
     def initialize(self, values=None):
@@ -51,7 +51,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-__updated__ = '2017-02-27'
+__updated__ = '2017-05-22'
 
 
 def about(request):
@@ -85,6 +85,9 @@ def index(request):
     availServices = DeployedService.getDeployedServicesForGroups(groups)
     availUserServices = UserService.getUserAssignedServices(request.user)
 
+    # Calendar access of all pools, evaluated at once
+    accessInfo = DeployedService.getAccessInfo([svr.deployed_service for svr in availUserServices] + availServices, deadlines=False)
+
     # Information for administrators
     nets = ''
     validTrans = ''
@@ -135,7 +138,7 @@ def index(request):
             'imageId': imageId,
             'show_transports': svr.deployed_service.show_transports,
             'maintenance': svr.deployed_service.isInMaintenance(),
-            'not_accesible': not svr.deployed_service.isAccessAllowed(),
+            'not_accesible': not accessInfo[svr.deployed_service.id][0],
             'in_use': svr.in_use,
             'to_be_replaced': False,  # Manually assigned will not be autoremoved never
             'comments': svr.comments,
@@ -192,7 +195,7 @@ def index(request):
             'imageId': imageId,
             'show_transports': svr.show_transports,
             'maintenance': svr.isInMaintenance(),
-            'not_accesible': not svr.isAccessAllowed(),
+            'not_accesible': not accessInfo[svr.id][0],
             'in_use': in_use,
             'to_be_replaced': tbr,
             'to_be_replaced_text': tbrt,